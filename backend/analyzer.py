@@ -1,13 +1,27 @@
 """
 Graph Analyzer - Core analysis module
 Converted from MATLAB Graph_Analyzer_v2025_03_08.m
+
+scipy is imported inside the functions that use it: loading scipy.signal
+costs about a second, which every serverless cold start would otherwise pay
+(see coldstart.py).
 """
 import numpy as np
-from scipy.signal import find_peaks, savgol_filter
-from scipy.interpolate import interp1d
-from typing import List, Tuple, Optional
+from functools import lru_cache
+from typing import Callable, Dict, List, Tuple, Optional, Sequence
+import hashlib
 import json
-from dataclasses import dataclass
+import threading
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+
+try:
+    from backend.lod import LODPyramid
+except ImportError:
+    from lod import LODPyramid
+
+
+SEGMENT_CACHE_SIZE = 32
 
 
 @dataclass
@@ -17,13 +31,245 @@ class Extremum:
     extremum_type: int  # 1 = max, 0 = min
 
 
+EXTREMUM_DTYPE = np.dtype([('value', 'f8'), ('index', 'i8'), ('type', 'i1')])
+
+
+class ExtremaIndex:
+    """Extrema kept sorted by sample index in a structured numpy array.
+
+    Lookups are binary searches; inserts and removals shift the tail in place
+    (one memmove) inside a buffer with spare capacity. Iteration and item
+    access yield Extremum objects, so the index can be used like the list of
+    extrema it replaces.
+    """
+
+    def __init__(self, records: Optional[np.ndarray] = None):
+        if records is None:
+            records = np.zeros(0, dtype=EXTREMUM_DTYPE)
+        self._n = len(records)
+        self._data = np.zeros(max(16, 2 * self._n), dtype=EXTREMUM_DTYPE)
+        self._data[:self._n] = records
+
+    @classmethod
+    def from_arrays(cls, indices, values, types) -> 'ExtremaIndex':
+        records = np.zeros(len(indices), dtype=EXTREMUM_DTYPE)
+        records['index'] = indices
+        records['value'] = values
+        records['type'] = types
+        return cls(records[np.argsort(records['index'], kind='stable')])
+
+    @classmethod
+    def from_extrema(cls, extrema) -> 'ExtremaIndex':
+        if isinstance(extrema, ExtremaIndex):
+            return cls(extrema.records.copy())
+        extrema = list(extrema)
+        return cls.from_arrays(
+            [e.index for e in extrema], [e.value for e in extrema], [e.extremum_type for e in extrema]
+        )
+
+    @property
+    def records(self) -> np.ndarray:
+        return self._data[:self._n]
+
+    @property
+    def indices(self) -> np.ndarray:
+        return self.records['index']
+
+    @property
+    def values(self) -> np.ndarray:
+        return self.records['value']
+
+    @property
+    def types(self) -> np.ndarray:
+        return self.records['type']
+
+    def __len__(self) -> int:
+        return self._n
+
+    def _to_extremum(self, record) -> Extremum:
+        return Extremum(value=float(record['value']), index=int(record['index']),
+                        extremum_type=int(record['type']))
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return [self._to_extremum(r) for r in self.records[item]]
+        if item < 0:
+            item += self._n
+        if not 0 <= item < self._n:
+            raise IndexError("Extremum index out of range")
+        return self._to_extremum(self._data[item])
+
+    def __iter__(self):
+        for record in self.records:
+            yield self._to_extremum(record)
+
+    def to_list(self) -> List[Extremum]:
+        return list(self)
+
+    def insert(self, value: float, index: int, extremum_type: int) -> Optional[int]:
+        """Insert in sorted position; returns the position, or None if the index is taken."""
+        pos = int(np.searchsorted(self.indices, index))
+        if pos < self._n and self._data[pos]['index'] == index:
+            return None
+        if self._n == len(self._data):
+            grown = np.zeros(2 * len(self._data), dtype=EXTREMUM_DTYPE)
+            grown[:self._n] = self.records
+            self._data = grown
+        self._data[pos + 1:self._n + 1] = self._data[pos:self._n]
+        self._data[pos] = (value, index, extremum_type)
+        self._n += 1
+        return pos
+
+    def extend(self, indices, values, types) -> None:
+        """Append extrema (sorted by index) that all follow the current last one."""
+        indices = np.asarray(indices, dtype=np.int64)
+        if len(indices) == 0:
+            return
+        if self._n and indices[0] <= self._data[self._n - 1]['index']:
+            raise ValueError("Appended extrema must follow the existing ones")
+        needed = self._n + len(indices)
+        if needed > len(self._data):
+            grown = np.zeros(max(needed, 2 * len(self._data)), dtype=EXTREMUM_DTYPE)
+            grown[:self._n] = self.records
+            self._data = grown
+        block = self._data[self._n:needed]
+        block['index'] = indices
+        block['value'] = values
+        block['type'] = types
+        self._n = needed
+
+    def remove_at(self, pos: int) -> Extremum:
+        removed = self[pos]
+        self._data[pos:self._n - 1] = self._data[pos + 1:self._n]
+        self._n -= 1
+        return removed
+
+    def find_first_within(self, index: int, tolerance: int) -> Optional[int]:
+        """Position of the lowest-index extremum with |ext.index - index| < tolerance."""
+        pos = int(np.searchsorted(self.indices, index - tolerance, side='right'))
+        if pos < self._n and abs(int(self._data[pos]['index']) - index) < tolerance:
+            return pos
+        return None
+
+    def nearest(self, index: int) -> Optional[int]:
+        """Position of the extremum closest to `index` (lower index wins ties)."""
+        if self._n == 0:
+            return None
+        pos = int(np.searchsorted(self.indices, index))
+        if pos == 0:
+            return 0
+        if pos == self._n:
+            return self._n - 1
+        before, after = int(self._data[pos - 1]['index']), int(self._data[pos]['index'])
+        return pos - 1 if index - before <= after - index else pos
+
+
+def _select_by_distance(positions: np.ndarray, priority: np.ndarray, distance: int) -> np.ndarray:
+    """Mask of peaks kept by find_peaks' ``distance`` rule, in numpy.
+
+    find_peaks keeps peaks greedily from the highest priority down, dropping
+    those closer than ``distance`` to a kept one. A peak is kept by that pass
+    exactly when it outranks every undecided peak within ``distance`` (kept
+    peaks have already dropped their neighbours), so each round decides all
+    such peaks at once and only the undecided ones go on to the next round.
+    """
+    n = len(positions)
+    keep = np.zeros(n, dtype=bool)
+    if distance <= 1 or n < 2:
+        keep[:] = True
+        return keep
+    # Same argsort as find_peaks, so ties are broken the same way
+    rank = np.empty(n, dtype=np.int64)
+    rank[np.argsort(priority)] = np.arange(n)
+    undecided = np.arange(n)
+    while len(undecided):
+        pos = positions[undecided]
+        lo = np.searchsorted(pos, pos - distance, side='right')
+        hi = np.searchsorted(pos, pos + distance, side='left')
+        # Window maxima via reduceat over (lo, hi) pairs; the sentinel makes hi == len valid
+        ranks = np.append(rank[undecided], -1)
+        bounds = np.empty(2 * len(undecided), dtype=np.int64)
+        bounds[0::2], bounds[1::2] = lo, hi
+        winners = np.maximum.reduceat(ranks, bounds)[0::2] == ranks[:-1]
+        keep[undecided[winners]] = True
+        # Peaks within reach of a winner are dropped
+        size = len(undecided) + 1
+        reach = np.bincount(lo[winners], minlength=size) - np.bincount(hi[winners], minlength=size)
+        undecided = undecided[np.cumsum(reach[:-1]) == 0]
+    return keep
+
+
+@lru_cache(maxsize=None)
+def _scipy_select_by_distance() -> Optional[Callable]:
+    try:
+        # The compiled loop behind find_peaks' distance rule; private, so optional
+        from scipy.signal._peak_finding_utils import _select_by_peak_distance
+    except ImportError:
+        return None
+    return _select_by_peak_distance
+
+
+def select_by_distance(positions: np.ndarray, priority: np.ndarray, distance: int) -> np.ndarray:
+    compiled = _scipy_select_by_distance() if distance > 1 else None
+    if compiled is None:
+        return _select_by_distance(positions, priority, distance)
+    return compiled(positions.astype(np.intp), priority.astype(np.float64), float(distance))
+
+
+def detect_extrema(signal: np.ndarray, min_distance: int = 1,
+                   alternate: bool = False) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Maxima and minima of a 1-D signal in one pass; returns (indices, values, types).
+
+    Gives the same extrema as ``find_peaks(signal, distance=min_distance)``
+    and ``find_peaks(-signal, distance=min_distance)`` merged by index. A
+    turning point is where the direction of the non-zero steps flips; a flat
+    run between the two steps is a plateau and, as in find_peaks, the extremum
+    sits at its midpoint. With ``alternate`` only the highest maximum (lowest
+    minimum) of each run of consecutive same-type extrema is kept, so maxima
+    and minima strictly alternate as the LHL/HLH patterns assume.
+    """
+    if min_distance < 1:
+        raise ValueError("min_distance must be at least 1")
+    signal = np.asarray(signal, dtype=np.float64)
+    step = np.diff(signal)
+    if np.count_nonzero(step) == len(step):
+        rising = step > 0
+        flips = np.flatnonzero(rising[:-1] != rising[1:])
+        indices = flips + 1
+    else:
+        moves = np.flatnonzero(step)
+        rising = step[moves] > 0
+        flips = np.flatnonzero(rising[:-1] != rising[1:])
+        indices = (moves[flips] + 1 + moves[flips + 1]) // 2
+    types = rising[flips].astype(np.int8)  # rising into the turn makes it a maximum
+    values = signal[indices]
+
+    if min_distance > 1:
+        keep = np.zeros(len(indices), dtype=bool)
+        for t, sign in ((1, 1.0), (0, -1.0)):
+            of_type = np.flatnonzero(types == t)
+            keep[of_type] = select_by_distance(indices[of_type], sign * values[of_type], min_distance)
+        indices, values, types = indices[keep], values[keep], types[keep]
+
+    if alternate and len(indices) > 1:
+        group = np.concatenate([[0], np.cumsum(types[1:] != types[:-1])])
+        signed = np.where(types == 1, values, -values)
+        # Most extreme member of each group first; earliest wins ties
+        order = np.lexsort((-signed, group))
+        first = np.concatenate([[0], np.flatnonzero(np.diff(group[order])) + 1])
+        chosen = np.sort(order[first])
+        indices, values, types = indices[chosen], values[chosen], types[chosen]
+    return indices.astype(np.int64), values, types
+
+
 def _smooth_for_spline(values: np.ndarray) -> np.ndarray:
     """Apply a Savitzky-Golay filter so spline output visibly differs from linear.
 
     Window scales with the signal length (~15% of points, odd, >=5), polyorder=3.
     Falls back to the original values if the signal is too short to filter.
+    Filters along the last axis, so a (segments, length) matrix is smoothed row-wise.
     """
-    n = len(values)
+    n = values.shape[-1]
     if n < 7:
         return values
     window = max(5, int(round(n * 0.15)) | 1)
@@ -31,46 +277,465 @@ def _smooth_for_spline(values: np.ndarray) -> np.ndarray:
         window = n - 1 if n % 2 == 0 else n - 2
     if window < 5:
         return values
+    from scipy.signal import savgol_filter
     try:
-        return savgol_filter(values, window, 3)
+        return savgol_filter(values, window, 3, axis=-1)
     except Exception:
         return values
 
 
-def compute_pattern_events(extrema: List['Extremum'], pattern: Tuple[int, int, int], time_per_frame: float) -> List[dict]:
-    sorted_ext = sorted(extrema, key=lambda e: e.index)
+def pattern_name(pattern: Sequence[int]) -> str:
+    return ''.join('H' if t == 1 else 'L' for t in pattern)
+
+
+def _match_pattern(types: np.ndarray, pattern: np.ndarray, first: int = 0,
+                   last: Optional[int] = None) -> np.ndarray:
+    """Start positions p in [first, last] where types[p:p+L] equals pattern."""
+    length = len(pattern)
+    last = len(types) - length if last is None else min(last, len(types) - length)
+    first = max(0, first)
+    if last < first:
+        return np.zeros(0, dtype=np.int64)
+    windows = np.lib.stride_tricks.sliding_window_view(types[first:last + length], length)
+    return first + np.flatnonzero(np.all(windows == pattern, axis=1))
+
+
+def _build_event_table(indices: np.ndarray, values: np.ndarray, starts: np.ndarray,
+                       pattern: np.ndarray, time_per_frame: float) -> dict:
+    length = len(pattern)
+    positions = starts[:, None] + np.arange(length)
+    ev_indices = indices[positions].reshape(len(starts), length)
+    ev_values = values[positions].reshape(len(starts), length)
+    times = ev_indices * time_per_frame
+    table = {
+        'pattern_type': pattern_name(pattern),
+        'start_pos': starts,
+        'indices': ev_indices,
+        'values': ev_values,
+        'times': times,
+        'phase_shifts': np.abs(np.diff(ev_values, axis=1)),
+        'phase_times': np.diff(ev_indices, axis=1) * time_per_frame,
+        'start_index': ev_indices[:, 0],
+        'start_value': ev_values[:, 0],
+        'start_time': times[:, 0],
+        'end_index': ev_indices[:, -1],
+        'end_value': ev_values[:, -1],
+        'end_time': times[:, -1],
+        'cycle_time': (ev_indices[:, -1] - ev_indices[:, 0]) * time_per_frame,
+    }
+    table['intercycle_time'] = _intercycle_times(table)
+    return table
+
+
+def _intercycle_times(table: dict) -> np.ndarray:
+    start_time = table['start_time']
+    end_time = table['end_time']
+    intercycle = np.full(len(start_time), np.nan)
+    if len(start_time) > 1:
+        gaps = start_time[1:] - end_time[:-1]
+        intercycle[:-1] = np.where(gaps > 0, gaps, np.nan)
+    return intercycle
+
+
+def detect_pattern_events(indices: np.ndarray, values: np.ndarray, types: np.ndarray,
+                          pattern: Sequence[int], time_per_frame: float,
+                          presorted: bool = False) -> dict:
+    """Vectorized pattern matching over extremum arrays.
+
+    Matches every run of consecutive extrema (in index order) whose types equal
+    ``pattern`` (any length >= 2, e.g. (0, 1, 0) or (0, 1, 0, 1, 0)) and
+    returns a columnar event table:
+      start_pos            position of each event's first extremum (sorted order)
+      indices, values,     (events, L) extremum positions / values / times
+      times                per event
+      phase_shifts         (events, L-1) absolute value change per phase
+      phase_times          (events, L-1) duration of each phase
+      start_* / end_*      first / last extremum of each event
+      cycle_time           end_time - start_time
+      intercycle_time      next start_time - end_time, NaN if not positive
+    """
+    pattern = np.asarray(pattern, dtype=np.int64)
+    if len(pattern) < 2:
+        raise ValueError("Pattern must have at least 2 elements")
+
+    indices = np.asarray(indices, dtype=np.int64)
+    values = np.asarray(values, dtype=np.float64)
+    types = np.asarray(types, dtype=np.int64)
+    if not presorted:
+        order = np.argsort(indices, kind='stable')
+        indices, values, types = indices[order], values[order], types[order]
+
+    starts = _match_pattern(types, pattern)
+    return _build_event_table(indices, values, starts, pattern, time_per_frame)
+
+
+def update_event_table(table: dict, indices: np.ndarray, values: np.ndarray, types: np.ndarray,
+                       pattern: Sequence[int], time_per_frame: float,
+                       position: int, delta: int) -> dict:
+    """Patch an event table after one extremum was inserted (delta=+1) or
+    removed (delta=-1) at sorted `position`; arrays describe the edited state.
+
+    Only windows that can contain the edit are re-matched; events before it
+    are kept and events after it are kept with shifted positions.
+    """
+    pattern = np.asarray(pattern, dtype=np.int64)
+    length = len(pattern)
+    first = position - length + 1
+    # Old events whose window touched the edited slot are dropped
+    old_starts = table['start_pos']
+    keep_lo = old_starts < first
+    keep_hi = old_starts >= position if delta > 0 else old_starts > position
+    # New windows containing the inserted element / spanning the removed gap
+    last = position if delta > 0 else position - 1
+    fresh = _build_event_table(indices, values, _match_pattern(types, pattern, first, last),
+                               pattern, time_per_frame)
+
+    merged = {'pattern_type': table['pattern_type']}
+    for key, column in table.items():
+        if key in ('pattern_type', 'intercycle_time'):
+            continue
+        hi = column[keep_hi] + delta if key == 'start_pos' else column[keep_hi]
+        merged[key] = np.concatenate([column[keep_lo], fresh[key], hi])
+    merged['intercycle_time'] = _intercycle_times(merged)
+    return merged
+
+
+def event_table_to_dicts(table: dict) -> List[dict]:
+    """Per-event dict view of an event table (the historical output format)."""
+    count = len(table['start_index'])
+    if count == 0:
+        return []
+    length = table['indices'].shape[1]
+    indices = table['indices'].tolist()
+    values = table['values'].tolist()
+    shifts = table['phase_shifts'].tolist()
+    phase_times = table['phase_times'].tolist()
+    cycle = table['cycle_time'].tolist()
+    intercycle = [None if np.isnan(t) else t for t in table['intercycle_time'].tolist()]
+    times = table['times'].tolist()
+    start_time = table['start_time'].tolist()
+    end_time = table['end_time'].tolist()
     events = []
-    for i in range(len(sorted_ext) - 2):
-        if (sorted_ext[i].extremum_type == pattern[0] and
-            sorted_ext[i+1].extremum_type == pattern[1] and
-            sorted_ext[i+2].extremum_type == pattern[2]):
-            events.append({
-                'start_value': sorted_ext[i].value,
-                'start_time': sorted_ext[i].index * time_per_frame,
-                'start_index': sorted_ext[i].index,
-                'inflexion_value': sorted_ext[i+1].value,
-                'inflexion_time': sorted_ext[i+1].index * time_per_frame,
-                'inflexion_index': sorted_ext[i+1].index,
-                'end_value': sorted_ext[i+2].value,
-                'end_time': sorted_ext[i+2].index * time_per_frame,
-                'end_index': sorted_ext[i+2].index,
-                'shift_start_to_inflexion': abs(sorted_ext[i].value - sorted_ext[i+1].value),
-                'shift_inflexion_to_end': abs(sorted_ext[i+2].value - sorted_ext[i+1].value),
-                'time_start_to_inflexion': (sorted_ext[i+1].index - sorted_ext[i].index) * time_per_frame,
-                'time_inflexion_to_end': (sorted_ext[i+2].index - sorted_ext[i+1].index) * time_per_frame,
-                'cycle_time': (sorted_ext[i+2].index - sorted_ext[i].index) * time_per_frame,
-                'pattern_type': 'LHL' if pattern[0] == 0 else 'HLH',
+    for i in range(count):
+        event = {
+            'start_value': values[i][0],
+            'start_time': start_time[i],
+            'start_index': indices[i][0],
+            'end_value': values[i][-1],
+            'end_time': end_time[i],
+            'end_index': indices[i][-1],
+            'cycle_time': cycle[i],
+            'intercycle_time': intercycle[i],
+            'pattern_type': table['pattern_type'],
+        }
+        if length == 3:
+            event.update({
+                'inflexion_value': values[i][1],
+                'inflexion_time': times[i][1],
+                'inflexion_index': indices[i][1],
+                'shift_start_to_inflexion': shifts[i][0],
+                'shift_inflexion_to_end': shifts[i][1],
+                'time_start_to_inflexion': phase_times[i][0],
+                'time_inflexion_to_end': phase_times[i][1],
             })
-    for i in range(len(events)):
-        if i < len(events) - 1:
-            next_start = events[i + 1]['start_time']
-            current_end = events[i]['end_time']
-            events[i]['intercycle_time'] = next_start - current_end if next_start > current_end else None
         else:
-            events[i]['intercycle_time'] = None
+            event.update({
+                'indices': indices[i],
+                'values': values[i],
+                'phase_shifts': shifts[i],
+                'phase_times': phase_times[i],
+            })
+        events.append(event)
     return events
 
 
+def event_table_to_json(table: dict) -> dict:
+    """Columnar view for NumpyJSONResponse, which writes NaN intercycle times as null."""
+    return {key: col for key, col in table.items() if key != 'start_pos'}
+
+
+def compute_pattern_events(extrema: List['Extremum'], pattern: Sequence[int], time_per_frame: float) -> List[dict]:
+    if isinstance(extrema, ExtremaIndex):
+        return event_table_to_dicts(detect_pattern_events(
+            extrema.indices, extrema.values, extrema.types, pattern, time_per_frame, presorted=True
+        ))
+    table = detect_pattern_events(
+        np.fromiter((e.index for e in extrema), dtype=np.int64, count=len(extrema)),
+        np.fromiter((e.value for e in extrema), dtype=np.float64, count=len(extrema)),
+        np.fromiter((e.extremum_type for e in extrema), dtype=np.int64, count=len(extrema)),
+        pattern, time_per_frame,
+    )
+    return event_table_to_dicts(table)
+
+
+def _vector_angles(u: np.ndarray, v: np.ndarray) -> np.ndarray:
+    """Angle in degrees between vectors along the last axis (1D, 2D or 3D)."""
+    dim = u.shape[-1]
+    dot = np.einsum('...i,...i->...', u, v)
+    if dim < 2:
+        # Collinear by construction: 0 or 180 degrees, 0 when either vector vanishes
+        nonzero = (u[..., 0] != 0) & (v[..., 0] != 0)
+        return np.where(nonzero & (dot < 0), 180.0, 0.0)
+    if dim == 2:
+        cross = np.abs(u[..., 0] * v[..., 1] - u[..., 1] * v[..., 0])
+    else:
+        cross = np.linalg.norm(np.cross(u, v), axis=-1)
+    return np.degrees(np.arctan2(cross, dot))
+
+
+def compute_angles(data: np.ndarray, definitions: Sequence[Sequence[Sequence[int]]]) -> np.ndarray:
+    """Vectorized joint angles for a batch of point definitions.
+
+    Each definition is a list of 3 or 4 points, each point a list of column
+    indices (1 to 3 coordinates). A 3-point angle is measured at p2 between
+    p1 and p3; a 4-point angle is between the lines p2->p1 and p3->p4.
+    Definitions with the same dimensionality are evaluated together in a
+    single array operation. Returns an array of shape (len(definitions), rows).
+    """
+    rows = data.shape[0]
+    out = np.zeros((len(definitions), rows))
+    groups: dict = {}
+    for k, points in enumerate(definitions):
+        if len(points) == 3:
+            a, b, c, d = points[0], points[1], points[2], points[1]
+        elif len(points) == 4:
+            a, b, c, d = points[0], points[1], points[3], points[2]
+        else:
+            raise ValueError("Angle definition must have 3 or 4 points")
+        dim = len(a)
+        if dim < 1 or any(len(p) != dim for p in points):
+            raise ValueError("All points of an angle must have the same number of coordinates")
+        groups.setdefault(dim, []).append((k, a, b, c, d))
+
+    for dim, items in groups.items():
+        rows_idx = [item[0] for item in items]
+        a, b, c, d = (np.array([item[j] for item in items], dtype=int) for j in range(1, 5))
+        # (rows, n_defs, dim) vectors for the whole group
+        u = data[:, a] - data[:, b]
+        v = data[:, c] - data[:, d]
+        out[rows_idx] = _vector_angles(u, v).T
+    return out
+
+
+DERIVED_KINDS = ('distance', 'angle', 'normalized', 'filtered')
+FILTER_METHODS = ('lowpass', 'highpass', 'savgol', 'moving_average')
+
+
+@dataclass
+class DerivedColumn:
+    """A virtual column computed from other columns of the same session.
+
+    'distance' and 'angle' take `points`, each a list of raw column indices
+    (2 points for a distance, 3 or 4 for an angle as in compute_angles).
+    'normalized' and 'filtered' take a `source` column, which may itself be
+    derived; filter settings go in `params` (see filter_signal).
+    """
+    kind: str
+    points: List[List[int]] = field(default_factory=list)
+    source: Optional[int] = None
+    params: dict = field(default_factory=dict)
+    name: str = ''
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def normalize_signal(signal: np.ndarray) -> np.ndarray:
+    """Signal minus its first non-zero value (padding rows are zero)."""
+    non_zero = np.flatnonzero(signal)
+    return signal - (signal[non_zero[0]] if len(non_zero) else 0)
+
+
+def _check_filter_params(params: dict, frequency: float) -> None:
+    method = params.get('method', 'lowpass')
+    if method not in FILTER_METHODS:
+        raise ValueError(f"Unknown filter method: {method}")
+    if method in ('lowpass', 'highpass'):
+        if not 0 < float(params.get('cutoff', 6.0)) < frequency / 2:
+            raise ValueError("Cutoff must be between 0 and half the sampling frequency")
+        if not 1 <= int(params.get('order', 4)) <= 8:
+            raise ValueError("Filter order must be between 1 and 8")
+    elif method == 'savgol':
+        window, polyorder = int(params.get('window', 11)), int(params.get('polyorder', 3))
+        if window % 2 == 0 or polyorder < 0 or window <= polyorder:
+            raise ValueError("Savitzky-Golay window must be odd and larger than polyorder")
+    elif int(params.get('window', 5)) < 1:
+        raise ValueError("Moving average window must be positive")
+
+
+def filter_signal(signal: np.ndarray, params: dict, frequency: float) -> np.ndarray:
+    """Zero-phase filtering of one signal.
+
+    params: method 'lowpass' / 'highpass' (Butterworth, `cutoff` Hz, `order`,
+    applied forward and backward), 'savgol' (`window`, `polyorder`) or
+    'moving_average' (`window` samples, edges repeat the end values).
+    """
+    _check_filter_params(params, frequency)
+    method = params.get('method', 'lowpass')
+    if method == 'moving_average':
+        from scipy.ndimage import uniform_filter1d
+        return uniform_filter1d(signal.astype(np.float64), int(params.get('window', 5)), mode='nearest')
+    from scipy.signal import butter, savgol_filter, sosfiltfilt
+    if method in ('lowpass', 'highpass'):
+        sos = butter(int(params.get('order', 4)), float(params.get('cutoff', 6.0)),
+                     btype=method, fs=frequency, output='sos')
+        return sosfiltfilt(sos, signal)
+    return savgol_filter(signal, int(params.get('window', 11)), int(params.get('polyorder', 3)))
+
+
+def compute_derived(definition: DerivedColumn, data: np.ndarray, signal: Callable[[int], np.ndarray],
+                    frequency: float) -> np.ndarray:
+    """Values of a derived column; `signal(column)` resolves its source column."""
+    if definition.kind == 'distance':
+        p1, p2 = definition.points
+        return np.linalg.norm(data[:, p2] - data[:, p1], axis=1)
+    if definition.kind == 'angle':
+        return compute_angles(data, [definition.points])[0]
+    if definition.kind == 'normalized':
+        return normalize_signal(signal(definition.source))
+    if definition.kind == 'filtered':
+        return filter_signal(signal(definition.source), definition.params, frequency)
+    raise ValueError(f"Unknown derived column kind: {definition.kind}")
+
+
+def resample_segments(signal: np.ndarray, starts: np.ndarray, ends: np.ndarray,
+                      target_length: int, interpolation_method: str = 'linear') -> np.ndarray:
+    """Time-normalize signal[start:end+1] segments into a (segments, target_length) matrix."""
+    return resample_segment_tensor(signal[:, None], [0], starts, ends, target_length, interpolation_method)[0]
+
+
+def resample_segment_tensor(data: np.ndarray, columns: Sequence[int], starts: np.ndarray, ends: np.ndarray,
+                            target_length: int, interpolation_method: str = 'linear') -> np.ndarray:
+    """Time-normalize the same segments in several columns of `data` (samples, columns).
+
+    Returns a (columns, segments, target_length) tensor. Linear resampling is
+    one gather + blend for all columns, with the positions computed once. The
+    spline path fits one cubic per distinct segment length (all segments and
+    columns of that length at once) and smooths the resampled rows together;
+    segments shorter than 4 samples, or whose fit fails, fall back to linear.
+    """
+    starts = np.asarray(starts, dtype=np.int64)
+    ends = np.asarray(ends, dtype=np.int64)
+    columns = np.asarray(columns, dtype=np.int64)
+    lengths = ends - starts + 1
+    # Computed as (segments, length, columns) so each gather reads whole rows
+    out = np.empty((len(starts), target_length, len(columns)))
+    t = np.linspace(0, 1, target_length)
+
+    linear = np.ones(len(starts), dtype=bool)
+    if interpolation_method == 'spline':
+        from scipy.interpolate import interp1d
+        splined = np.zeros(len(starts), dtype=bool)
+        for n in np.unique(lengths[lengths >= 4]):
+            rows = np.flatnonzero(lengths == n)
+            segments = data[(starts[rows, None] + np.arange(n))[..., None], columns]
+            try:
+                f = interp1d(np.linspace(0, 1, n), segments, kind='cubic', axis=1, fill_value='extrapolate')
+                out[rows] = f(t)
+                splined[rows] = True
+            except Exception:
+                continue
+        if splined.any():
+            out[splined] = np.moveaxis(_smooth_for_spline(np.moveaxis(out[splined], 1, -1)), -1, 1)
+        linear = ~splined
+
+    if linear.any():
+        s0, e0 = starts[linear, None], ends[linear, None]
+        pos = s0 + t * (lengths[linear, None] - 1)
+        i0 = np.minimum(np.floor(pos).astype(np.int64), e0)
+        i1 = np.minimum(i0 + 1, e0)
+        frac = (pos - i0)[..., None]
+        out[linear] = data[i0[..., None], columns] * (1 - frac) + data[i1[..., None], columns] * frac
+    return out.transpose(2, 0, 1)
+
+
+ENSEMBLE_PERCENTILES = (5.0, 25.0, 75.0, 95.0)
+MAX_RESAMPLES = 10_000
+# Bootstrap means are computed for this many (column, resample, sample) values at a time
+BOOTSTRAP_BLOCK = 1 << 22
+
+
+def random_seed() -> int:
+    """A fresh seed, so a run without one can still be reported and reproduced."""
+    return int(np.random.SeedSequence().generate_state(1)[0])
+
+
+def ensemble_statistics(segments: np.ndarray, percentiles: Sequence[float] = ENSEMBLE_PERCENTILES,
+                        trim: float = 0.1, resamples: int = 1000, confidence: float = 0.95,
+                        seed: Optional[int] = None) -> dict:
+    """Per-timepoint statistics over the events of time-normalized segments.
+
+    `segments` is (events, length) or (columns, events, length); results drop
+    the events axis, with percentile levels before length. The trimmed mean
+    cuts `trim` of the events at each end. The confidence band is the
+    percentile bootstrap of the mean: each resample draws events with
+    replacement as multinomial counts, so all resample means are one matrix
+    product, and every column uses the same resamples.
+    """
+    segments = np.asarray(segments, dtype=np.float64)
+    if segments.ndim not in (2, 3):
+        raise ValueError("Segments must be (events, length) or (columns, events, length)")
+    events = segments.shape[-2]
+    if events == 0:
+        raise ValueError("No segments")
+    levels = [float(p) for p in percentiles]
+    if not all(0 <= p <= 100 for p in levels):
+        raise ValueError("Percentiles must be between 0 and 100")
+    if not 0 <= trim < 0.5:
+        raise ValueError("Trim must be in [0, 0.5)")
+    if not 1 <= resamples <= MAX_RESAMPLES:
+        raise ValueError(f"Resamples must be between 1 and {MAX_RESAMPLES}")
+    if not 0 < confidence < 1:
+        raise ValueError("Confidence must be between 0 and 1")
+    seed = random_seed() if seed is None else int(seed)
+
+    ordered = np.sort(segments, axis=-2)
+    cut = int(trim * events)
+    weights = np.random.default_rng(seed).multinomial(events, np.full(events, 1 / events), size=resamples)
+    weights = weights / events
+    stacked = ordered.reshape(-1, events, segments.shape[-1])
+    tail = (1 - confidence) / 2 * 100
+    bands = np.empty((len(stacked), 2, segments.shape[-1]))
+    step = max(1, BOOTSTRAP_BLOCK // (resamples * segments.shape[-1]))
+    for first in range(0, len(stacked), step):
+        # (columns, resamples, length); the mean is order-free, so the sorted segments serve
+        means = np.matmul(weights, stacked[first:first + step])
+        bands[first:first + step] = np.moveaxis(np.percentile(means, [tail, 100 - tail], axis=1), 0, 1)
+    bands = bands.reshape(segments.shape[:-2] + (2, segments.shape[-1]))
+
+    return {
+        'median': np.median(ordered, axis=-2),
+        'trimmed_mean': ordered[..., cut:events - cut, :].mean(axis=-2),
+        'percentiles': np.moveaxis(np.percentile(ordered, levels, axis=-2), 0, -2),
+        'ci_lower': bands[..., 0, :],
+        'ci_upper': bands[..., 1, :],
+        'ensemble': {
+            'percentile_levels': levels,
+            'trim': trim,
+            'resamples': resamples,
+            'confidence': confidence,
+            'seed': seed,
+        },
+    }
+
+
+@dataclass
+class SegmentMatrix:
+    """Time-normalized segments of one event set in one column."""
+    matrix: np.ndarray  # (events, target_length)
+    starts: np.ndarray
+    ends: np.ndarray  # inclusive
+    target_length: int
+
+    @property
+    def lengths(self) -> np.ndarray:
+        return self.ends - self.starts + 1
+
+    @property
+    def average_length(self) -> int:
+        return int(np.mean(self.lengths))
+
+
 @dataclass
 class AnalysisResult:
     extrema: List[Extremum]
@@ -84,9 +749,98 @@ class GraphAnalyzer:
     def __init__(self, frequency: float = 100.0):
         self.frequency = frequency
         self.time_per_frame = 1.0 / frequency
+        self.data_version = 0
+        self.extrema_version = 0
+        self.derived_version = 0  # bumped when a derived column is added or removed
+        # Virtual columns by id (ids continue after the raw columns) and their
+        # values / LOD pyramids, each stored with the (data_version, frequency)
+        # it was computed for
+        self._derived: Dict[int, DerivedColumn] = {}
+        self._derived_cache: Dict[int, tuple] = {}
+        self._derived_lod: Dict[int, tuple] = {}
+        self._derived_lock = threading.RLock()
         self.raw_data: Optional[np.ndarray] = None
-        self.extrema: List[Extremum] = []
+        self._event_tables: dict = {}
+        self.extrema: ExtremaIndex = ExtremaIndex()
         self.current_column: int = 0
+        self._lod: Optional[LODPyramid] = None
+        self._lod_source: Optional[np.ndarray] = None
+        self._segment_cache: OrderedDict = OrderedDict()
+        self._content_hash: Optional[Tuple[int, str]] = None
+        self._append_buffer: Optional[np.ndarray] = None
+    
+    @property
+    def raw_data(self) -> Optional[np.ndarray]:
+        return self._raw_data
+    
+    @raw_data.setter
+    def raw_data(self, value: Optional[np.ndarray]) -> None:
+        if self._derived and (value is None or value.shape[1] != self._raw_data.shape[1]):
+            # Derived columns refer to raw columns by index
+            self._derived.clear()
+        self._derived_cache.clear()
+        self._derived_lod.clear()
+        self._raw_data = value
+        self.data_version += 1
+
+    def swap_storage(self, data: np.ndarray) -> None:
+        """Back raw_data by an identical array (e.g. a memmap) without invalidating caches.
+
+        The LOD pyramid is dropped so the old buffer can be freed; it is
+        rebuilt lazily from the new storage on the next viewport query.
+        """
+        if self._raw_data is None or data.shape != self._raw_data.shape:
+            raise ValueError("Replacement storage must match the loaded data shape")
+        self._raw_data = data
+        self._lod = None
+        self._lod_source = None
+
+    def content_hash(self) -> str:
+        """SHA-256 over shape and float64 bytes of raw_data, cached until the data is replaced."""
+        if self.raw_data is None:
+            raise ValueError("No data loaded")
+        if self._content_hash is None or self._content_hash[0] != self.data_version:
+            digest = hashlib.sha256(repr(self.raw_data.shape).encode())
+            # Row slabs keep the temporary copy small for non-contiguous or memory-mapped data
+            step = max(1, (8 * 1024 * 1024) // max(1, 8 * self.raw_data.shape[1]))
+            for start in range(0, self.raw_data.shape[0], step):
+                slab = np.ascontiguousarray(self.raw_data[start:start + step], dtype='<f8')
+                digest.update(memoryview(slab).cast('B'))
+            self._content_hash = (self.data_version, digest.hexdigest())
+        return self._content_hash[1]
+
+    def set_content_hash(self, digest: str) -> None:
+        """Record an already verified content_hash for the current data (e.g. from a savepoint)."""
+        if self.raw_data is None:
+            raise ValueError("No data loaded")
+        self._content_hash = (self.data_version, digest)
+
+    @property
+    def cached_content_hash(self) -> Optional[str]:
+        """content_hash if it has already been computed for the current data, else None."""
+        if self._content_hash is not None and self._content_hash[0] == self.data_version:
+            return self._content_hash[1]
+        return None
+
+    @property
+    def resident_nbytes(self) -> int:
+        """Bytes of raw_data, derived columns and LOD pyramids held in RAM (memory-mapped data excluded)."""
+        total = self._lod.nbytes if self._lod is not None else 0
+        if self._raw_data is not None and not isinstance(self._raw_data, np.memmap):
+            total += self._raw_data.nbytes
+        total += sum(values.nbytes for _, values in self._derived_cache.values())
+        total += sum(lod.nbytes for _, lod in self._derived_lod.values())
+        return total
+
+    @property
+    def extrema(self) -> ExtremaIndex:
+        return self._extrema
+    
+    @extrema.setter
+    def extrema(self, value) -> None:
+        self._extrema = value if isinstance(value, ExtremaIndex) else ExtremaIndex.from_extrema(value)
+        self.extrema_version += 1
+        self._event_tables.clear()
     
     def load_csv(self, data: np.ndarray, add_padding: bool = False) -> None:
         if add_padding:
@@ -96,35 +850,192 @@ class GraphAnalyzer:
             self.raw_data = padded
         else:
             self.raw_data = data
+        self.get_lod()
+    
+    def append_samples(self, rows: np.ndarray) -> int:
+        """Append rows to raw_data; returns the index of the first new row.
+
+        raw_data is kept as a view of a buffer with spare capacity, so
+        appending is amortized O(rows). Growing allocates a new buffer rather
+        than resizing in place, since other readers may still hold the old
+        view. Bumps data_version; the LOD pyramid is rebuilt on the next query.
+        """
+        rows = np.asarray(rows, dtype=np.float64)
+        if rows.ndim == 1:
+            rows = rows[None, :]
+        current = self._raw_data
+        start = 0 if current is None else current.shape[0]
+        if current is not None and rows.shape[1] != current.shape[1]:
+            raise ValueError(f"Expected {current.shape[1]} columns, got {rows.shape[1]}")
+        needed = start + rows.shape[0]
+        buffer = self._append_buffer
+        if buffer is None or current is None or current.base is not buffer or needed > buffer.shape[0]:
+            # First append, data replaced/spilled since, or out of capacity
+            buffer = np.empty((max(needed, 2 * start, 1024), rows.shape[1]))
+            if start:
+                buffer[:start] = current
+            self._append_buffer = buffer
+        buffer[start:needed] = rows
+        self.raw_data = buffer[:needed]
+        return start
+
+    def append_extrema(self, indices, values, types) -> None:
+        """Append extrema found past the current last one (e.g. by an online detector)."""
+        self._extrema.extend(indices, values, types)
+        self.extrema_version += 1
+        self._event_tables.clear()
+
+    @property
+    def derived_columns(self) -> Dict[int, DerivedColumn]:
+        return dict(self._derived)
+
+    def has_column(self, column: int) -> bool:
+        """Whether `column` is a raw or derived column id of the loaded data."""
+        if self.raw_data is None:
+            return False
+        return 0 <= column < self.raw_data.shape[1] or column in self._derived
+
+    def add_derived(self, definition: DerivedColumn, column: Optional[int] = None) -> int:
+        """Register a virtual column and return its id; values are computed on first use.
+
+        `column` restores a known id (e.g. from a savepoint); by default the
+        next free id after the raw and derived columns is used.
+        """
+        if self.raw_data is None:
+            raise ValueError("No data loaded")
+        raw_cols = self.raw_data.shape[1]
+        if definition.kind not in DERIVED_KINDS:
+            raise ValueError(f"Unknown derived column kind: {definition.kind}")
+        if definition.kind in ('distance', 'angle'):
+            expected = (2,) if definition.kind == 'distance' else (3, 4)
+            if len(definition.points) not in expected:
+                raise ValueError(f"{definition.kind.capitalize()} needs {' or '.join(map(str, expected))} points")
+            dim = len(definition.points[0])
+            if not 1 <= dim <= 3 or any(len(p) != dim for p in definition.points):
+                raise ValueError("All points must have the same number of coordinates (1 to 3)")
+            if any(not 0 <= c < raw_cols for p in definition.points for c in p):
+                raise IndexError("Point column index out of range")
+        else:
+            if definition.source is None or not self.has_column(definition.source):
+                raise IndexError("Source column index out of range")
+            if definition.kind == 'filtered':
+                _check_filter_params(definition.params, self.frequency)
+        if column is None:
+            column = max([raw_cols - 1, *self._derived]) + 1
+        elif column < raw_cols or column in self._derived:
+            raise ValueError(f"Column id {column} is already taken")
+        self._derived[column] = definition
+        self.derived_version += 1
+        return column
+
+    def derived_to_list(self) -> List[dict]:
+        """Derived column definitions with their ids, in id order (sources come first)."""
+        return [{'column': c, **self._derived[c].to_dict()} for c in sorted(self._derived)]
+
+    def restore_derived(self, items: Sequence[dict]) -> None:
+        """Re-register definitions from derived_to_list, keeping their ids."""
+        for item in sorted(items, key=lambda item: item['column']):
+            fields = {k: v for k, v in item.items() if k != 'column'}
+            self.add_derived(DerivedColumn(**fields), item['column'])
+
+    def remove_derived(self, column: int) -> DerivedColumn:
+        if column not in self._derived:
+            raise IndexError("Derived column not found")
+        users = [c for c, d in self._derived.items() if d.source == column]
+        if users:
+            raise ValueError(f"Column {column} is the source of derived column(s) {users}")
+        self._derived_cache.pop(column, None)
+        self._derived_lod.pop(column, None)
+        self.derived_version += 1
+        return self._derived.pop(column)
+
+    def signal(self, column: int) -> np.ndarray:
+        """One column as a 1-D array: a view of raw_data, or a derived column.
+
+        Derived values are computed once per data version and frequency and
+        shared (read-only) by every analysis that uses them.
+        """
+        if self.raw_data is None:
+            raise ValueError("No data loaded")
+        if 0 <= column < self.raw_data.shape[1]:
+            return self.raw_data[:, column]
+        definition = self._derived.get(column)
+        if definition is None:
+            raise IndexError("Column index out of range")
+        key = (self.data_version, self.frequency)
+        with self._derived_lock:
+            cached = self._derived_cache.get(column)
+            if cached is None or cached[0] != key:
+                values = compute_derived(definition, self.raw_data, self.signal, self.frequency)
+                values.flags.writeable = False
+                cached = self._derived_cache[column] = (key, values)
+        return cached[1]
+
+    def column_matrix(self, columns: Sequence[int]) -> Tuple[np.ndarray, List[int]]:
+        """(data, positions) with data[:, positions[i]] holding columns[i].
+
+        Raw columns are served from raw_data without a copy; with any
+        derived column the requested columns are stacked.
+        """
+        if self.raw_data is None:
+            raise ValueError("No data loaded")
+        raw_cols = self.raw_data.shape[1]
+        if all(0 <= c < raw_cols for c in columns):
+            return self.raw_data, list(columns)
+        return np.column_stack([self.signal(c) for c in columns]), list(range(len(columns)))
+
+    def get_lod(self) -> LODPyramid:
+        """Level-of-detail pyramid for all columns, rebuilt only when raw_data is replaced."""
+        if self.raw_data is None:
+            raise ValueError("No data loaded")
+        if self._lod is None or self._lod_source is not self.raw_data:
+            self._lod = LODPyramid(self.raw_data)
+            self._lod_source = self.raw_data
+        return self._lod
+    
+    def downsample_column(self, column: int, start: int = 0, end: Optional[int] = None,
+                          width: int = 1000) -> Tuple[np.ndarray, np.ndarray, int]:
+        if self.raw_data is None:
+            raise ValueError("No data loaded")
+        if end is None:
+            end = self.raw_data.shape[0]
+        if 0 <= column < self.raw_data.shape[1]:
+            return self.get_lod().query(self.raw_data, column, start, end, width)
+        values = self.signal(column)[:, None]
+        key = self._derived_cache[column][0]
+        with self._derived_lock:
+            cached = self._derived_lod.get(column)
+            if cached is None or cached[0] != key:
+                cached = self._derived_lod[column] = (key, LODPyramid(values))
+        return cached[1].query(values, 0, start, end, width)
     
-    def find_extrema(self, column: int, min_distance: int = 10) -> List[Extremum]:
+    def find_extrema(self, column: int, min_distance: int = 10, alternate: bool = False) -> ExtremaIndex:
+        """Detect the column's extrema; returns the session's ExtremaIndex (iterates as Extremum)."""
         if self.raw_data is None:
             raise ValueError("No data loaded")
         
+        signal = self.signal(column)
         self.current_column = column
-        signal = self.raw_data[:, column]
         
-        maxima_indices, _ = find_peaks(signal, distance=min_distance)
-        maxima = [Extremum(value=signal[i], index=int(i), extremum_type=1) for i in maxima_indices]
-        
-        minima_indices, _ = find_peaks(-signal, distance=min_distance)
-        minima = [Extremum(value=signal[i], index=int(i), extremum_type=0) for i in minima_indices]
-        
-        self.extrema = sorted(maxima + minima, key=lambda x: x.index)
+        indices, values, types = detect_extrema(signal, min_distance, alternate)
+        records = np.zeros(len(indices), dtype=EXTREMUM_DTYPE)
+        records['index'], records['value'], records['type'] = indices, values, types
+        self.extrema = ExtremaIndex(records)
         return self.extrema
     
     def add_extremum(self, index: int, epsilon: int = 20, extremum_type: str = 'max') -> Extremum:
         if self.raw_data is None:
             raise ValueError("No data loaded")
         
-        col = self.current_column
+        # The analysed column may be a derived one
+        signal = self.signal(self.current_column)
         
         if epsilon == 0:
-            actual_idx = max(0, min(index, len(self.raw_data) - 1))
+            actual_idx = max(0, min(index, len(signal) - 1))
         else:
             start = max(0, index - epsilon)
-            end = min(len(self.raw_data), index + epsilon + 1)
-            window = self.raw_data[start:end, col]
+            end = min(len(signal), index + epsilon + 1)
+            window = signal[start:end]
             
             if extremum_type == 'max':
                 local_idx = np.argmax(window)
@@ -133,39 +1044,63 @@ class GraphAnalyzer:
             
             actual_idx = start + local_idx
         new_extremum = Extremum(
-            value=float(self.raw_data[actual_idx, col]),
+            value=float(signal[actual_idx]),
             index=int(actual_idx),
             extremum_type=1 if extremum_type == 'max' else 0
         )
         
-        self.extrema.append(new_extremum)
-        self.extrema = sorted(self.extrema, key=lambda x: x.index)
-        self._remove_duplicates()
+        # An extremum already at this index wins, as before
+        pos = self.extrema.insert(new_extremum.value, new_extremum.index, new_extremum.extremum_type)
+        if pos is not None:
+            self._extrema_edited(pos, +1)
         return new_extremum
     
     def remove_extremum(self, index: int, tolerance: int = 15) -> bool:
-        for i, ext in enumerate(self.extrema):
-            if abs(ext.index - index) < tolerance:
-                self.extrema.pop(i)
-                return True
-        return False
+        pos = self.extrema.find_first_within(index, tolerance)
+        if pos is None:
+            return False
+        self.extrema.remove_at(pos)
+        self._extrema_edited(pos, -1)
+        return True
     
-    def _remove_duplicates(self) -> None:
-        if len(self.extrema) < 2:
-            return
-        unique = [self.extrema[0]]
-        for ext in self.extrema[1:]:
-            if ext.index != unique[-1].index:
-                unique.append(ext)
-        self.extrema = unique
+    def nearest_extremum(self, index: int) -> Optional[Extremum]:
+        pos = self.extrema.nearest(index)
+        return None if pos is None else self.extrema[pos]
+    
+    def _extrema_edited(self, position: int, delta: int) -> None:
+        """Bump the extrema version and patch cached event tables around the edit."""
+        previous = self.extrema_version
+        self.extrema_version += 1
+        ext = self.extrema
+        for key, (version, time_per_frame, table) in list(self._event_tables.items()):
+            if version != previous or time_per_frame != self.time_per_frame:
+                del self._event_tables[key]
+                continue
+            table = update_event_table(table, ext.indices, ext.values, ext.types, key,
+                                       time_per_frame, position, delta)
+            self._event_tables[key] = (self.extrema_version, time_per_frame, table)
     
-    def find_pattern_events(self, pattern: Tuple[int, int, int]) -> List[dict]:
-        return compute_pattern_events(self.extrema, pattern, self.time_per_frame)
+    def find_pattern_events(self, pattern: Sequence[int]) -> List[dict]:
+        return event_table_to_dicts(self.find_pattern_event_table(pattern))
+    
+    def find_pattern_event_table(self, pattern: Sequence[int]) -> dict:
+        """Columnar event table for a pattern of any length (see detect_pattern_events).
+
+        Tables are cached per pattern and patched incrementally by
+        add_extremum / remove_extremum instead of being rebuilt.
+        """
+        key = tuple(int(t) for t in pattern)
+        cached = self._event_tables.get(key)
+        if cached is not None and cached[0] == self.extrema_version and cached[1] == self.time_per_frame:
+            return cached[2]
+        ext = self.extrema
+        table = detect_pattern_events(ext.indices, ext.values, ext.types, key,
+                                      self.time_per_frame, presorted=True)
+        self._event_tables[key] = (self.extrema_version, self.time_per_frame, table)
+        return table
     
     def get_event_data(self, start_idx: int, end_idx: int, column: int) -> np.ndarray:
-        if self.raw_data is None:
-            raise ValueError("No data loaded")
-        return self.raw_data[start_idx:end_idx+1, column]
+        return self.signal(column)[start_idx:end_idx+1]
     
     def calculate_distance(self, p1_cols: List[int], p2_cols: List[int]) -> np.ndarray:
         if self.raw_data is None:
@@ -178,175 +1113,149 @@ class GraphAnalyzer:
     def calculate_angle_3points(self, p1_cols: List[int], p2_cols: List[int], p3_cols: List[int]) -> np.ndarray:
         if self.raw_data is None:
             raise ValueError("No data loaded")
-        
-        p1 = self.raw_data[:, p1_cols]
-        p2 = self.raw_data[:, p2_cols]
-        p3 = self.raw_data[:, p3_cols]
-        
-        u = p1 - p2
-        v = p3 - p2
-        
-        angles = np.zeros(len(self.raw_data))
-        for i in range(len(self.raw_data)):
-            u_vec = u[i].flatten()
-            v_vec = v[i].flatten()
-            if len(u_vec) < 2 or len(v_vec) < 2:
-                dot = np.dot(u_vec, v_vec)
-                norm_u = np.linalg.norm(u_vec)
-                norm_v = np.linalg.norm(v_vec)
-                if norm_u > 0 and norm_v > 0:
-                    cos_angle = dot / (norm_u * norm_v)
-                    cos_angle = np.clip(cos_angle, -1, 1)
-                    angles[i] = np.degrees(np.arccos(cos_angle))
-            elif len(u_vec) == 2:
-                cross = u_vec[0] * v_vec[1] - u_vec[1] * v_vec[0]
-                dot = np.dot(u_vec, v_vec)
-                angles[i] = np.degrees(np.arctan2(abs(cross), dot))
-            else:
-                cross = np.cross(u_vec, v_vec)
-                dot = np.dot(u_vec, v_vec)
-                angles[i] = np.degrees(np.arctan2(np.linalg.norm(cross), dot))
-        
-        return angles
+        return compute_angles(self.raw_data, [(p1_cols, p2_cols, p3_cols)])[0]
     
     def calculate_angle_4points(self, p1_cols: List[int], p2_cols: List[int], 
                                  p3_cols: List[int], p4_cols: List[int]) -> np.ndarray:
         if self.raw_data is None:
             raise ValueError("No data loaded")
-        
-        p1 = self.raw_data[:, p1_cols]
-        p2 = self.raw_data[:, p2_cols]
-        p3 = self.raw_data[:, p3_cols]
-        p4 = self.raw_data[:, p4_cols]
-        
-        u = p1 - p2
-        v = p4 - p3
-        
-        angles = np.zeros(len(self.raw_data))
-        for i in range(len(self.raw_data)):
-            u_vec = u[i].flatten()
-            v_vec = v[i].flatten()
-            if len(u_vec) < 2 or len(v_vec) < 2:
-                dot = np.dot(u_vec, v_vec)
-                norm_u = np.linalg.norm(u_vec)
-                norm_v = np.linalg.norm(v_vec)
-                if norm_u > 0 and norm_v > 0:
-                    cos_angle = dot / (norm_u * norm_v)
-                    cos_angle = np.clip(cos_angle, -1, 1)
-                    angles[i] = np.degrees(np.arccos(cos_angle))
-            elif len(u_vec) == 2:
-                cross = u_vec[0] * v_vec[1] - u_vec[1] * v_vec[0]
-                dot = np.dot(u_vec, v_vec)
-                angles[i] = np.degrees(np.arctan2(abs(cross), dot))
-            else:
-                cross = np.cross(u_vec, v_vec)
-                dot = np.dot(u_vec, v_vec)
-                angles[i] = np.degrees(np.arctan2(np.linalg.norm(cross), dot))
-        
-        return angles
+        return compute_angles(self.raw_data, [(p1_cols, p2_cols, p3_cols, p4_cols)])[0]
     
-    def normalize_data(self, column: int) -> np.ndarray:
+    def calculate_angles(self, definitions: Sequence[Sequence[Sequence[int]]]) -> np.ndarray:
+        """Compute several 3-point / 4-point angles at once, one row per definition."""
         if self.raw_data is None:
             raise ValueError("No data loaded")
-        non_zero_indices = np.where(self.raw_data[:, column] != 0)[0]
-        if len(non_zero_indices) > 0:
-            first_value = self.raw_data[non_zero_indices[0], column]
-        else:
-            first_value = 0
-        return self.raw_data[:, column] - first_value
+        return compute_angles(self.raw_data, definitions)
     
-    def calculate_mean_trend(self, events: List[dict], column: int, 
-                              target_length: Optional[int] = None,
-                              interpolation_method: str = 'linear') -> Tuple[np.ndarray, np.ndarray]:
+    def normalize_data(self, column: int) -> np.ndarray:
+        return normalize_signal(self.signal(column))
+    
+    def _event_bounds(self, events: List[dict]) -> Tuple[np.ndarray, np.ndarray]:
+        starts = np.fromiter((e['start_index'] for e in events), dtype=np.int64, count=len(events))
+        ends = np.fromiter((e['end_index'] for e in events), dtype=np.int64, count=len(events))
+        return starts, ends
+    
+    def resample_events(self, events: List[dict], column: int, target_length: Optional[int] = None,
+                        interpolation_method: str = 'linear') -> SegmentMatrix:
         if self.raw_data is None or not events:
             raise ValueError("No data or events")
-        
-        segments = []
-        for event in events:
-            segment = self.raw_data[event['start_index']:event['end_index']+1, column]
-            segments.append(segment)
-        
+        starts, ends = self._event_bounds(events)
         if target_length is None:
-            target_length = int(np.mean([len(s) for s in segments]))
-        
-        interpolated = []
-        for segment in segments:
-            x_old = np.linspace(0, 1, len(segment))
-            x_new = np.linspace(0, 1, target_length)
-            if interpolation_method == 'spline' and len(segment) >= 4:
-                try:
-                    f = interp1d(x_old, segment, kind='cubic', fill_value='extrapolate')
-                    resampled = f(x_new)
-                    resampled = _smooth_for_spline(resampled)
-                    interpolated.append(resampled)
-                except Exception:
-                    interpolated.append(np.interp(x_new, x_old, segment))
-            else:
-                interpolated.append(np.interp(x_new, x_old, segment))
-
-        interpolated = np.array(interpolated)
-        mean_trend = np.mean(interpolated, axis=0)
-        std_trend = np.std(interpolated, axis=0)
+            target_length = int(np.mean(ends - starts + 1))
+        matrix = resample_segments(self.signal(column), starts, ends, target_length, interpolation_method)
+        return SegmentMatrix(matrix, starts, ends, target_length)
+    
+    def get_segment_matrix(self, pattern: Sequence[int], column: int,
+                           target_length: Optional[int] = None, length_mode: str = 'average',
+                           interpolation_method: str = 'linear') -> SegmentMatrix:
+        """Memoized resampled segments for the events of `pattern`.
 
-        return mean_trend, std_trend
+        Keyed by pattern, column, length settings, method, the current
+        data/extrema/derived versions and the frequency (filtered columns
+        depend on it), so any edit to the extrema invalidates it, and so does
+        a derived column id reused with another definition.
+        """
+        if length_mode == 'percentage':
+            target_length = 100
+        key = (tuple(pattern), column, target_length, interpolation_method,
+               self.data_version, self.extrema_version, self.derived_version, self.frequency)
+        cached = self._segment_cache.get(key)
+        if cached is not None:
+            self._segment_cache.move_to_end(key)
+            return cached
+        table = self.find_pattern_event_table(pattern)
+        if len(table['start_index']) == 0:
+            raise ValueError("No events found for pattern")
+        starts, ends = table['start_index'], table['end_index']
+        if target_length is None:
+            target_length = int(np.mean(ends - starts + 1))
+        matrix = resample_segments(self.signal(column), starts, ends, target_length, interpolation_method)
+        segments = SegmentMatrix(matrix, starts, ends, target_length)
+        self._segment_cache[key] = segments
+        while len(self._segment_cache) > SEGMENT_CACHE_SIZE:
+            self._segment_cache.popitem(last=False)
+        return segments
+    
+    def calculate_mean_trend(self, events: List[dict], column: int, 
+                              target_length: Optional[int] = None,
+                              interpolation_method: str = 'linear') -> Tuple[np.ndarray, np.ndarray]:
+        segments = self.resample_events(events, column, target_length, interpolation_method)
+        return np.mean(segments.matrix, axis=0), np.std(segments.matrix, axis=0)
     
     def calculate_mean_trend_extended(self, events: List[dict], column: int,
                                        target_length: Optional[int] = None,
                                        length_mode: str = 'average',
                                        interpolation_method: str = 'linear') -> dict:
         """Extended mean trend calculation returning all data for visualization."""
-        if self.raw_data is None or not events:
-            raise ValueError("No data or events")
-        
-        raw_segments = []
-        for event in events:
-            segment = self.raw_data[event['start_index']:event['end_index']+1, column].tolist()
-            raw_segments.append(segment)
-        
-        lengths = [len(s) for s in raw_segments]
-        avg_length = int(np.mean(lengths))
-        
         if length_mode == 'percentage':
-            final_length = 100
-        elif target_length is not None:
-            final_length = target_length
-        else:
-            final_length = avg_length
-        
-        normalized_segments = []
-        for segment in raw_segments:
-            x_old = np.linspace(0, 1, len(segment))
-            x_new = np.linspace(0, 1, final_length)
-            if interpolation_method == 'spline' and len(segment) >= 4:
-                try:
-                    f = interp1d(x_old, segment, kind='cubic', fill_value='extrapolate')
-                    resampled = f(x_new)
-                    resampled = _smooth_for_spline(resampled)
-                    normalized_segments.append(resampled.tolist())
-                except Exception:
-                    normalized_segments.append(np.interp(x_new, x_old, segment).tolist())
-            else:
-                normalized_segments.append(np.interp(x_new, x_old, segment).tolist())
-        
-        normalized_arr = np.array(normalized_segments)
-        mean_trend = np.mean(normalized_arr, axis=0)
-        std_trend = np.std(normalized_arr, axis=0)
-        
-        return {
-            'mean': mean_trend.tolist(),
-            'std': std_trend.tolist(),
-            'normalized_segments': normalized_segments,
-            'raw_segments': raw_segments,
-            'target_length': final_length,
-            'average_length': avg_length,
-            'event_count': len(events),
-            'lengths': lengths
-        }
+            target_length = 100
+        segments = self.resample_events(events, column, target_length, interpolation_method)
+        return self.mean_trend_extended_result(segments, column)
     
-    def get_reference_column_data(self, column: int) -> np.ndarray:
+    def mean_trend_extended_result(self, segments: SegmentMatrix, column: int,
+                                   ensemble: Optional[dict] = None) -> dict:
+        """With `ensemble` (ensemble_statistics options) the robust statistics are added."""
+        signal = self.signal(column)
+        result = {
+            'mean': np.mean(segments.matrix, axis=0).tolist(),
+            'std': np.std(segments.matrix, axis=0).tolist(),
+            'normalized_segments': segments.matrix.tolist(),
+            'raw_segments': [signal[s:e + 1].tolist() for s, e in zip(segments.starts, segments.ends)],
+            'target_length': segments.target_length,
+            'average_length': segments.average_length,
+            'event_count': len(segments.starts),
+            'lengths': segments.lengths.tolist()
+        }
+        if ensemble is not None:
+            result.update(ensemble_statistics(segments.matrix, **ensemble))
+        return result
+
+    def mean_trends(self, pattern: Sequence[int], columns: Optional[Sequence[int]] = None,
+                    target_length: Optional[int] = None, length_mode: str = 'average',
+                    interpolation_method: str = 'linear', include_segments: bool = False,
+                    ensemble: Optional[dict] = None) -> dict:
+        """Mean/std trends of one event set over several columns in one pass.
+
+        Events come from the current extrema (found on current_column), so
+        every column is cut at the same frames; `mean` and `std` are
+        (columns, target_length) and `normalized_segments`, when requested,
+        is the full (columns, events, target_length) tensor. With `ensemble`
+        (ensemble_statistics options) the robust statistics are added.
+        """
         if self.raw_data is None:
             raise ValueError("No data loaded")
-        return self.raw_data[:, column]
+        columns = list(range(self.raw_data.shape[1])) if columns is None else [int(c) for c in columns]
+        if not columns or not all(self.has_column(c) for c in columns):
+            raise IndexError("Column index out of range")
+        table = self.find_pattern_event_table(pattern)
+        starts, ends = table['start_index'], table['end_index']
+        if len(starts) == 0:
+            raise ValueError("No events found for pattern")
+        lengths = ends - starts + 1
+        if length_mode == 'percentage':
+            target_length = 100
+        elif target_length is None:
+            target_length = int(np.mean(lengths))
+        data, positions = self.column_matrix(columns)
+        tensor = resample_segment_tensor(data, positions, starts, ends, target_length, interpolation_method)
+        result = {
+            'columns': columns,
+            'reference_column': self.current_column,
+            'mean': tensor.mean(axis=1),
+            'std': tensor.std(axis=1),
+            'target_length': target_length,
+            'average_length': int(np.mean(lengths)),
+            'event_count': len(starts),
+            'lengths': lengths,
+        }
+        if ensemble is not None:
+            result.update(ensemble_statistics(tensor, **ensemble))
+        if include_segments:
+            result['normalized_segments'] = tensor
+        return result
+
+    def get_reference_column_data(self, column: int) -> np.ndarray:
+        return self.signal(column)
     
     def to_dict(self) -> dict:
         return {
@@ -356,5 +1265,6 @@ class GraphAnalyzer:
             ],
             'frequency': self.frequency,
             'time_per_frame': self.time_per_frame,
-            'data_shape': list(self.raw_data.shape) if self.raw_data is not None else None
+            'data_shape': list(self.raw_data.shape) if self.raw_data is not None else None,
+            'derived': self.derived_to_list()
         }
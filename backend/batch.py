@@ -0,0 +1,270 @@
+"""
+Headless batch analysis of whole directories of trial CSVs.
+
+    python batch.py trials/ --output results --column 2 --min-distance 30 --pattern LHL
+    python batch.py "study/*/trial_*.csv" --spec spec.json --workers 8
+
+Every trial is parsed, its extrema and pattern events are found on the
+analysis column, and its event table is written to
+``<output>/events/<trial>.csv``. The mean trends of the trend columns are
+pooled over the events of all trials into ``<output>/trends.csv`` (one row
+per normalized sample, ``<column>_mean`` / ``<column>_std`` per column).
+``<output>/summary.json`` records the spec, per-trial counts and errors,
+and throughput. Trials run in parallel over a process pool; each worker
+returns only its per-column mean and sum of squared deviations, so the
+aggregate is exact without sending segments back.
+
+The spec (a JSON file via --spec, overridden by command-line flags) holds
+column, min_distance, pattern, frequency, delimiter, header_rows, trim_zeros,
+trend_columns, target_length and interpolation_method. The run exits with
+status 1 if any trial failed.
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field
+from multiprocessing import get_context
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    from backend.analyzer import GraphAnalyzer, event_table_to_dicts
+    from backend.ingest import read_csv_path
+except ImportError:
+    from analyzer import GraphAnalyzer, event_table_to_dicts
+    from ingest import read_csv_path
+
+DEFAULT_WORKERS = os.cpu_count() or 1
+
+
+@dataclass
+class BatchSpec:
+    column: int = 0
+    min_distance: int = 10
+    pattern: Tuple[int, ...] = (0, 1, 0)
+    frequency: float = 100.0
+    delimiter: str = ";"
+    header_rows: int = 0
+    trim_zeros: bool = False
+    trend_columns: List[int] = field(default_factory=list)  # empty: the analysis column
+    target_length: int = 100  # fixed, so trends of different trials can be pooled
+    interpolation_method: str = 'linear'
+
+    def __post_init__(self):
+        self.pattern = parse_pattern(self.pattern)
+        if self.min_distance < 1:
+            raise ValueError("min_distance must be at least 1")
+        if self.target_length < 2:
+            raise ValueError("target_length must be at least 2")
+        if self.interpolation_method not in ('linear', 'spline'):
+            raise ValueError("interpolation_method must be 'linear' or 'spline'")
+        self.trend_columns = [int(c) for c in self.trend_columns] or [self.column]
+
+
+def parse_pattern(pattern) -> Tuple[int, ...]:
+    """Pattern as 0/1 types from 'LHL', '0,1,0' or a sequence."""
+    if isinstance(pattern, str):
+        text = pattern.replace(",", "").replace(" ", "").upper()
+        pattern = [{"L": 0, "H": 1, "0": 0, "1": 1}.get(ch, -1) for ch in text]
+    pattern = tuple(int(t) for t in pattern)
+    if len(pattern) < 2:
+        raise ValueError("Pattern must have at least 2 elements")
+    if any(t not in (0, 1) for t in pattern):
+        raise ValueError("Pattern elements must be 0 (min) or 1 (max), or L/H")
+    return pattern
+
+
+def resolve_inputs(inputs: Sequence[str]) -> List[str]:
+    """CSV paths from directories (their *.csv), glob patterns and files, deduplicated in order."""
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            found = glob.glob(os.path.join(item, "*.csv"))
+        else:
+            found = glob.glob(item, recursive=True) or [item]
+        paths.extend(sorted(found))
+    return list(dict.fromkeys(os.path.normpath(p) for p in paths))
+
+
+def trial_names(paths: Sequence[str]) -> List[str]:
+    """Output names from the file stems; repeated stems get a numeric suffix."""
+    names, seen = [], {}
+    for path in paths:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        seen[stem] = seen.get(stem, 0) + 1
+        names.append(stem if seen[stem] == 1 else f"{stem}_{seen[stem]}")
+    return names
+
+
+def events_frame(table: dict) -> pd.DataFrame:
+    """Event table as rows; per-point lists of longer patterns become numbered columns."""
+    frame = pd.DataFrame(event_table_to_dicts(table))
+    for name in ("indices", "values", "phase_shifts", "phase_times"):
+        if name in frame:
+            expanded = pd.DataFrame(frame.pop(name).tolist(), index=frame.index)
+            for k in expanded.columns:
+                frame[f"{name}_{k}"] = expanded[k]
+    return frame
+
+
+def analyze_trial(path: str, name: str, spec: dict, events_dir: str) -> dict:
+    """Analyze one trial and write its events; never raises, errors are reported in the result."""
+    start = time.perf_counter()
+    result = {"file": path, "name": name, "rows": 0}
+    try:
+        spec = BatchSpec(**spec)
+        data = read_csv_path(path, spec.delimiter, spec.trim_zeros, spec.header_rows)
+        result["rows"] = int(data.shape[0])
+        analyzer = GraphAnalyzer(frequency=spec.frequency)
+        # Assign directly: load_csv would build a LOD pyramid we do not need here
+        analyzer.raw_data = data
+        if not analyzer.has_column(spec.column):
+            raise IndexError(f"Column {spec.column} out of range for {data.shape[1]} columns")
+        extrema = analyzer.find_extrema(spec.column, spec.min_distance)
+        table = analyzer.find_pattern_event_table(spec.pattern)
+        count = len(table['start_index'])
+        events_path = os.path.join(events_dir, name + ".csv")
+        events_frame(table).to_csv(events_path, index=False)
+        result.update({"extrema": len(extrema), "events": count, "events_file": events_path})
+        if count:
+            trends = analyzer.mean_trends(spec.pattern, spec.trend_columns, spec.target_length,
+                                          interpolation_method=spec.interpolation_method)
+            result["mean"] = trends['mean']
+            result["m2"] = trends['std'] ** 2 * count
+    except Exception as e:
+        result["error"] = str(e)
+    result["elapsed_s"] = time.perf_counter() - start
+    return result
+
+
+def pool_trends(results: Sequence[dict]) -> Tuple[Optional[np.ndarray], Optional[np.ndarray], int]:
+    """Mean and std over the events of all trials, from per-trial means and M2 (Chan et al.)."""
+    mean, m2, n = None, None, 0
+    for r in results:
+        if "mean" not in r:
+            continue
+        count = r["events"]
+        if mean is None:
+            mean, m2, n = r["mean"].copy(), r["m2"].copy(), count
+            continue
+        delta = r["mean"] - mean
+        total = n + count
+        mean += delta * (count / total)
+        m2 += r["m2"] + delta ** 2 * (n * count / total)
+        n = total
+    if mean is None:
+        return None, None, 0
+    return mean, np.sqrt(m2 / n), n
+
+
+def run_batch(paths: Sequence[str], spec: BatchSpec, output: str, workers: Optional[int] = None,
+              log: Optional[Callable[[str], None]] = None) -> dict:
+    """Analyze the trials, write events, trends and summary under `output`; returns the summary."""
+    events_dir = os.path.join(output, "events")
+    os.makedirs(events_dir, exist_ok=True)
+    names = trial_names(paths)
+    spec_dict = asdict(spec)
+    workers = max(1, min(workers or DEFAULT_WORKERS, len(paths) or 1))
+    start = time.perf_counter()
+
+    results: Dict[int, dict] = {}
+
+    def finished(i: int, result: dict) -> None:
+        results[i] = result
+        if log:
+            status = f"error: {result['error']}" if "error" in result else f"{result['events']} events"
+            log(f"[{len(results)}/{len(paths)}] {result['name']}: {result['rows']} rows, {status}")
+
+    if workers == 1:
+        for i, (path, name) in enumerate(zip(paths, names)):
+            finished(i, analyze_trial(path, name, spec_dict, events_dir))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn")) as pool:
+            futures = {pool.submit(analyze_trial, path, name, spec_dict, events_dir): i
+                       for i, (path, name) in enumerate(zip(paths, names))}
+            for future in as_completed(futures):
+                finished(futures[future], future.result())
+    ordered = [results[i] for i in range(len(paths))]
+    elapsed = time.perf_counter() - start
+
+    mean, std, event_count = pool_trends(ordered)
+    trends_file = None
+    if mean is not None:
+        trends_file = os.path.join(output, "trends.csv")
+        trends = {}
+        for k, c in enumerate(spec.trend_columns):
+            trends[f"{c}_mean"] = mean[k]
+            trends[f"{c}_std"] = std[k]
+        pd.DataFrame(trends).to_csv(trends_file, index_label="sample")
+
+    rows = sum(r["rows"] for r in ordered)
+    summary = {
+        "spec": spec_dict,
+        "trials": [{k: v for k, v in r.items() if k not in ("mean", "m2")} for r in ordered],
+        "failed": sum("error" in r for r in ordered),
+        "events": event_count,
+        "trends_file": trends_file,
+        "throughput": {
+            "workers": workers,
+            "elapsed_s": elapsed,
+            "files": len(ordered),
+            "rows": rows,
+            "files_per_s": len(ordered) / elapsed if elapsed > 0 else None,
+            "rows_per_s": rows / elapsed if elapsed > 0 else None,
+        },
+    }
+    with open(os.path.join(output, "summary.json"), "w") as f:
+        json.dump(summary, f, indent=2)
+    return summary
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("inputs", nargs="+", help="CSV files, directories or glob patterns")
+    parser.add_argument("--output", "-o", default="batch_results", help="output directory")
+    parser.add_argument("--spec", help="JSON file with analysis settings (flags override it)")
+    parser.add_argument("--column", type=int)
+    parser.add_argument("--min-distance", type=int)
+    parser.add_argument("--pattern", help="e.g. LHL, HLH or 0,1,0")
+    parser.add_argument("--frequency", type=float)
+    parser.add_argument("--delimiter")
+    parser.add_argument("--header-rows", type=int, help="leading lines to skip")
+    parser.add_argument("--trim-zeros", action="store_true", default=None)
+    parser.add_argument("--trend-columns", type=int, nargs="+", help="columns to pool mean trends over")
+    parser.add_argument("--target-length", type=int)
+    parser.add_argument("--interpolation", dest="interpolation_method", choices=["linear", "spline"])
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    args = parser.parse_args(argv)
+
+    settings = {}
+    if args.spec:
+        with open(args.spec) as f:
+            settings.update(json.load(f))
+    for key in ("column", "min_distance", "pattern", "frequency", "delimiter", "header_rows", "trim_zeros",
+                "trend_columns", "target_length", "interpolation_method"):
+        if getattr(args, key) is not None:
+            settings[key] = getattr(args, key)
+    try:
+        spec = BatchSpec(**settings)
+    except (TypeError, ValueError) as e:
+        parser.error(str(e))
+    paths = resolve_inputs(args.inputs)
+    if not paths:
+        parser.error("no CSV files found")
+
+    summary = run_batch(paths, spec, args.output, args.workers, log=lambda line: print(line, flush=True))
+    throughput = summary["throughput"]
+    print(f"{throughput['files']} files, {throughput['rows']} rows in {throughput['elapsed_s']:.2f}s "
+          f"({throughput['files_per_s']:.1f} files/s, {throughput['rows_per_s']:.0f} rows/s, "
+          f"{throughput['workers']} workers); {summary['events']} events, {summary['failed']} failed")
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,230 @@
+"""
+Micro-benchmarks for the analyzer hot paths on synthetic gait-like signals.
+
+    python bench.py --profile quick --output bench_results.json
+    python bench.py --profile quick --baseline bench_baseline.json --threshold 0.25
+    python bench.py --profile quick --baseline bench_baseline.json --update-baseline
+
+Results are written as JSON (median/min seconds per case plus environment
+info). With --baseline, each case is compared against the stored timing and
+the run exits with status 1 if any case got slower than the threshold allows
+(by minimum time unless --metric median_s). A missing baseline is an error
+rather than silently recorded; create it explicitly with --update-baseline.
+Sizes whose float64 data exceeds --max-data-bytes are skipped and listed under
+"skipped" in the results; with the default 4 GiB cap the full profile never
+runs 10M rows x 500 columns.
+Baselines are machine-specific: record them on the machine that compares.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    from backend.analyzer import GraphAnalyzer, compute_pattern_events, ensemble_statistics
+    from backend.ingest import read_csv_chunks, CHUNK_SIZE
+    from backend.serialization import dumps
+except ImportError:
+    from analyzer import GraphAnalyzer, compute_pattern_events, ensemble_statistics
+    from ingest import read_csv_chunks, CHUNK_SIZE
+    from serialization import dumps
+
+PROFILES = {
+    "quick": {"rows": [1_000, 10_000, 100_000], "columns": [5, 50]},
+    "standard": {"rows": [1_000, 10_000, 100_000, 1_000_000], "columns": [5, 50, 500]},
+    "full": {"rows": [1_000, 10_000, 100_000, 1_000_000, 10_000_000], "columns": [5, 50, 500]},
+}
+MAX_DATA_BYTES = 4 * 1024 ** 3
+MAX_CSV_BYTES = 256 * 1024 ** 2
+DEFAULT_THRESHOLD = 0.25
+NOISE_FLOOR_SECONDS = 1e-4
+FREQUENCY = 100.0
+PATTERN = (1, 0, 1)
+
+
+def gait_signals(rows: int, columns: int, frequency: float = FREQUENCY, stride_hz: float = 1.0,
+                 noise: float = 0.02, seed: int = 0) -> np.ndarray:
+    """Quasi-periodic marker trajectories: a stride rhythm with drifting cadence.
+
+    Each column is the stride phase through its own first and second harmonic
+    plus offset and white noise, like joint coordinates over a walking trial.
+    """
+    rng = np.random.default_rng(seed)
+    cadence = stride_hz * (1 + 0.05 * np.sin(2 * np.pi * np.arange(rows) / (frequency * 60)))
+    phase = 2 * np.pi * np.cumsum(cadence) / frequency
+    data = np.empty((rows, columns))
+    amp1, amp2 = rng.uniform(0.5, 2.0, columns), rng.uniform(0.1, 0.6, columns)
+    shift1, shift2 = rng.uniform(0, 2 * np.pi, (2, columns))
+    offset = rng.uniform(-5, 5, columns)
+    for c in range(columns):
+        data[:, c] = (amp1[c] * np.sin(phase + shift1[c]) + amp2[c] * np.sin(2 * phase + shift2[c])
+                      + offset[c] + noise * rng.standard_normal(rows))
+    return data
+
+
+def csv_bytes(data: np.ndarray, delimiter: str = ";") -> bytes:
+    buffer = io.StringIO()
+    pd.DataFrame(data).to_csv(buffer, sep=delimiter, header=False, index=False, float_format="%.6g")
+    return buffer.getvalue().encode()
+
+
+def time_call(fn: Callable[[], object], min_time: float = 0.2, max_repeats: int = 20) -> dict:
+    """Median and minimum of repeated calls after one warm-up, repeating until min_time has passed."""
+    fn()
+    timings = []
+    start = time.perf_counter()
+    while len(timings) < max_repeats:
+        t0 = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - t0)
+        if time.perf_counter() - start >= min_time:
+            break
+    return {"median_s": statistics.median(timings), "min_s": min(timings), "repeats": len(timings)}
+
+
+def analyzer_cases(data: np.ndarray) -> Iterable[Tuple[str, Callable[[], object]]]:
+    analyzer = GraphAnalyzer(frequency=FREQUENCY)
+    analyzer.raw_data = data
+    min_distance = int(FREQUENCY * 0.3)
+    extrema = analyzer.find_extrema(0, min_distance)
+    events = compute_pattern_events(extrema, PATTERN, analyzer.time_per_frame)
+    # Overlapping column pairs keep the angle cases valid down to 5 columns
+    p1, p2, p3, p4 = [0, 1], [1, 2], [2, 3], [3, 4]
+
+    yield "find_extrema", lambda: analyzer.find_extrema(0, min_distance)
+    yield "compute_pattern_events", lambda: compute_pattern_events(extrema, PATTERN, analyzer.time_per_frame)
+    yield "calculate_distance", lambda: analyzer.calculate_distance(p1, p2)
+    yield "calculate_angle_3points", lambda: analyzer.calculate_angle_3points(p1, p2, p3)
+    yield "calculate_angle_4points", lambda: analyzer.calculate_angle_4points(p1, p2, p3, p4)
+    # JSON body of /api/analyze: a strided column plus the extrema
+    yield "render_json", lambda: dumps({"extrema": analyzer.extrema.records, "column_data": data[:, 0]})
+    if events:
+        yield "calculate_mean_trend", lambda: analyzer.calculate_mean_trend(events, 0, 100)
+        yield "calculate_mean_trend_extended", lambda: analyzer.calculate_mean_trend_extended(events, 0)
+        yield "mean_trends", lambda: analyzer.mean_trends(PATTERN, target_length=100)
+        segments = analyzer.get_segment_matrix(PATTERN, 0, 100).matrix
+        yield "ensemble_statistics", lambda: ensemble_statistics(segments, seed=0)
+
+
+def run(profile: str = "quick", max_data_bytes: int = MAX_DATA_BYTES, max_csv_bytes: int = MAX_CSV_BYTES,
+        min_time: float = 0.2, only: Optional[List[str]] = None, log=None) -> dict:
+    results: Dict[str, dict] = {}
+    skipped: List[str] = []
+    for rows in PROFILES[profile]["rows"]:
+        for columns in PROFILES[profile]["columns"]:
+            if rows * columns * 8 > max_data_bytes:
+                skipped.append(f"rows={rows},cols={columns}")
+                if log:
+                    log(f"skipped rows={rows},cols={columns}: over --max-data-bytes")
+                continue
+            data = gait_signals(rows, columns)
+            cases = list(analyzer_cases(data))
+            # Rough text size: ~10 bytes per formatted value
+            if rows * columns * 10 <= max_csv_bytes:
+                blob = csv_bytes(data)
+                chunks = [blob[i:i + CHUNK_SIZE] for i in range(0, len(blob), CHUNK_SIZE)]
+                cases.append(("ingest_csv", lambda: read_csv_chunks(chunks)))
+            for name, fn in cases:
+                if only and name not in only:
+                    continue
+                key = f"{name}[rows={rows},cols={columns}]"
+                result = time_call(fn, min_time)
+                result.update(name=name, rows=rows, columns=columns,
+                              rows_per_s=rows / result["median_s"] if result["median_s"] > 0 else None)
+                results[key] = result
+                if log:
+                    log(f"{key:<58} {result['median_s'] * 1000:10.3f} ms  (x{result['repeats']})")
+    return {
+        "profile": profile,
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "machine": platform.machine(),
+            "processor": platform.processor(),
+            "cpus": os.cpu_count(),
+        },
+        "results": results,
+        "skipped": skipped,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float = DEFAULT_THRESHOLD,
+            noise_floor: float = NOISE_FLOOR_SECONDS, metric: str = "min_s") -> List[dict]:
+    """Per-case ratio against the baseline; 'regression' beyond 1 + threshold.
+
+    The minimum is the default metric since it is the least sensitive to
+    background load. Cases faster than noise_floor in both runs never fail.
+    """
+    rows = []
+    for key, result in current["results"].items():
+        base = baseline["results"].get(key)
+        if base is None:
+            rows.append({"case": key, "status": "new", metric: result[metric]})
+            continue
+        ratio = result[metric] / base[metric] if base[metric] > 0 else float("inf")
+        status = "ok"
+        if max(result[metric], base[metric]) >= noise_floor:
+            if ratio > 1 + threshold:
+                status = "regression"
+            elif ratio < 1 / (1 + threshold):
+                status = "improvement"
+        rows.append({"case": key, "status": status, "ratio": ratio,
+                     metric: result[metric], "baseline_" + metric: base[metric]})
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="quick")
+    parser.add_argument("--only", nargs="*", help="benchmark names to run (default: all)")
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--baseline", help="baseline JSON to compare against")
+    parser.add_argument("--update-baseline", action="store_true", help="overwrite --baseline with this run")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown as a fraction of the baseline --metric value")
+    parser.add_argument("--metric", choices=["min_s", "median_s"], default="min_s")
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds to spend per case")
+    parser.add_argument("--max-data-bytes", type=int, default=MAX_DATA_BYTES)
+    parser.add_argument("--max-csv-bytes", type=int, default=MAX_CSV_BYTES)
+    args = parser.parse_args(argv)
+    if args.update_baseline and not args.baseline:
+        parser.error("--update-baseline needs --baseline")
+    if args.baseline and not args.update_baseline and not os.path.exists(args.baseline):
+        parser.error(f"baseline {args.baseline} not found; record one with --update-baseline")
+
+    current = run(args.profile, args.max_data_bytes, args.max_csv_bytes, args.min_time, args.only,
+                  log=lambda line: print(line, flush=True))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(current, f, indent=2)
+
+    if not args.baseline:
+        return 0
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(current, f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    report = compare(current, baseline, args.threshold, metric=args.metric)
+    regressions = [r for r in report if r["status"] == "regression"]
+    for r in report:
+        if r["status"] != "ok":
+            ratio = f"{r['ratio']:.2f}x" if "ratio" in r else ""
+            print(f"{r['status']:<12} {r['case']:<58} {ratio}")
+    print(f"{len(report)} cases, {len(regressions)} regressions (threshold {args.threshold:.0%})")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+"""
+Cold-start budget for the serverless entry point (api/index.py).
+
+    python coldstart.py
+    python coldstart.py --budget 1.0 --top 20 --output coldstart.json
+
+Every cold start on Vercel imports the app before it serves its first
+request, so the import must stay cheap. The app is imported in fresh
+interpreters: the minimum wall time over a few runs is compared against
+the budget, and one ``-X importtime`` run gives the modules that cost the
+most. pandas and scipy must not be loaded by the import at all. They are
+imported by the code paths that use them (CSV parsing, filtering, spline
+resampling, the distance rule of extrema detection). The run exits with
+status 1 if the budget is exceeded or a heavy module was loaded.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+ENTRY_POINT = "api.index"
+HEAVY_MODULES = ("pandas", "scipy")
+COLDSTART_BUDGET_S = float(os.environ.get("GRAPH_ANALYZER_COLDSTART_BUDGET", 1.5))
+
+_PROBE = """
+import sys, time, json
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "modules": sorted(sys.modules)}}))
+"""
+
+
+def parse_importtime(stderr: str) -> List[dict]:
+    """Entries of ``-X importtime`` output: module, self and cumulative microseconds, depth."""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip(" "))) // 2
+        entries.append({"module": name.strip(), "self_us": int(self_us), "cumulative_us": int(cumulative_us),
+                        "depth": depth})
+    return entries
+
+
+def _probe(module: str, importtime: bool = False) -> subprocess.CompletedProcess:
+    flags = ["-X", "importtime"] if importtime else []
+    return subprocess.run([sys.executable, *flags, "-c", _PROBE.format(module=module)], cwd=REPO_ROOT,
+                          capture_output=True, text=True, check=True)
+
+
+def measure(module: str = ENTRY_POINT, repeats: int = 3, top: int = 10) -> dict:
+    """Import `module` in fresh interpreters; returns timing, the costliest imports and heavy modules."""
+    runs = [json.loads(_probe(module).stdout.splitlines()[-1]) for _ in range(max(1, repeats))]
+    entries = parse_importtime(_probe(module, importtime=True).stderr)
+    loaded = runs[-1]["modules"]
+    return {
+        "module": module,
+        "seconds": min(r["seconds"] for r in runs),
+        "runs": [r["seconds"] for r in runs],
+        "slowest": sorted(entries, key=lambda e: e["cumulative_us"], reverse=True)[:top],
+        "heavy": [m for m in HEAVY_MODULES if m in loaded],
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default=ENTRY_POINT)
+    parser.add_argument("--budget", type=float, default=COLDSTART_BUDGET_S, help="seconds")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10, help="costliest imports to list")
+    parser.add_argument("--output", help="write the report JSON here")
+    args = parser.parse_args(argv)
+
+    report = measure(args.module, args.repeats, args.top)
+    report["budget_s"] = args.budget
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    for entry in report["slowest"]:
+        print(f"{entry['cumulative_us'] / 1000:9.1f} ms  {'  ' * entry['depth']}{entry['module']}")
+    print(f"import {report['module']}: {report['seconds'] * 1000:.0f} ms (budget {args.budget * 1000:.0f} ms)")
+    if report["heavy"]:
+        print(f"heavy modules loaded at import: {', '.join(report['heavy'])}")
+    return 1 if report["seconds"] > args.budget or report["heavy"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""
+Content-addressed cache of parsed datasets.
+
+Parsed arrays are keyed by the SHA-256 of the file bytes plus the parse
+options, and handed out read-only so any number of sessions can share one
+copy; nothing changes session data in place, it is only ever replaced. The
+cache holds weak references, so a dataset stays cached for as long as some
+session still uses it, and in front of them a strong LRU of the most
+recently used datasets up to RETAIN_BYTES, so a file loaded again after its
+sessions expired or spilled their data to disk is not parsed again.
+"""
+import os
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Dict, Optional
+
+import numpy as np
+
+RETAIN_BYTES = int(os.environ.get("GRAPH_ANALYZER_DATASET_RETAIN_BYTES", 256 * 1024 ** 2))
+
+
+def dataset_key(digest: str, delimiter: str, trim_zeros: bool, header_rows: int = 0) -> str:
+    return f"{digest}:{delimiter!r}:{int(bool(trim_zeros))}:{int(header_rows)}"
+
+
+class DatasetCache:
+    def __init__(self, retain_bytes: int = RETAIN_BYTES):
+        self._arrays: "weakref.WeakValueDictionary[str, np.ndarray]" = weakref.WeakValueDictionary()
+        self._recent: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._recent_bytes = 0
+        self.retain_bytes = retain_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            data = self._arrays.get(key)
+            if data is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._retain(key, data)
+            return data
+
+    def _retain(self, key: str, data: np.ndarray) -> None:
+        """Make `key` the most recently used strong entry, evicting the oldest past retain_bytes."""
+        if key in self._recent:
+            self._recent.move_to_end(key)
+            return
+        if data.nbytes > self.retain_bytes:
+            return
+        self._recent[key] = data
+        self._recent_bytes += data.nbytes
+        while self._recent_bytes > self.retain_bytes:
+            _, evicted = self._recent.popitem(last=False)
+            self._recent_bytes -= evicted.nbytes
+
+    def put(self, key: str, data: np.ndarray) -> np.ndarray:
+        """Cache `data` read-only; returns the already cached array if another load won."""
+        with self._lock:
+            existing = self._arrays.get(key)
+            if existing is not None:
+                return existing
+            data.flags.writeable = False
+            self._arrays[key] = data
+            self._retain(key, data)
+            return data
+
+    def __len__(self) -> int:
+        return len(self._arrays)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            arrays = list(self._arrays.values())
+            return {
+                "datasets": len(arrays),
+                "bytes": sum(a.nbytes for a in arrays),
+                "retained": len(self._recent),
+                "retained_bytes": self._recent_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
@@ -0,0 +1,148 @@
+"""
+Compute executor for CPU-bound analyzer work.
+
+Endpoints await ``executor.run(fn, ...)`` instead of calling numpy/scipy
+code on the event loop, so a long export or mean trend occupies a worker
+thread while light requests keep being served. numpy and scipy release the
+GIL in their inner loops, which lets threads overlap without pickling the
+session data for a process pool.
+
+Light calls (column fetches, rendering small payloads, reads of session
+state) run on a separate small pool, so they never queue behind a long
+export on the main one. Admission is bounded per pool: once ``workers +
+max_queue`` calls are running or waiting, further calls fail with
+ExecutorSaturated and the API answers 503 with Retry-After. Calls made for a session hold that session's lock for
+their whole run, so edits to one GraphAnalyzer never interleave with each
+other or with analyses reading its caches.
+"""
+import asyncio
+import contextvars
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Callable, Dict, Optional, TypeVar
+
+try:
+    from backend.metrics import record_stage
+except ImportError:
+    from metrics import record_stage
+
+COMPUTE_WORKERS = int(os.environ.get("GRAPH_ANALYZER_COMPUTE_WORKERS", max(2, min(4, os.cpu_count() or 1))))
+LIGHT_WORKERS = int(os.environ.get("GRAPH_ANALYZER_LIGHT_WORKERS", 2))
+COMPUTE_QUEUE = int(os.environ.get("GRAPH_ANALYZER_COMPUTE_QUEUE", 32))
+RETRY_AFTER_SECONDS = int(os.environ.get("GRAPH_ANALYZER_RETRY_AFTER", 1))
+
+T = TypeVar("T")
+
+
+class ExecutorSaturated(RuntimeError):
+    def __init__(self, retry_after: int):
+        super().__init__("Server busy, retry later")
+        self.retry_after = retry_after
+
+
+class _SessionLock:
+    __slots__ = ("lock", "users")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.users = 0
+
+
+class ComputeExecutor:
+    """Bounded thread pools (compute and light) with per-session mutual exclusion.
+
+    Bookkeeping is only touched from the event loop thread, so it needs no
+    locking of its own.
+    """
+
+    def __init__(self, max_workers: int = COMPUTE_WORKERS, max_queue: int = COMPUTE_QUEUE,
+                 retry_after: int = RETRY_AFTER_SECONDS, light_workers: int = LIGHT_WORKERS):
+        self.max_workers = max(1, max_workers)
+        self.light_workers = max(1, light_workers)
+        self.max_queue = max(0, max_queue)
+        self.retry_after = retry_after
+        self._pool = ThreadPoolExecutor(self.max_workers, thread_name_prefix="compute")
+        self._light_pool = ThreadPoolExecutor(self.light_workers, thread_name_prefix="light")
+        self._locks: Dict[str, _SessionLock] = {}
+        self.pending = 0
+        self.light_pending = 0
+        self.completed = 0
+        self.rejected = 0
+
+    @asynccontextmanager
+    async def session_lock(self, session_id: Optional[str]):
+        """Hold the lock of `session_id` (no-op for None); unused locks are dropped."""
+        if session_id is None:
+            yield
+            return
+        entry = self._locks.get(session_id)
+        if entry is None:
+            entry = self._locks[session_id] = _SessionLock()
+        entry.users += 1
+        try:
+            async with entry.lock:
+                yield
+        finally:
+            entry.users -= 1
+            if entry.users == 0:
+                del self._locks[session_id]
+
+    async def run(self, fn: Callable[..., T], *args, session_id: Optional[str] = None,
+                  light: bool = False, **kwargs) -> T:
+        """Run fn(*args, **kwargs) on a worker thread, under the session lock if given.
+
+        ``light`` selects the light pool. Time spent waiting for the lock and a
+        free worker is reported as the "queue" stage; the call itself runs in
+        a copy of the request context, so stages it marks are attributed to
+        the request.
+        """
+        pending = self.light_pending if light else self.pending
+        if pending >= (self.light_workers if light else self.max_workers) + self.max_queue:
+            self.rejected += 1
+            raise ExecutorSaturated(self.retry_after)
+        if light:
+            self.light_pending += 1
+        else:
+            self.pending += 1
+        pool = self._light_pool if light else self._pool
+        submitted = time.perf_counter()
+        try:
+            async with self.session_lock(session_id):
+                context = contextvars.copy_context()
+
+                def call():
+                    context.run(record_stage, "queue", time.perf_counter() - submitted)
+                    return context.run(fn, *args, **kwargs)
+
+                future = asyncio.get_running_loop().run_in_executor(pool, call)
+                try:
+                    return await asyncio.shield(future)
+                finally:
+                    # A cancelled request cannot stop the thread; keep the
+                    # session locked until the call has really finished
+                    if not future.done():
+                        await asyncio.wait({future})
+        finally:
+            if light:
+                self.light_pending -= 1
+            else:
+                self.pending -= 1
+            self.completed += 1
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.max_workers,
+            "light_workers": self.light_workers,
+            "max_queue": self.max_queue,
+            "pending": self.pending,
+            "light_pending": self.light_pending,
+            "locked_sessions": len(self._locks),
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self._light_pool.shutdown(wait=False, cancel_futures=True)
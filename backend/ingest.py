@@ -0,0 +1,161 @@
+"""
+Streaming, chunked CSV ingestion.
+
+Bytes are fed in arbitrary chunks; after ``header_rows`` leading lines are
+skipped, complete lines are parsed block by block
+and appended to a growable float64 buffer. Once the buffer passes a size
+threshold it moves to an anonymous memory-mapped temp file, so very large
+recordings do not have to fit in RAM. Leading all-zero rows are dropped as
+they arrive and trailing ones are cut off in ``finish``, without copying.
+pandas is imported on the first parse rather than with the module.
+"""
+import io
+import os
+import tempfile
+from typing import Iterable, Optional
+
+import numpy as np
+
+CHUNK_SIZE = 1024 * 1024
+SPILL_THRESHOLD = int(os.environ.get("GRAPH_ANALYZER_SPILL_BYTES", 512 * 1024 * 1024))
+
+
+class GrowableBuffer:
+    """Row-appendable 2D float64 array with amortized doubling growth."""
+
+    def __init__(self, columns: int, spill_threshold: Optional[int] = SPILL_THRESHOLD,
+                 spill_dir: Optional[str] = None, initial_rows: int = 4096):
+        self.columns = columns
+        self.rows = 0
+        self.spill_threshold = spill_threshold
+        self.spill_dir = spill_dir
+        self._file = None
+        self._data = np.empty((initial_rows, columns), dtype=np.float64)
+
+    @property
+    def spilled(self) -> bool:
+        return self._file is not None
+
+    def _grow(self, min_rows: int) -> None:
+        capacity = max(min_rows, 2 * self._data.shape[0])
+        nbytes = capacity * self.columns * 8
+        if self._file is None and self.spill_threshold is not None and nbytes > self.spill_threshold:
+            # TemporaryFile is unlinked immediately; the mapping keeps it alive
+            self._file = tempfile.TemporaryFile(dir=self.spill_dir)
+            self._file.truncate(nbytes)
+            mapped = np.memmap(self._file, dtype=np.float64, mode="r+", shape=(capacity, self.columns))
+            mapped[:self.rows] = self._data[:self.rows]
+            self._data = mapped
+        elif self._file is not None:
+            self._data.flush()
+            self._file.truncate(nbytes)
+            self._data = np.memmap(self._file, dtype=np.float64, mode="r+", shape=(capacity, self.columns))
+        else:
+            self._data.resize((capacity, self.columns), refcheck=False)
+
+    def append(self, block: np.ndarray) -> None:
+        needed = self.rows + block.shape[0]
+        if needed > self._data.shape[0]:
+            self._grow(needed)
+        self._data[self.rows:needed] = block
+        self.rows = needed
+
+    def finalize(self, rows: Optional[int] = None) -> np.ndarray:
+        """Return the first `rows` rows, releasing unused capacity where possible."""
+        rows = self.rows if rows is None else rows
+        if self._file is not None:
+            self._data.flush()
+            return self._data[:rows]
+        self._data.resize((rows, self.columns), refcheck=False)
+        return self._data
+
+
+class ChunkedCSVReader:
+    """Incremental numeric CSV parser (fixed column count, optional header lines)."""
+
+    def __init__(self, delimiter: str = ";", trim_zeros: bool = False, header_rows: int = 0,
+                 spill_threshold: Optional[int] = SPILL_THRESHOLD, spill_dir: Optional[str] = None):
+        self.delimiter = delimiter
+        self.trim_zeros = trim_zeros
+        self.header_rows = header_rows
+        self.spill_threshold = spill_threshold
+        self.spill_dir = spill_dir
+        self.bytes_read = 0
+        self.rows_parsed = 0
+        self._buffer: Optional[GrowableBuffer] = None
+        self._pending = b""
+        self._header_left = max(0, int(header_rows))
+        self._seen_nonzero = False
+        self._skipped_zero_rows = 0
+        self._last_nonzero = 0  # buffer row count up to and including the last non-zero row
+
+    def feed(self, chunk: bytes) -> None:
+        self.bytes_read += len(chunk)
+        data = self._pending + chunk
+        while self._header_left:
+            cut = data.find(b"\n")
+            if cut < 0:
+                self._pending = data
+                return
+            data = data[cut + 1:]
+            self._header_left -= 1
+        cut = data.rfind(b"\n")
+        if cut < 0:
+            self._pending = data
+            return
+        self._pending = data[cut + 1:]
+        self._parse(data[:cut + 1])
+
+    def finish(self) -> np.ndarray:
+        if self._pending.strip() and not self._header_left:
+            self._parse(self._pending)
+        self._pending = b""
+        if self._buffer is None:
+            raise ValueError("No data rows found")
+        if self.trim_zeros and not self._seen_nonzero:
+            # Nothing but zero rows: keep them, matching the non-streaming trim
+            return np.zeros((self._skipped_zero_rows, self._buffer.columns))
+        rows = self._last_nonzero if self.trim_zeros else self._buffer.rows
+        return self._buffer.finalize(rows)
+
+    def _parse(self, text: bytes) -> None:
+        import pandas as pd
+        try:
+            block = pd.read_csv(io.BytesIO(text), delimiter=self.delimiter, header=None).to_numpy(dtype=float)
+        except pd.errors.EmptyDataError:
+            return
+        if block.ndim != 2 or block.shape[0] == 0:
+            return
+        if self._buffer is None:
+            self._buffer = GrowableBuffer(block.shape[1], self.spill_threshold, self.spill_dir)
+        elif block.shape[1] != self._buffer.columns:
+            raise ValueError(
+                f"Row {self.rows_parsed + 1}: expected {self._buffer.columns} columns, got {block.shape[1]}"
+            )
+        self.rows_parsed += block.shape[0]
+
+        if self.trim_zeros:
+            nonzero = np.flatnonzero(np.any(block != 0, axis=1))
+            if not self._seen_nonzero:
+                if len(nonzero) == 0:
+                    self._skipped_zero_rows += block.shape[0]
+                    return
+                block = block[nonzero[0]:]
+                nonzero = nonzero - nonzero[0]
+                self._seen_nonzero = True
+            if len(nonzero) > 0:
+                self._last_nonzero = self._buffer.rows + int(nonzero[-1]) + 1
+        self._buffer.append(block)
+
+
+def read_csv_chunks(chunks: Iterable[bytes], delimiter: str = ";", trim_zeros: bool = False,
+                    header_rows: int = 0) -> np.ndarray:
+    reader = ChunkedCSVReader(delimiter, trim_zeros, header_rows)
+    for chunk in chunks:
+        reader.feed(chunk)
+    return reader.finish()
+
+
+def read_csv_path(path, delimiter: str = ";", trim_zeros: bool = False, header_rows: int = 0) -> np.ndarray:
+    with open(path, "rb") as f:
+        return read_csv_chunks(iter(lambda: f.read(CHUNK_SIZE), b""), delimiter, trim_zeros, header_rows)
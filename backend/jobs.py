@@ -0,0 +1,167 @@
+"""
+Background jobs for analyses that outlive a single request.
+
+A job is a function of a Job handle, run on a small thread pool. The function
+reports progress through ``job.report(done, total)``. That call is also the
+cancellation checkpoint: once a job is cancelled, the next report raises
+JobCancelled inside the worker.
+
+Every job has a cache key. Callers build it from the session id, the data
+(and, where it matters, extrema) versions and the job parameters. Submitting
+a key whose job is queued, running or done returns that job instead of
+starting another, so an identical request is answered at once. Keys carry
+versions, so edits make old jobs unreachable instead of stale. Finished jobs
+are kept up to MAX_FINISHED_JOBS, oldest dropped first.
+"""
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+try:
+    from backend.executor import ExecutorSaturated, RETRY_AFTER_SECONDS
+except ImportError:
+    from executor import ExecutorSaturated, RETRY_AFTER_SECONDS
+
+JOB_WORKERS = int(os.environ.get("GRAPH_ANALYZER_JOB_WORKERS", 2))
+JOB_QUEUE = int(os.environ.get("GRAPH_ANALYZER_JOB_QUEUE", 16))
+MAX_FINISHED_JOBS = int(os.environ.get("GRAPH_ANALYZER_MAX_FINISHED_JOBS", 64))
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+FINISHED = (DONE, FAILED, CANCELLED)
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, kind: str, key: Hashable, unit: str):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.key = key
+        self.unit = unit
+        self.status = QUEUED
+        self.done = 0
+        self.total: Optional[int] = None
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self._cancel = threading.Event()
+
+    @property
+    def cancel_requested(self) -> bool:
+        return self._cancel.is_set()
+
+    def report(self, done: int, total: Optional[int] = None) -> None:
+        if self._cancel.is_set():
+            raise JobCancelled()
+        self.done = done
+        if total is not None:
+            self.total = total
+
+    def to_dict(self) -> dict:
+        end = self.finished or time.time()
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "progress": {
+                "done": self.done,
+                "total": self.total,
+                "unit": self.unit,
+                "fraction": self.done / self.total if self.total else None,
+            },
+            "error": self.error,
+            "elapsed_s": end - self.started if self.started else 0.0,
+        }
+
+
+class JobManager:
+    """Job registry with a bounded queue and a result cache keyed like the jobs."""
+
+    def __init__(self, max_workers: int = JOB_WORKERS, max_queue: int = JOB_QUEUE,
+                 max_finished: int = MAX_FINISHED_JOBS, retry_after: int = RETRY_AFTER_SECONDS):
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self.max_finished = max_finished
+        self.retry_after = retry_after
+        self._pool = ThreadPoolExecutor(self.max_workers, thread_name_prefix="job")
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._by_key: Dict[Hashable, str] = {}
+        self._lock = threading.Lock()
+        self.cache_hits = 0
+        self.rejected = 0
+
+    def submit(self, kind: str, key: Hashable, fn: Callable[[Job], Any], unit: str = "items") -> Tuple[Job, bool]:
+        """Start fn(job) in the background; returns (job, reused).
+
+        Raises ExecutorSaturated when max_workers + max_queue jobs are unfinished.
+        """
+        with self._lock:
+            existing = self._jobs.get(self._by_key.get(key, ""))
+            if existing is not None and existing.status not in (FAILED, CANCELLED):
+                self.cache_hits += 1
+                return existing, True
+            active = sum(1 for job in self._jobs.values() if job.status not in FINISHED)
+            if active >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                raise ExecutorSaturated(self.retry_after)
+            job = Job(kind, key, unit)
+            self._jobs[job.id] = job
+            self._by_key[key] = job.id
+        self._pool.submit(self._run, job, fn)
+        return job, False
+
+    def _run(self, job: Job, fn: Callable[[Job], Any]) -> None:
+        if job.cancel_requested:
+            return
+        job.status = RUNNING
+        job.started = time.time()
+        try:
+            job.result = fn(job)
+            job.status = DONE
+        except JobCancelled:
+            job.status = CANCELLED
+        except Exception as e:
+            job.error = str(e)
+            job.status = FAILED
+        finally:
+            job.finished = time.time()
+            self._trim()
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """Request cancellation; a queued job never starts, a running one stops at its next report."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status in FINISHED:
+                return job
+            job._cancel.set()
+            if job.status == QUEUED:
+                job.status = CANCELLED
+                job.finished = time.time()
+        return job
+
+    def _trim(self) -> None:
+        with self._lock:
+            finished = [job for job in self._jobs.values() if job.status in FINISHED]
+            for job in finished[:max(0, len(finished) - self.max_finished)]:
+                del self._jobs[job.id]
+                if self._by_key.get(job.key) == job.id:
+                    del self._by_key[job.key]
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = {status: 0 for status in (QUEUED, RUNNING, DONE, FAILED, CANCELLED)}
+            for job in self._jobs.values():
+                counts[job.status] += 1
+        return {**counts, "cache_hits": self.cache_hits, "rejected": self.rejected}
@@ -0,0 +1,160 @@
+"""
+Level-of-detail pyramid for min/max-preserving downsampling of column data.
+
+Level k stores, for every column, the min and max (and their row indices) of
+consecutive buckets of ``BASE_BUCKET * 2**k`` rows. A viewport query picks the
+coarsest level whose bucket is no wider than one pixel and merges its buckets
+into ``width`` groups, so the cost depends on the pixel width and not on the
+number of rows in the viewport.
+"""
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+BASE_BUCKET = 16
+
+
+class LODLevel:
+    __slots__ = ("bucket", "mins", "maxs", "argmins", "argmaxs")
+
+    def __init__(self, bucket: int, mins: np.ndarray, maxs: np.ndarray,
+                 argmins: np.ndarray, argmaxs: np.ndarray):
+        self.bucket = bucket
+        self.mins = mins
+        self.maxs = maxs
+        self.argmins = argmins  # absolute row indices, int32
+        self.argmaxs = argmaxs
+
+
+class LODPyramid:
+    def __init__(self, data: np.ndarray):
+        self.rows = data.shape[0]
+        self.levels: List[LODLevel] = []
+        self._build(data)
+
+    def _build(self, data: np.ndarray) -> None:
+        rows, cols = data.shape
+        n = rows // BASE_BUCKET
+        if n < 2:
+            return
+        # Base level straight from the data, all columns at once
+        blocks = data[:n * BASE_BUCKET].reshape(n, BASE_BUCKET, cols)
+        local_min = np.argmin(blocks, axis=1)
+        local_max = np.argmax(blocks, axis=1)
+        offsets = (np.arange(n) * BASE_BUCKET)[:, None]
+        level = LODLevel(
+            BASE_BUCKET,
+            np.take_along_axis(blocks, local_min[:, None, :], axis=1)[:, 0, :],
+            np.take_along_axis(blocks, local_max[:, None, :], axis=1)[:, 0, :],
+            (offsets + local_min).astype(np.int32),
+            (offsets + local_max).astype(np.int32),
+        )
+        self.levels.append(level)
+        # Each further level merges pairs of buckets of the previous one
+        while len(level.mins) >= 4:
+            m = len(level.mins) // 2
+            mins = level.mins[:2 * m].reshape(m, 2, cols)
+            maxs = level.maxs[:2 * m].reshape(m, 2, cols)
+            pick_min = np.argmin(mins, axis=1)[:, None, :]
+            pick_max = np.argmax(maxs, axis=1)[:, None, :]
+            level = LODLevel(
+                level.bucket * 2,
+                np.take_along_axis(mins, pick_min, axis=1)[:, 0, :],
+                np.take_along_axis(maxs, pick_max, axis=1)[:, 0, :],
+                np.take_along_axis(level.argmins[:2 * m].reshape(m, 2, cols), pick_min, axis=1)[:, 0, :],
+                np.take_along_axis(level.argmaxs[:2 * m].reshape(m, 2, cols), pick_max, axis=1)[:, 0, :],
+            )
+            self.levels.append(level)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(l.mins.nbytes + l.maxs.nbytes + l.argmins.nbytes + l.argmaxs.nbytes
+                   for l in self.levels)
+
+    def _pick_level(self, samples_per_pixel: float) -> Optional[LODLevel]:
+        chosen = None
+        for level in self.levels:
+            if level.bucket <= samples_per_pixel:
+                chosen = level
+            else:
+                break
+        return chosen
+
+    def query(self, data: np.ndarray, column: int, start: int, end: int,
+              width: int) -> Tuple[np.ndarray, np.ndarray, int]:
+        """Downsample rows [start, end) of a column to at most ~2 * width points.
+
+        Returns (indices, values, bucket) where bucket is the pyramid bucket
+        size used (1 when raw samples were returned). Each pixel contributes
+        its min and max in row order. Buckets straddling the viewport edges
+        are included, so points may lie up to one bucket outside the range.
+        """
+        start = max(0, start)
+        end = min(self.rows, end)
+        if end <= start:
+            return np.zeros(0, dtype=np.int64), np.zeros(0), 1
+        n = end - start
+        width = max(1, width)
+        if n <= 2 * width:
+            return np.arange(start, end), data[start:end, column], 1
+
+        level = self._pick_level(n / width)
+        if level is None:
+            # Viewport narrower than the base bucket per pixel: at most
+            # BASE_BUCKET * width raw samples, still O(width)
+            values = data[start:end, column]
+            edges = np.linspace(0, n, width + 1).astype(np.int64)[:-1]
+            mins, maxs = np.minimum.reduceat(values, edges), np.maximum.reduceat(values, edges)
+            argmins = _first_match(values, np.repeat(mins, np.diff(np.append(edges, n))), edges) + start
+            argmaxs = _first_match(values, np.repeat(maxs, np.diff(np.append(edges, n))), edges) + start
+            return _interleave(argmins, mins, argmaxs, maxs) + (1,)
+
+        b = level.bucket
+        first = start // b
+        last = min(len(level.mins), -(-end // b))
+        mins = level.mins[first:last, column]
+        maxs = level.maxs[first:last, column]
+        count = last - first
+        groups = min(width, count)
+        edges = np.linspace(0, count, groups + 1).astype(np.int64)[:-1]
+        sizes = np.diff(np.append(edges, count))
+        gmins = np.minimum.reduceat(mins, edges)
+        gmaxs = np.maximum.reduceat(maxs, edges)
+        argmins = level.argmins[first:last, column][_first_match(mins, np.repeat(gmins, sizes), edges)].astype(np.int64)
+        argmaxs = level.argmaxs[first:last, column][_first_match(maxs, np.repeat(gmaxs, sizes), edges)].astype(np.int64)
+
+        # Rows past the last full bucket of this level (< 2 buckets) fold into the last pixel
+        covered = len(level.mins) * b
+        if end > covered:
+            tail_start = max(start, covered)
+            tail = data[tail_start:end, column]
+            t_min, t_max = int(np.argmin(tail)), int(np.argmax(tail))
+            if tail[t_min] < gmins[-1]:
+                gmins[-1], argmins[-1] = tail[t_min], tail_start + t_min
+            if tail[t_max] > gmaxs[-1]:
+                gmaxs[-1], argmaxs[-1] = tail[t_max], tail_start + t_max
+        return _interleave(argmins, gmins, argmaxs, gmaxs) + (b,)
+
+
+def _first_match(values: np.ndarray, targets: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    """Position of the first element equal to its group's target, per group."""
+    hits = np.flatnonzero(values == targets)
+    pos = np.searchsorted(hits, edges)
+    result = edges.copy()
+    # Groups without a match (NaN) fall back to their first element
+    valid = pos < len(hits)
+    ends = np.append(edges[1:], len(values))
+    valid[valid] &= hits[pos[valid]] < ends[valid]
+    result[valid] = hits[pos[valid]]
+    return result
+
+
+def _interleave(argmins, mins, argmaxs, maxs) -> Tuple[np.ndarray, np.ndarray]:
+    min_first = argmins <= argmaxs
+    idx = np.empty(2 * len(mins), dtype=np.int64)
+    val = np.empty(2 * len(mins))
+    idx[0::2] = np.where(min_first, argmins, argmaxs)
+    idx[1::2] = np.where(min_first, argmaxs, argmins)
+    val[0::2] = np.where(min_first, mins, maxs)
+    val[1::2] = np.where(min_first, maxs, mins)
+    return idx, val
@@ -1,45 +1,150 @@
 """
 Graph Analyzer API - FastAPI backend
 """
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, UploadFile, File, HTTPException, Header, Depends, Request, WebSocket
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import List, Optional, Tuple
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional, Tuple
 from pathlib import Path
 import numpy as np
-import pandas as pd
-import io
-import uuid
+import hashlib
+import itertools
+import json
+import os
 
 try:
-    from backend.analyzer import GraphAnalyzer, Extremum, compute_pattern_events
+    from backend.analyzer import (
+        GraphAnalyzer, Extremum, compute_pattern_events, detect_pattern_events, event_table_to_json,
+        event_table_to_dicts, DerivedColumn, resample_segment_tensor, ensemble_statistics, random_seed,
+        ENSEMBLE_PERCENTILES,
+    )
+    from backend.transfer import negotiate_media_type, encode_columns, EXPOSED_HEADERS
+    from backend.ingest import ChunkedCSVReader, read_csv_chunks, CHUNK_SIZE
+    from backend.datasets import DatasetCache, dataset_key
+    from backend.parallel import analyze_all_columns, MAX_WORKERS as MAX_EXPORT_WORKERS
+    from backend.sessions import SessionStore
+    from backend.preview import preview_csv
+    from backend.savepoint import SavepointReader, iter_savepoint, SAVEPOINT_MEDIA_TYPE
+    from backend.metrics import TimingMiddleware, registry, stage
+    from backend.serialization import NumpyJSONResponse, columns as record_columns, dumps
+    from backend.executor import ComputeExecutor, ExecutorSaturated
+    from backend.jobs import JobManager, DONE, FAILED, CANCELLED
+    from backend.streaming import LiveStream, merge_updates
 except ImportError:
-    from analyzer import GraphAnalyzer, Extremum, compute_pattern_events
+    from analyzer import (
+        GraphAnalyzer, Extremum, compute_pattern_events, detect_pattern_events, event_table_to_json,
+        event_table_to_dicts, DerivedColumn, resample_segment_tensor, ensemble_statistics, random_seed,
+        ENSEMBLE_PERCENTILES,
+    )
+    from transfer import negotiate_media_type, encode_columns, EXPOSED_HEADERS
+    from ingest import ChunkedCSVReader, read_csv_chunks, CHUNK_SIZE
+    from datasets import DatasetCache, dataset_key
+    from parallel import analyze_all_columns, MAX_WORKERS as MAX_EXPORT_WORKERS
+    from sessions import SessionStore
+    from preview import preview_csv
+    from savepoint import SavepointReader, iter_savepoint, SAVEPOINT_MEDIA_TYPE
+    from metrics import TimingMiddleware, registry, stage
+    from serialization import NumpyJSONResponse, columns as record_columns, dumps
+    from executor import ComputeExecutor, ExecutorSaturated
+    from jobs import JobManager, DONE, FAILED, CANCELLED
+    from streaming import LiveStream, merge_updates
 
 DEFAULT_CSV_PATH = Path(__file__).parent / "test_data.csv"
 
-app = FastAPI(title="Graph Analyzer API", version="1.0.0")
+app = FastAPI(title="Graph Analyzer API", version="1.0.0", default_response_class=NumpyJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=EXPOSED_HEADERS + ["Server-Timing", "Retry-After"],
 )
+# Added last so it wraps CORS and times the whole request
+app.add_middleware(TimingMiddleware)
 
 MAX_SESSIONS = 50
+MAX_UPLOAD_BYTES = 100 * 1024 * 1024
+MAX_STREAM_UPLOAD_BYTES = int(os.environ.get("GRAPH_ANALYZER_MAX_STREAM_BYTES", 8 * 1024 ** 3))
+# Columns resampled per step of a mean-trends job (one progress report each)
+MEAN_TRENDS_JOB_CHUNK = 8
 
-sessions: dict[str, GraphAnalyzer] = {}
+sessions = SessionStore(max_sessions=MAX_SESSIONS)
+datasets = DatasetCache()
+executor = ComputeExecutor()
+jobs = JobManager()
+# Live streams by session id; the session itself lives in `sessions`
+streams: Dict[str, LiveStream] = {}
 
 
 def _create_session(analyzer: GraphAnalyzer) -> str:
-    """Create a new session with a unique ID, evicting oldest if limit reached."""
-    if len(sessions) >= MAX_SESSIONS:
-        oldest_key = next(iter(sessions))
-        del sessions[oldest_key]
-    session_id = str(uuid.uuid4())
-    sessions[session_id] = analyzer
-    return session_id
+    """Create a new session with a unique ID; the store evicts least recently used."""
+    return sessions.create(analyzer)
+
+
+async def _compute(session_id: Optional[str], fn, *args, _light: bool = False, **kwargs):
+    """Run CPU-bound work off the event loop, serialized per session when one is given.
+
+    Building the response inside ``fn`` moves JSON rendering to the worker too.
+    """
+    try:
+        return await executor.run(fn, *args, session_id=session_id, light=_light, **kwargs)
+    except ExecutorSaturated as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
+
+async def _compute_light(session_id: Optional[str], fn, *args, **kwargs):
+    """_compute on the light pool: column fetches, rendering and reads of session state
+    that must not queue behind exports and mean trends."""
+    return await _compute(session_id, fn, *args, _light=True, **kwargs)
+
+
+def _transfer_options(accept: Optional[str] = Header(None), dtype: str = "float64",
+                      encoding: str = "raw", tolerance: float = 1e-3) -> dict:
+    """Binary response options: negotiated from Accept, tuned by query params."""
+    return {
+        "media_type": negotiate_media_type(accept),
+        "dtype": dtype,
+        "encoding": encoding,
+        "tolerance": tolerance,
+    }
+
+
+async def _column_response(columns: dict, transfer: dict, json_payload):
+    """Return columns as binary if the client asked for it, otherwise as JSON.
+
+    ``json_payload`` is a callable building the JSON body, with arrays left as numpy.
+    Either body is produced on the light pool.
+    """
+    media_type = transfer["media_type"]
+    if media_type is None:
+        return await _compute_light(None, lambda: NumpyJSONResponse(json_payload()))
+
+    def encode():
+        with stage("encode"):
+            return encode_columns(
+                columns, media_type, transfer["dtype"], transfer["encoding"], transfer["tolerance"]
+            )
+
+    try:
+        body, headers = await _compute_light(None, encode)
+    except NotImplementedError as e:
+        raise HTTPException(status_code=406, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return Response(content=body, media_type=media_type, headers=headers)
+
+
+def _extrema_payload(extrema, columnar: bool = False):
+    """Extrema as one dict per extremum, or with ``columnar`` as value/index/type arrays."""
+    records = extrema.records
+    if columnar:
+        return record_columns(records)
+    return [
+        {"value": v, "index": i, "type": t}
+        for v, i, t in zip(records["value"].tolist(), records["index"].tolist(), records["type"].tolist())
+    ]
 
 
 class AnalyzeRequest(BaseModel):
@@ -47,6 +152,9 @@ class AnalyzeRequest(BaseModel):
     column: int
     min_distance: int = 10
     frequency: float = 100.0
+    include_column_data: bool = True  # False when the column is fetched in binary separately
+    columnar: bool = False  # extrema as value/index/type arrays instead of one dict each
+    alternate: bool = False  # keep maxima and minima strictly alternating
 
 
 class ExtremumUpdate(BaseModel):
@@ -65,6 +173,7 @@ class ExtremumDelete(BaseModel):
 class PatternRequest(BaseModel):
     session_id: str
     pattern: List[int]
+    columnar: bool = False  # return one array per field instead of one dict per event
 
 
 class ExtremumIn(BaseModel):
@@ -77,6 +186,7 @@ class PatternFromExtremaRequest(BaseModel):
     extrema: List[ExtremumIn]
     pattern: List[int]
     frequency: float = 100.0
+    columnar: bool = False
 
 
 class ColumnDataRequest(BaseModel):
@@ -84,109 +194,147 @@ class ColumnDataRequest(BaseModel):
     column: int
 
 
+class MultiColumnDataRequest(BaseModel):
+    session_id: str
+    columns: List[int]
+
+
+class ColumnLODRequest(BaseModel):
+    session_id: str
+    column: int
+    start: int = 0
+    end: Optional[int] = None
+    width: int = 1000  # viewport width in pixels
+
+
 class RestoreStateRequest(BaseModel):
     session_id: str
     extrema: List[dict]
 
 
 @app.get("/api/load-default")
-async def load_default_data(delimiter: str = ";", trim_zeros: bool = False):
+async def load_default_data(delimiter: str = ";", trim_zeros: bool = False, header_rows: int = 0):
     if not DEFAULT_CSV_PATH.exists():
         raise HTTPException(status_code=404, detail="Default CSV file not found")
     
     try:
-        df = pd.read_csv(DEFAULT_CSV_PATH, delimiter=delimiter, header=None)
-        data = df.values.astype(float)
-        
-        if trim_zeros:
-            non_zero_mask = np.any(data != 0, axis=1)
-            if non_zero_mask.any():
-                first = np.argmax(non_zero_mask)
-                last = len(non_zero_mask) - 1 - np.argmax(non_zero_mask[::-1])
-                data = data[first:last+1]
-        
-        analyzer = GraphAnalyzer()
-        analyzer.load_csv(data)
-        session_id = _create_session(analyzer)
-        
-        return {
-            "session_id": session_id,
-            "rows": data.shape[0],
-            "columns": data.shape[1],
-            "padded_rows": analyzer.raw_data.shape[0]
-        }
+        with stage("read"):
+            content = DEFAULT_CSV_PATH.read_bytes()
+        with stage("hash"):
+            key = dataset_key(hashlib.sha256(content).hexdigest(), delimiter, trim_zeros, header_rows)
+        data = datasets.get(key)
+        if data is None:
+            data = datasets.put(key, await _compute(None, _parse_csv, content, delimiter, trim_zeros, header_rows))
+        return await _create_loaded_session(data)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
 @app.post("/api/preview")
-async def preview_file(file: UploadFile = File(...), delimiter: str = ";", trim_zeros: bool = False):
+async def preview_file(file: UploadFile = File(...), delimiter: Optional[str] = None, trim_zeros: bool = False):
+    """Preview from a bounded head sample; the delimiter is sniffed when not given.
+
+    The detected ``delimiter`` and ``header_rows`` are meant to be passed on
+    to the upload endpoints unchanged. Row counts of files larger than the sample are estimates (rows_estimated).
+    """
+    if file.size is not None and file.size > MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail="File too large (max 100MB)")
     try:
-        content = await file.read()
-        if len(content) > 100 * 1024 * 1024:
-            raise HTTPException(status_code=413, detail="File too large (max 100MB)")
-        df = pd.read_csv(io.BytesIO(content), delimiter=delimiter, header=None)
-        data = df.values.astype(float)
-        total_rows = data.shape[0]
-        total_columns = data.shape[1]
-        zero_rows_start = 0
-        zero_rows_end = 0
-        for i in range(total_rows):
-            if np.all(data[i] == 0):
-                zero_rows_start += 1
-            else:
-                break
-        for i in range(total_rows - 1, -1, -1):
-            if np.all(data[i] == 0):
-                zero_rows_end += 1
-            else:
-                break
-        if trim_zeros:
-            non_zero_mask = np.any(data != 0, axis=1)
-            if non_zero_mask.any():
-                first = np.argmax(non_zero_mask)
-                last = len(non_zero_mask) - 1 - np.argmax(non_zero_mask[::-1])
-                data = data[first:last+1]
-        preview_rows = min(20, data.shape[0])
-        preview_data = data[:preview_rows].tolist()
-        return {
-            "total_rows": total_rows,
-            "total_columns": total_columns,
-            "rows_after_trim": data.shape[0],
-            "zero_rows_start": zero_rows_start,
-            "zero_rows_end": zero_rows_end,
-            "preview": preview_data,
-        }
+        with stage("parse"):
+            return preview_csv(file.file, delimiter, trim_zeros)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
+def _parse_csv(content: bytes, delimiter: str, trim_zeros: bool, header_rows: int = 0) -> np.ndarray:
+    with stage("parse"):
+        return read_csv_chunks([content], delimiter, trim_zeros, header_rows)
+
+
+def _load_analyzer(data: np.ndarray) -> GraphAnalyzer:
+    analyzer = GraphAnalyzer()
+    with stage("lod"):
+        analyzer.load_csv(data)
+    return analyzer
+
+
+async def _create_loaded_session(data: np.ndarray) -> dict:
+    analyzer = await _compute(None, _load_analyzer, data)
+    session_id = _create_session(analyzer)
+    return {
+        "session_id": session_id,
+        "rows": data.shape[0],
+        "columns": data.shape[1],
+        "padded_rows": analyzer.raw_data.shape[0]
+    }
+
+
 @app.post("/api/upload")
-async def upload_file(file: UploadFile = File(...), delimiter: str = ";", trim_zeros: bool = False):
-    try:
-        content = await file.read()
-        if len(content) > 100 * 1024 * 1024:
+async def upload_file(file: UploadFile = File(...), delimiter: str = ";", trim_zeros: bool = False,
+                      header_rows: int = 0):
+    """Parse an uploaded CSV; delimiter and header_rows as returned by /api/preview."""
+    # The upload is already spooled, so hash it first and parse only on a cache miss
+    digest = hashlib.sha256()
+    size = 0
+    while chunk := await file.read(CHUNK_SIZE):
+        size += len(chunk)
+        if size > MAX_UPLOAD_BYTES:
             raise HTTPException(status_code=413, detail="File too large (max 100MB)")
-        df = pd.read_csv(io.BytesIO(content), delimiter=delimiter, header=None)
-        data = df.values.astype(float)
-        
-        if trim_zeros:
-            non_zero_mask = np.any(data != 0, axis=1)
-            if non_zero_mask.any():
-                first = np.argmax(non_zero_mask)
-                last = len(non_zero_mask) - 1 - np.argmax(non_zero_mask[::-1])
-                data = data[first:last+1]
-        
-        analyzer = GraphAnalyzer()
-        analyzer.load_csv(data)
-        session_id = _create_session(analyzer)
-        
-        return {
-            "session_id": session_id,
-            "rows": data.shape[0],
-            "columns": data.shape[1],
-            "padded_rows": analyzer.raw_data.shape[0]
-        }
+        with stage("hash"):
+            digest.update(chunk)
+    key = dataset_key(digest.hexdigest(), delimiter, trim_zeros, header_rows)
+    data = datasets.get(key)
+    if data is not None:
+        return await _create_loaded_session(data)
+
+    def parse():
+        # Read the spooled file directly; the whole parse stays off the event loop
+        file.file.seek(0)
+        reader = ChunkedCSVReader(delimiter, trim_zeros, header_rows)
+        with stage("parse"):
+            while chunk := file.file.read(CHUNK_SIZE):
+                reader.feed(chunk)
+            return datasets.put(key, reader.finish())
+
+    try:
+        data = await _compute(None, parse)
+        return await _create_loaded_session(data)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.post("/api/upload/stream")
+async def upload_stream(request: Request, delimiter: str = ";", trim_zeros: bool = False,
+                        header_rows: int = 0):
+    """Ingest a CSV sent as the raw request body, parsing chunks as they arrive.
+
+    Large data spills to a memory-mapped temp file, so the size limit is
+    MAX_STREAM_UPLOAD_BYTES rather than the in-memory upload limit. The body
+    cannot be read twice, so a repeat upload is still parsed but then shares
+    the cached array instead of keeping its own.
+    """
+    reader = ChunkedCSVReader(delimiter, trim_zeros, header_rows)
+    digest = hashlib.sha256()
+    try:
+        async for chunk in request.stream():
+            with stage("hash"):
+                digest.update(chunk)
+            with stage("parse"):
+                reader.feed(chunk)
+            if reader.bytes_read > MAX_STREAM_UPLOAD_BYTES:
+                raise HTTPException(status_code=413, detail="File too large")
+        key = dataset_key(digest.hexdigest(), delimiter, trim_zeros, header_rows)
+        data = datasets.get(key)
+        if data is None:
+            with stage("parse"):
+                data = datasets.put(key, reader.finish())
+        return await _create_loaded_session(data)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -197,17 +345,25 @@ async def analyze(request: AnalyzeRequest):
         raise HTTPException(status_code=404, detail="Session not found")
     
     analyzer = sessions[request.session_id]
-    analyzer.frequency = request.frequency
-    analyzer.time_per_frame = 1.0 / request.frequency
-    
+
+    def work():
+        analyzer.frequency = request.frequency
+        analyzer.time_per_frame = 1.0 / request.frequency
+        with stage("compute"):
+            analyzer.find_extrema(request.column, request.min_distance, request.alternate)
+        with stage("serialize"):
+            result = {
+                "extrema": _extrema_payload(analyzer.extrema, request.columnar),
+                "count": len(analyzer.extrema),
+            }
+        if request.include_column_data:
+            result["column_data"] = analyzer.signal(request.column)
+        return NumpyJSONResponse(result)
+
     try:
-        extrema = analyzer.find_extrema(request.column, request.min_distance)
-        column_data = analyzer.raw_data[:, request.column].tolist()
-        return {
-            "extrema": [{"value": e.value, "index": e.index, "type": e.extremum_type} for e in extrema],
-            "count": len(extrema),
-            "column_data": column_data
-        }
+        return await _compute(request.session_id, work)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -219,8 +375,12 @@ async def add_extremum(request: ExtremumUpdate):
     
     analyzer = sessions[request.session_id]
     try:
-        new_ext = analyzer.add_extremum(request.index, request.epsilon, request.extremum_type)
+        new_ext = await _compute(
+            request.session_id, analyzer.add_extremum, request.index, request.epsilon, request.extremum_type
+        )
         return {"value": new_ext.value, "index": new_ext.index, "type": new_ext.extremum_type}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -231,35 +391,61 @@ async def remove_extremum(request: ExtremumDelete):
         raise HTTPException(status_code=404, detail="Session not found")
     
     analyzer = sessions[request.session_id]
-    success = analyzer.remove_extremum(request.index, request.tolerance)
+    success = await _compute(request.session_id, analyzer.remove_extremum, request.index, request.tolerance)
     return {"success": success}
 
 
+def _validate_pattern(pattern: List[int]) -> None:
+    if len(pattern) < 2:
+        raise HTTPException(status_code=400, detail="Pattern must have at least 2 elements")
+    if any(t not in (0, 1) for t in pattern):
+        raise HTTPException(status_code=400, detail="Pattern elements must be 0 (min) or 1 (max)")
+
+
 @app.post("/api/pattern/events")
 async def get_pattern_events(request: PatternRequest):
     if request.session_id not in sessions:
         raise HTTPException(status_code=404, detail="Session not found")
 
-    if len(request.pattern) != 3:
-        raise HTTPException(status_code=400, detail="Pattern must have exactly 3 elements")
+    _validate_pattern(request.pattern)
 
     analyzer = sessions[request.session_id]
-    events = analyzer.find_pattern_events(tuple(request.pattern))
-    return {"events": events, "count": len(events)}
+
+    def work():
+        if request.columnar:
+            with stage("compute"):
+                table = analyzer.find_pattern_event_table(request.pattern)
+            return NumpyJSONResponse({"events": event_table_to_json(table), "count": len(table["start_index"])})
+        with stage("compute"):
+            events = analyzer.find_pattern_events(tuple(request.pattern))
+        return NumpyJSONResponse({"events": events, "count": len(events)})
+
+    return await _compute(request.session_id, work)
 
 
 @app.post("/api/pattern/events-from-extrema")
 async def get_pattern_events_from_extrema(request: PatternFromExtremaRequest):
-    if len(request.pattern) != 3:
-        raise HTTPException(status_code=400, detail="Pattern must have exactly 3 elements")
-    extrema = [Extremum(value=e.value, index=e.index, extremum_type=e.type) for e in request.extrema]
+    _validate_pattern(request.pattern)
     time_per_frame = 1.0 / request.frequency if request.frequency > 0 else 0.01
-    events = compute_pattern_events(extrema, tuple(request.pattern), time_per_frame)
-    return {"events": events, "count": len(events)}
+
+    def work():
+        if request.columnar:
+            table = detect_pattern_events(
+                np.array([e.index for e in request.extrema], dtype=np.int64),
+                np.array([e.value for e in request.extrema], dtype=np.float64),
+                np.array([e.type for e in request.extrema], dtype=np.int64),
+                request.pattern, time_per_frame,
+            )
+            return NumpyJSONResponse({"events": event_table_to_json(table), "count": len(table["start_index"])})
+        extrema = [Extremum(value=e.value, index=e.index, extremum_type=e.type) for e in request.extrema]
+        events = compute_pattern_events(extrema, tuple(request.pattern), time_per_frame)
+        return NumpyJSONResponse({"events": events, "count": len(events)})
+
+    return await _compute(None, work)
 
 
 @app.post("/api/data/column")
-async def get_column_data(request: ColumnDataRequest):
+async def get_column_data(request: ColumnDataRequest, transfer: dict = Depends(_transfer_options)):
     if request.session_id not in sessions:
         raise HTTPException(status_code=404, detail="Session not found")
     
@@ -267,11 +453,118 @@ async def get_column_data(request: ColumnDataRequest):
     if analyzer.raw_data is None:
         raise HTTPException(status_code=400, detail="No data loaded")
     
-    if request.column >= analyzer.raw_data.shape[1]:
+    if not analyzer.has_column(request.column):
         raise HTTPException(status_code=400, detail="Column index out of range")
     
-    data = analyzer.raw_data[:, request.column].tolist()
-    return {"data": data, "length": len(data)}
+    # A derived column is computed here on first use
+    data = await _compute_light(None, analyzer.signal, request.column)
+    return await _column_response(
+        {str(request.column): data}, transfer,
+        lambda: {"data": data, "length": len(data)}
+    )
+
+
+@app.post("/api/data/column/lod")
+async def get_column_lod(request: ColumnLODRequest, transfer: dict = Depends(_transfer_options)):
+    """Min/max-preserving downsampled view of rows [start, end) for a chart of `width` pixels."""
+    if request.session_id not in sessions:
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    analyzer = sessions[request.session_id]
+    if analyzer.raw_data is None:
+        raise HTTPException(status_code=400, detail="No data loaded")
+    if request.width < 1:
+        raise HTTPException(status_code=400, detail="Width must be positive")
+    
+    try:
+        # The first call per session builds the LOD pyramid
+        indices, values, bucket = await _compute_light(
+            request.session_id, analyzer.downsample_column,
+            request.column, request.start, request.end, request.width
+        )
+    except IndexError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return await _column_response(
+        {"index": indices, "value": values}, transfer,
+        lambda: {
+            "index": indices,
+            "data": values,
+            "bucket": bucket,
+            "length": analyzer.raw_data.shape[0],
+        }
+    )
+
+
+@app.post("/api/data/columns")
+async def get_columns_data(request: MultiColumnDataRequest, transfer: dict = Depends(_transfer_options)):
+    """Return several columns in one payload (JSON object or one binary body)."""
+    if request.session_id not in sessions:
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    analyzer = sessions[request.session_id]
+    if analyzer.raw_data is None:
+        raise HTTPException(status_code=400, detail="No data loaded")
+    
+    if not request.columns or not all(analyzer.has_column(c) for c in request.columns):
+        raise HTTPException(status_code=400, detail="Column index out of range")
+    
+    columns = await _compute_light(None, lambda: {str(c): analyzer.signal(c) for c in request.columns})
+    return await _column_response(
+        columns, transfer,
+        lambda: {
+            "data": columns,
+            "length": analyzer.raw_data.shape[0],
+        }
+    )
+
+
+@app.get("/api/sessions/stats")
+async def session_stats():
+    """Resident/spilled bytes and lookup counters of the session store and dataset cache,
+    and the compute executor's queue."""
+    return {
+        **sessions.stats(),
+        "dataset_cache": datasets.stats(),
+        "compute": executor.stats(),
+        "jobs": jobs.stats(),
+        "streams": len(streams),
+    }
+
+
+@app.get("/api/metrics")
+async def metrics():
+    """Prometheus text exposition: request/stage latency histograms and session gauges."""
+    store = sessions.stats()
+    cache = datasets.stats()
+    compute = executor.stats()
+    job_stats = jobs.stats()
+    extra = {
+        "graph_analyzer_sessions": ("gauge", store["sessions"], "Live sessions"),
+        "graph_analyzer_spilled_sessions": ("gauge", store["spilled_sessions"],
+                                            "Sessions whose data is memory-mapped from disk"),
+        "graph_analyzer_session_resident_bytes": ("gauge", store["resident_bytes"], "Session data held in RAM"),
+        "graph_analyzer_session_spilled_bytes": ("gauge", store["spilled_bytes"], "Session data spilled to disk"),
+        "graph_analyzer_session_budget_bytes": ("gauge", store["budget_bytes"], "Session memory budget"),
+        "graph_analyzer_session_hits_total": ("counter", store["hits"], "Session lookups served from RAM"),
+        "graph_analyzer_session_spill_hits_total": ("counter", store["spill_hits"],
+                                                    "Session lookups served from a spill file"),
+        "graph_analyzer_session_misses_total": ("counter", store["misses"], "Lookups of unknown or expired sessions"),
+        "graph_analyzer_dataset_cache_datasets": ("gauge", cache["datasets"], "Parsed datasets shared by sessions"),
+        "graph_analyzer_dataset_cache_bytes": ("gauge", cache["bytes"], "Bytes of shared parsed datasets"),
+        "graph_analyzer_dataset_cache_retained_bytes": ("gauge", cache["retained_bytes"],
+                                                        "Bytes of recent datasets kept after their sessions"),
+        "graph_analyzer_compute_workers": ("gauge", compute["workers"], "Compute executor threads"),
+        "graph_analyzer_compute_pending": ("gauge", compute["pending"],
+                                           "Compute calls running or waiting for a worker or session lock"),
+        "graph_analyzer_compute_rejected_total": ("counter", compute["rejected"],
+                                                  "Compute calls refused with 503 because the queue was full"),
+        "graph_analyzer_jobs_active": ("gauge", job_stats["queued"] + job_stats["running"],
+                                       "Background jobs queued or running"),
+        "graph_analyzer_job_cache_hits_total": ("counter", job_stats["cache_hits"],
+                                                "Job submissions answered by an existing job"),
+    }
+    return PlainTextResponse(registry.render(extra), media_type="text/plain; version=0.0.4")
 
 
 @app.get("/api/session/{session_id}")
@@ -279,18 +572,30 @@ async def get_session(session_id: str):
     if session_id not in sessions:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    return sessions[session_id].to_dict()
+    # Read under the session lock so a concurrent edit is never seen half-applied
+    return await _compute_light(session_id, sessions[session_id].to_dict)
 
 
 @app.get("/api/session/{session_id}/extrema")
-async def get_extrema(session_id: str):
+async def get_extrema(session_id: str, columnar: bool = False):
     if session_id not in sessions:
         raise HTTPException(status_code=404, detail="Session not found")
     
     analyzer = sessions[session_id]
-    return {
-        "extrema": [{"value": e.value, "index": e.index, "type": e.extremum_type} for e in analyzer.extrema]
-    }
+    return await _compute_light(
+        session_id, lambda: NumpyJSONResponse({"extrema": _extrema_payload(analyzer.extrema, columnar)})
+    )
+
+
+@app.get("/api/session/{session_id}/extrema/nearest")
+async def get_nearest_extremum(session_id: str, index: int):
+    if session_id not in sessions:
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    ext = await _compute_light(session_id, sessions[session_id].nearest_extremum, index)
+    if ext is None:
+        raise HTTPException(status_code=404, detail="No extrema")
+    return {"value": ext.value, "index": ext.index, "type": ext.extremum_type}
 
 
 @app.post("/api/state/restore")
@@ -299,7 +604,7 @@ async def restore_state(request: RestoreStateRequest):
         raise HTTPException(status_code=404, detail="Session not found")
     
     analyzer = sessions[request.session_id]
-    analyzer.extrema = [
+    extrema = [
         Extremum(
             value=e["value"],
             index=e["index"],
@@ -307,7 +612,20 @@ async def restore_state(request: RestoreStateRequest):
         )
         for e in request.extrema
     ]
-    return {"success": True, "count": len(analyzer.extrema)}
+
+    def restore():
+        analyzer.extrema = extrema
+        return len(analyzer.extrema)
+
+    return {"success": True, "count": await _compute(request.session_id, restore)}
+
+
+# Event parameters in the export; patterns longer than three points give per-point lists instead of inflexion fields
+EXPORT_EVENT_FIELDS = (
+    "start_value", "start_time", "inflexion_value", "inflexion_time", "end_value", "end_time",
+    "shift_start_to_inflexion", "shift_inflexion_to_end", "time_start_to_inflexion", "time_inflexion_to_end",
+    "values", "phase_shifts", "phase_times", "cycle_time", "pattern_type",
+)
 
 
 @app.post("/api/export/events")
@@ -315,30 +633,19 @@ async def export_events(request: PatternRequest):
     if request.session_id not in sessions:
         raise HTTPException(status_code=404, detail="Session not found")
     
+    _validate_pattern(request.pattern)
+
     analyzer = sessions[request.session_id]
-    events = analyzer.find_pattern_events(tuple(request.pattern))
-    
-    if not events:
-        return {"csv": "", "parameters": []}
-    
-    parameters = []
-    for event in events:
-        parameters.append({
-            "start_value": event["start_value"],
-            "start_time": event["start_time"],
-            "inflexion_value": event["inflexion_value"],
-            "inflexion_time": event["inflexion_time"],
-            "end_value": event["end_value"],
-            "end_time": event["end_time"],
-            "shift_start_to_inflexion": event["shift_start_to_inflexion"],
-            "shift_inflexion_to_end": event["shift_inflexion_to_end"],
-            "time_start_to_inflexion": event["time_start_to_inflexion"],
-            "time_inflexion_to_end": event["time_inflexion_to_end"],
-            "cycle_time": event["cycle_time"],
-            "pattern": event["pattern"]
-        })
-    
-    return {"parameters": parameters}
+
+    def work():
+        with stage("compute"):
+            table = analyzer.find_pattern_event_table(request.pattern)
+        with stage("serialize"):
+            parameters = [{key: event[key] for key in EXPORT_EVENT_FIELDS if key in event}
+                          for event in event_table_to_dicts(table)]
+        return NumpyJSONResponse({"parameters": parameters})
+
+    return await _compute(request.session_id, work)
 
 
 class ExportAllColumnsRequest(BaseModel):
@@ -346,6 +653,8 @@ class ExportAllColumnsRequest(BaseModel):
     pattern: List[int]
     min_distance: int = 10
     frequency: float = 100.0
+    # >1 fans columns out over the shared process pool; larger than its size is rejected (422)
+    workers: Optional[int] = Field(None, ge=1, le=MAX_EXPORT_WORKERS)
 
 
 @app.post("/api/export/all-columns")
@@ -354,26 +663,31 @@ async def export_all_columns(request: ExportAllColumnsRequest):
     if request.session_id not in sessions:
         raise HTTPException(status_code=404, detail="Session not found")
 
+    _validate_pattern(request.pattern)
+
     base_analyzer = sessions[request.session_id]
     if base_analyzer.raw_data is None:
         raise HTTPException(status_code=400, detail="No data loaded")
 
     num_cols = base_analyzer.raw_data.shape[1]
-    results = {}
-
-    for col in range(num_cols):
-        col_analyzer = GraphAnalyzer(frequency=request.frequency)
-        col_analyzer.load_csv(base_analyzer.raw_data)
-        extrema = col_analyzer.find_extrema(col, request.min_distance)
-        events = col_analyzer.find_pattern_events(tuple(request.pattern))
-
-        results[str(col)] = {
-            "column": col,
-            "extrema_count": len(extrema),
-            "events": events,
-        }
 
-    return {"columns": num_cols, "results": results}
+    def work():
+        with stage("compute"):
+            column_results, timing = analyze_all_columns(
+                base_analyzer.raw_data, tuple(request.pattern),
+                request.min_distance, request.frequency, request.workers
+            )
+        results = {str(r["column"]): r for r in column_results}
+        return NumpyJSONResponse({"columns": num_cols, "results": results, "timing": timing})
+
+    # Reads only raw_data, which is never mutated in place, so edits to the
+    # session do not have to wait for a long export
+    try:
+        return await _compute(None, work)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 class StickFigureRequest(BaseModel):
@@ -382,6 +696,18 @@ class StickFigureRequest(BaseModel):
     point_labels: Optional[List[str]] = None
     frame_rate: int = 24
     column: Optional[int] = None  # if set, animate single column as signal trace
+    resample: bool = True  # decimate from the session frequency to frame_rate
+    start_frame: int = 0  # paging, in output frames
+    max_frames: Optional[int] = None
+
+
+class EnsembleOptions(BaseModel):
+    """Robust per-timepoint statistics added to a mean trend (see ensemble_statistics)."""
+    percentiles: List[float] = list(ENSEMBLE_PERCENTILES)
+    trim: float = 0.1  # fraction cut at each end for the trimmed mean
+    resamples: int = 1000  # bootstrap resamples for the confidence band of the mean
+    confidence: float = 0.95
+    seed: Optional[int] = None  # None: a fresh seed, returned in the response
 
 
 class MeanTrendRequest(BaseModel):
@@ -389,6 +715,7 @@ class MeanTrendRequest(BaseModel):
     pattern: List[int]
     column: int
     target_length: Optional[int] = None
+    ensemble: Optional[EnsembleOptions] = None
 
 
 class MeanTrendExtendedRequest(BaseModel):
@@ -398,6 +725,32 @@ class MeanTrendExtendedRequest(BaseModel):
     target_length: Optional[int] = None
     length_mode: str = 'average'  # 'average' or 'percentage'
     interpolation_method: str = 'linear'  # 'linear' or 'spline'
+    ensemble: Optional[EnsembleOptions] = None
+
+
+class DerivedColumnRequest(BaseModel):
+    session_id: str
+    kind: str  # 'distance', 'angle', 'normalized' or 'filtered'
+    points: List[List[int]] = []  # distance / angle: raw column indices per point
+    source: Optional[int] = None  # normalized / filtered: any column id
+    params: dict = {}  # filtered: method, cutoff, order, window, polyorder
+    name: str = ''
+
+
+class DerivedColumnDelete(BaseModel):
+    session_id: str
+    column: int
+
+
+class MeanTrendsRequest(BaseModel):
+    session_id: str
+    pattern: List[int]
+    columns: Optional[List[int]] = None  # default: every column
+    target_length: Optional[int] = None
+    length_mode: str = 'average'  # 'average' or 'percentage'
+    interpolation_method: str = 'linear'  # 'linear' or 'spline'
+    include_segments: bool = False
+    ensemble: Optional[EnsembleOptions] = None
 
 
 class NormalizeRequest(BaseModel):
@@ -407,6 +760,17 @@ class NormalizeRequest(BaseModel):
 
 class SavepointRequest(BaseModel):
     session_id: str
+    include_data: bool = True
+
+
+class AngleDefinition(BaseModel):
+    name: Optional[str] = None
+    points: List[List[int]]  # 3 or 4 points, each a list of 1-3 column indices
+
+
+class AnglesRequest(BaseModel):
+    session_id: str
+    angles: List[AngleDefinition]
 
 
 @app.post("/api/mean-trend")
@@ -415,21 +779,28 @@ async def get_mean_trend(request: MeanTrendRequest):
         raise HTTPException(status_code=404, detail="Session not found")
     
     analyzer = sessions[request.session_id]
-    events = analyzer.find_pattern_events(tuple(request.pattern))
-    
-    if not events:
-        raise HTTPException(status_code=400, detail="No events found for pattern")
-    
+
+    def work():
+        with stage("compute"):
+            segments = analyzer.get_segment_matrix(
+                tuple(request.pattern), request.column, request.target_length
+            )
+            mean_trend = np.mean(segments.matrix, axis=0)
+            std_trend = np.std(segments.matrix, axis=0)
+            result = {
+                "mean": mean_trend,
+                "std": std_trend,
+                "length": len(mean_trend),
+                "event_count": len(segments.starts)
+            }
+            if request.ensemble is not None:
+                result.update(ensemble_statistics(segments.matrix, **request.ensemble.model_dump()))
+        return NumpyJSONResponse(result)
+
     try:
-        mean_trend, std_trend = analyzer.calculate_mean_trend(
-            events, request.column, request.target_length
-        )
-        return {
-            "mean": mean_trend.tolist(),
-            "std": std_trend.tolist(),
-            "length": len(mean_trend),
-            "event_count": len(events)
-        }
+        return await _compute(request.session_id, work)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -440,90 +811,429 @@ async def get_mean_trend_extended(request: MeanTrendExtendedRequest):
         raise HTTPException(status_code=404, detail="Session not found")
     
     analyzer = sessions[request.session_id]
-    events = analyzer.find_pattern_events(tuple(request.pattern))
-    
-    if not events:
-        raise HTTPException(status_code=400, detail="No events found for pattern")
-    
+
+    def work():
+        # Cached per (pattern, column, length, method, extrema version), so
+        # repeated slider changes reuse the resampled matrix
+        with stage("compute"):
+            segments = analyzer.get_segment_matrix(
+                tuple(request.pattern),
+                request.column,
+                request.target_length,
+                request.length_mode,
+                request.interpolation_method
+            )
+        ensemble = request.ensemble.model_dump() if request.ensemble is not None else None
+        return NumpyJSONResponse(analyzer.mean_trend_extended_result(segments, request.column, ensemble))
+
     try:
-        result = analyzer.calculate_mean_trend_extended(
-            events, 
-            request.column, 
-            request.target_length,
-            request.length_mode,
-            request.interpolation_method
-        )
-        return result
+        return await _compute(request.session_id, work)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@app.post("/api/mean-trends")
+async def get_mean_trends(request: MeanTrendsRequest):
+    """Mean/std trends of the session's event set over many columns in one call."""
+    if request.session_id not in sessions:
+        raise HTTPException(status_code=404, detail="Session not found")
+    _validate_pattern(request.pattern)
+
+    analyzer = sessions[request.session_id]
+
+    def work():
+        with stage("compute"):
+            result = analyzer.mean_trends(
+                tuple(request.pattern),
+                request.columns,
+                request.target_length,
+                request.length_mode,
+                request.interpolation_method,
+                request.include_segments,
+                request.ensemble.model_dump() if request.ensemble is not None else None
+            )
+        return NumpyJSONResponse(result)
+
+    try:
+        return await _compute(request.session_id, work)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.post("/api/derived")
+async def add_derived_column(request: DerivedColumnRequest):
+    """Register a virtual column; its id works wherever a column index is accepted.
+
+    Values are computed on first use and cached until the data changes.
+    """
+    if request.session_id not in sessions:
+        raise HTTPException(status_code=404, detail="Session not found")
+
+    analyzer = sessions[request.session_id]
+    definition = DerivedColumn(request.kind, request.points, request.source, request.params, request.name)
+    try:
+        column = await _compute(request.session_id, analyzer.add_derived, definition)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"column": column, **definition.to_dict()}
+
+
+@app.get("/api/session/{session_id}/derived")
+async def list_derived_columns(session_id: str):
+    if session_id not in sessions:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return {"columns": sessions[session_id].derived_to_list()}
+
+
+@app.post("/api/derived/remove")
+async def remove_derived_column(request: DerivedColumnDelete):
+    if request.session_id not in sessions:
+        raise HTTPException(status_code=404, detail="Session not found")
+
+    analyzer = sessions[request.session_id]
+    try:
+        await _compute(request.session_id, analyzer.remove_derived, request.column)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"success": True}
+
+
 @app.post("/api/normalize")
-async def normalize_column(request: NormalizeRequest):
+async def normalize_column(request: NormalizeRequest, transfer: dict = Depends(_transfer_options)):
+    if request.session_id not in sessions:
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    analyzer = sessions[request.session_id]
+
+    def work():
+        with stage("compute"):
+            return analyzer.normalize_data(request.column)
+
+    try:
+        normalized = await _compute(None, work)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return await _column_response(
+        {str(request.column): normalized}, transfer,
+        lambda: {"data": normalized, "length": len(normalized)}
+    )
+
+
+@app.post("/api/angles")
+async def get_angles(request: AnglesRequest):
+    """Compute all requested 3-point / 4-point angle series in one batched pass."""
     if request.session_id not in sessions:
         raise HTTPException(status_code=404, detail="Session not found")
     
     analyzer = sessions[request.session_id]
+    if analyzer.raw_data is None:
+        raise HTTPException(status_code=400, detail="No data loaded")
+    if not request.angles:
+        raise HTTPException(status_code=400, detail="No angle definitions given")
+    
+    num_cols = analyzer.raw_data.shape[1]
+    for angle in request.angles:
+        for point in angle.points:
+            if any(c < 0 or c >= num_cols for c in point):
+                raise HTTPException(status_code=400, detail="Column index out of range")
+    
+    def work():
+        with stage("compute"):
+            angles = analyzer.calculate_angles([a.points for a in request.angles])
+        return NumpyJSONResponse({
+            "angles": [
+                {"name": a.name or f"angle_{i}", "data": angles[i]}
+                for i, a in enumerate(request.angles)
+            ],
+            "length": angles.shape[1],
+        })
+
     try:
-        normalized = analyzer.normalize_data(request.column)
-        return {"data": normalized.tolist(), "length": len(normalized)}
+        return await _compute(None, work)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
+def _submit_job(kind: str, key: tuple, fn, unit: str) -> dict:
+    try:
+        job, reused = jobs.submit(kind, key, fn, unit)
+    except ExecutorSaturated as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    return {**job.to_dict(), "reused": reused}
+
+
+@app.post("/api/jobs/export/all-columns", status_code=202)
+async def submit_export_all_columns_job(request: ExportAllColumnsRequest):
+    """Background variant of /api/export/all-columns; poll /api/jobs/{job_id}."""
+    if request.session_id not in sessions:
+        raise HTTPException(status_code=404, detail="Session not found")
+    _validate_pattern(request.pattern)
+
+    analyzer = sessions[request.session_id]
+    if analyzer.raw_data is None:
+        raise HTTPException(status_code=400, detail="No data loaded")
+    data = analyzer.raw_data
+    pattern = tuple(request.pattern)
+
+    def run(job):
+        job.report(0, data.shape[1])
+        column_results, timing = analyze_all_columns(
+            data, pattern, request.min_distance, request.frequency, request.workers, progress=job.report
+        )
+        results = {str(r["column"]): r for r in column_results}
+        return {"columns": data.shape[1], "results": results, "timing": timing}
+
+    key = ("export-all-columns", request.session_id, analyzer.data_version,
+           pattern, request.min_distance, request.frequency)
+    return _submit_job("export-all-columns", key, run, "columns")
+
+
+@app.post("/api/jobs/mean-trends", status_code=202)
+async def submit_mean_trends_job(request: MeanTrendsRequest):
+    """Background variant of /api/mean-trends, resampled in column chunks with progress."""
+    if request.session_id not in sessions:
+        raise HTTPException(status_code=404, detail="Session not found")
+    _validate_pattern(request.pattern)
+
+    analyzer = sessions[request.session_id]
+    if analyzer.raw_data is None:
+        raise HTTPException(status_code=400, detail="No data loaded")
+    columns = list(range(analyzer.raw_data.shape[1])) if request.columns is None else request.columns
+    if not columns or not all(analyzer.has_column(c) for c in columns):
+        raise HTTPException(status_code=400, detail="Column index out of range")
+
+    def snapshot():
+        # Events depend on the extrema, so take them under the session lock
+        table = analyzer.find_pattern_event_table(tuple(request.pattern))
+        data, positions = analyzer.column_matrix(columns)
+        return (data, positions, table["start_index"], table["end_index"], analyzer.current_column,
+                analyzer.data_version, analyzer.extrema_version)
+
+    try:
+        snapshot_values = await _compute(request.session_id, snapshot)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    data, positions, starts, ends, reference_column, data_version, extrema_version = snapshot_values
+    if len(starts) == 0:
+        raise HTTPException(status_code=400, detail="No events found for pattern")
+    lengths = ends - starts + 1
+    if request.length_mode == 'percentage':
+        target_length = 100
+    else:
+        target_length = request.target_length or int(np.mean(lengths))
+
+    ensemble = None
+    if request.ensemble is not None:
+        # Resolved up front so every column chunk draws the same resamples
+        ensemble = request.ensemble.model_dump()
+        ensemble["seed"] = random_seed() if ensemble["seed"] is None else ensemble["seed"]
+
+    def run(job):
+        job.report(0, len(columns))
+        parts = []
+        for i in range(0, len(columns), MEAN_TRENDS_JOB_CHUNK):
+            chunk = positions[i:i + MEAN_TRENDS_JOB_CHUNK]
+            tensor = resample_segment_tensor(data, chunk, starts, ends, target_length, request.interpolation_method)
+            part = {"mean": tensor.mean(axis=1), "std": tensor.std(axis=1)}
+            if ensemble is not None:
+                part.update(ensemble_statistics(tensor, **ensemble))
+            parts.append(part)
+            job.report(i + len(chunk), len(columns))
+        result = {
+            "columns": columns,
+            "reference_column": reference_column,
+            "target_length": target_length,
+            "average_length": int(np.mean(lengths)),
+            "event_count": len(starts),
+            "lengths": lengths,
+        }
+        for name, value in parts[0].items():
+            result[name] = value if name == "ensemble" else np.concatenate([p[name] for p in parts])
+        return result
+
+    key = ("mean-trends", request.session_id, data_version, extrema_version, tuple(request.pattern),
+           tuple(columns), target_length, request.interpolation_method,
+           json.dumps(ensemble, sort_keys=True) if ensemble is not None else None)
+    return _submit_job("mean-trends", key, run, "columns")
+
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+
+@app.post("/api/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    job = jobs.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+
+@app.get("/api/jobs/{job_id}/result")
+async def get_job_result(job_id: str):
+    """The job's result once done; 202 with its status while it is still queued or running."""
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.status == FAILED:
+        raise HTTPException(status_code=400, detail=job.error)
+    if job.status == CANCELLED:
+        raise HTTPException(status_code=409, detail="Job was cancelled")
+    if job.status != DONE:
+        return NumpyJSONResponse(job.to_dict(), status_code=202)
+    return await _compute(None, lambda: NumpyJSONResponse(job.result))
+
+
 @app.post("/api/savepoint/save")
-async def save_savepoint(request: SavepointRequest):
+async def save_savepoint(request: SavepointRequest, accept: Optional[str] = Header(None)):
+    """Savepoint as JSON, or as the streamed binary container when Accept asks for it.
+
+    The binary form always carries the data hash; with include_data=False it
+    holds only frequency and extrema and loads against data still on the server.
+    """
     if request.session_id not in sessions:
         raise HTTPException(status_code=404, detail="Session not found")
     
     analyzer = sessions[request.session_id]
-    savepoint = {
-        "extrema": [{"value": e.value, "index": e.index, "type": e.extremum_type} 
-                    for e in analyzer.extrema],
+    if accept and SAVEPOINT_MEDIA_TYPE in accept:
+        def snapshot():
+            # Header and extrema are produced under the session lock; the data
+            # frames then come from the array captured with them
+            chunks = iter_savepoint(analyzer, include_data=request.include_data)
+            return list(itertools.islice(chunks, 2)), chunks
+
+        head, frames = await _compute(request.session_id, snapshot)
+        return StreamingResponse(
+            itertools.chain(head, frames),
+            media_type=SAVEPOINT_MEDIA_TYPE,
+            headers={"Content-Disposition": 'attachment; filename="savepoint.gasave"'},
+        )
+    return await _compute(request.session_id, lambda: NumpyJSONResponse({
+        "extrema": _extrema_payload(analyzer.extrema),
         "frequency": analyzer.frequency,
         "time_per_frame": analyzer.time_per_frame,
-        "raw_data": analyzer.raw_data.tolist() if analyzer.raw_data is not None else None
-    }
-    return savepoint
+        "raw_data": analyzer.raw_data,
+        "derived": analyzer.derived_to_list(),
+    }))
+
+
+async def _load_binary_savepoint(request: Request) -> dict:
+    reader = SavepointReader(max_data_bytes=MAX_STREAM_UPLOAD_BYTES)
+    try:
+        async for chunk in request.stream():
+            reader.feed(chunk)
+            if reader.bytes_read > MAX_STREAM_UPLOAD_BYTES:
+                raise HTTPException(status_code=413, detail="File too large")
+        savepoint = reader.finish()
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    data = None
+    if savepoint.data is None and savepoint.data_hash is not None:
+        data = sessions.find_data(savepoint.data_hash)
+        if data is None:
+            raise HTTPException(status_code=409, detail="Savepoint data is not on the server; send it with data")
+    try:
+        analyzer = savepoint.to_analyzer(data)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"session_id": _create_session(analyzer), "data_reused": data is not None}
 
 
 @app.post("/api/savepoint/load")
-async def load_savepoint(savepoint: dict):
-    analyzer = GraphAnalyzer(frequency=savepoint.get("frequency", 100.0))
-    
-    if savepoint.get("raw_data"):
-        analyzer.raw_data = np.array(savepoint["raw_data"])
-    
-    for ext in savepoint.get("extrema", []):
-        analyzer.extrema.append(Extremum(
-            value=ext["value"],
-            index=ext["index"],
-            extremum_type=ext["type"]
-        ))
-    
+async def load_savepoint(request: Request):
+    if SAVEPOINT_MEDIA_TYPE in request.headers.get("content-type", ""):
+        return await _load_binary_savepoint(request)
+
+    body = await request.body()
+
+    def build():
+        # Decoding a JSON savepoint is as heavy as parsing a CSV, so it runs on a worker
+        savepoint = json.loads(body)
+        if not isinstance(savepoint, dict):
+            raise ValueError("Savepoint must be a JSON object")
+        analyzer = GraphAnalyzer(frequency=savepoint.get("frequency", 100.0))
+        if savepoint.get("raw_data"):
+            analyzer.raw_data = np.array(savepoint["raw_data"])
+            try:
+                analyzer.restore_derived(savepoint.get("derived", []))
+            except Exception as e:
+                raise HTTPException(status_code=400, detail=f"Invalid derived column: {e}")
+        analyzer.extrema = [
+            Extremum(
+                value=ext["value"],
+                index=ext["index"],
+                extremum_type=ext["type"]
+            )
+            for ext in savepoint.get("extrema", [])
+        ]
+        return analyzer
+
+    try:
+        analyzer = await _compute(None, build)
+    except HTTPException:
+        raise
+    except (ValueError, KeyError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid savepoint: {e}")
     session_id = _create_session(analyzer)
     return {"session_id": session_id}
 
 
 @app.post("/api/reference-column")
-async def get_reference_column(request: ColumnDataRequest):
+async def get_reference_column(request: ColumnDataRequest, transfer: dict = Depends(_transfer_options)):
     if request.session_id not in sessions:
         raise HTTPException(status_code=404, detail="Session not found")
     
     analyzer = sessions[request.session_id]
     try:
-        data = analyzer.get_reference_column_data(request.column)
-        return {"data": data.tolist(), "length": len(data)}
+        data = await _compute_light(None, analyzer.get_reference_column_data, request.column)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+    return await _column_response(
+        {str(request.column): data}, transfer,
+        lambda: {"data": data, "length": len(data)}
+    )
+
+
+STICK_FIGURE_TRAIL_LENGTH = 50
+STICK_FIGURE_STREAM_CHUNK = 500
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
 
 
 @app.post("/api/stick-figure/data")
-async def get_stick_figure_data(request: StickFigureRequest):
+async def get_stick_figure_data(request: StickFigureRequest, accept: Optional[str] = Header(None)):
     """
-    Returns frame-by-frame data for stick figure animation.
-    If column is specified: animates single column as a moving point with trail
+    Returns columnar frame data for stick figure animation: ``x[p]`` and ``y[p]``
+    hold the coordinates of point p for every returned frame.
+    If column is specified: one point, x = sample index, y = signal value; the
+    client derives the trail from the previous ``trail_length`` frames.
     Otherwise: pairs of X,Y coordinates (col 0,1 = point1 X,Y; col 2,3 = point2 X,Y; etc.)
+    Frames are decimated to ``frame_rate`` (from the session frequency) unless
+    ``resample`` is false, and can be paged with start_frame/max_frames.
+    With ``Accept: application/x-ndjson`` the response streams a metadata line
+    followed by one line per chunk of frames.
     """
     if request.session_id not in sessions:
         raise HTTPException(status_code=404, detail="Session not found")
@@ -531,102 +1241,245 @@ async def get_stick_figure_data(request: StickFigureRequest):
     analyzer = sessions[request.session_id]
     if analyzer.raw_data is None:
         raise HTTPException(status_code=400, detail="No data loaded")
+    if request.frame_rate <= 0:
+        raise HTTPException(status_code=400, detail="Frame rate must be positive")
     
     data = analyzer.raw_data
-    num_frames = data.shape[0]
     num_cols = data.shape[1]
     
     # Single column signal trace mode
     if request.column is not None:
-        if request.column < 0 or request.column >= num_cols:
+        if not analyzer.has_column(request.column):
             raise HTTPException(status_code=400, detail=f"Column {request.column} out of range")
         
-        # Detect actual data boundaries instead of assuming fixed padding
-        non_zero_mask = np.any(data != 0, axis=1)
-        if non_zero_mask.any():
-            actual_start = int(np.argmax(non_zero_mask))
-            actual_end = int(len(non_zero_mask) - np.argmax(non_zero_mask[::-1]))
-        else:
-            actual_start = 0
-            actual_end = num_frames
-        
-        col_data = data[actual_start:actual_end, request.column]
-        num_frames = len(col_data)
-        y_min, y_max = float(np.min(col_data)), float(np.max(col_data))
-        
-        # Create frames with trailing points (show history)
-        trail_length = 50  # number of previous points to show
-        frames = []
-        for frame_idx in range(num_frames):
-            points = []
-            # Add trail points (older points)
-            start_idx = max(0, frame_idx - trail_length + 1)
-            for i in range(start_idx, frame_idx + 1):
-                alpha = (i - start_idx + 1) / (frame_idx - start_idx + 1)  # fade effect
-                points.append({
-                    "x": float(i),
-                    "y": float(col_data[i]),
-                    "label": f"t={i}" if i == frame_idx else ""
-                })
-            frames.append({"points": points})
-        
-        # Connections: connect consecutive trail points
-        connections = [[i, i+1] for i in range(trail_length - 1)]
-        
-        return {
-            "frames": frames,
-            "num_frames": num_frames,
-            "num_points": trail_length,
-            "bounds": {
+        def trace():
+            # Detect actual data boundaries instead of assuming fixed padding
+            non_zero_mask = np.any(data != 0, axis=1)
+            if non_zero_mask.any():
+                actual_start = int(np.argmax(non_zero_mask))
+                actual_end = int(len(non_zero_mask) - np.argmax(non_zero_mask[::-1]))
+            else:
+                actual_start = 0
+                actual_end = data.shape[0]
+            col_data = analyzer.signal(request.column)[actual_start:actual_end]
+            return col_data, {
                 "x_min": 0,
-                "x_max": float(num_frames),
-                "y_min": y_min,
-                "y_max": y_max
-            },
-            "connections": connections,
-            "frame_rate": request.frame_rate
-        }
+                "x_max": float(len(col_data)),
+                "y_min": float(np.min(col_data)),
+                "y_max": float(np.max(col_data)),
+            }
+
+        col_data, bounds = await _compute(None, trace)
+        num_source_frames = len(col_data)
+        x_source = None
+        y_source = col_data[:, None]
+        labels = [""]
+        connections = [[i, i + 1] for i in range(STICK_FIGURE_TRAIL_LENGTH - 1)]
+    else:
+        # Original X,Y pairs mode
+        num_points = num_cols // 2
+        if num_points < 1:
+            raise HTTPException(status_code=400, detail="Need at least 2 columns for X,Y pairs")
+        
+        x_source = data[:, 0:num_points * 2:2]
+        y_source = data[:, 1:num_points * 2:2]
+        num_source_frames = data.shape[0]
+        labels = [
+            request.point_labels[i] if request.point_labels and i < len(request.point_labels) else f"P{i+1}"
+            for i in range(num_points)
+        ]
+        connections = request.connections
+        bounds = await _compute(None, lambda: {
+            "x_min": float(np.min(x_source)),
+            "x_max": float(np.max(x_source)),
+            "y_min": float(np.min(y_source)),
+            "y_max": float(np.max(y_source)),
+        })
     
-    # Original X,Y pairs mode
-    num_points = num_cols // 2
-    if num_points < 1:
-        raise HTTPException(status_code=400, detail="Need at least 2 columns for X,Y pairs")
+    # Source row of every output frame
+    step = analyzer.frequency / request.frame_rate if request.resample else 1.0
+    step = max(1.0, step)
+    frame_index = np.floor(np.arange(0, num_source_frames, step)).astype(np.int64)
+    num_frames = len(frame_index)
     
-    x_cols = list(range(0, num_points * 2, 2))
-    y_cols = list(range(1, num_points * 2, 2))
+    page_start = max(0, request.start_frame)
+    page_end = num_frames if request.max_frames is None else min(num_frames, page_start + max(0, request.max_frames))
     
-    x_data = data[:, x_cols]
-    y_data = data[:, y_cols]
+    def columns(lo: int, hi: int) -> dict:
+        rows = frame_index[lo:hi]
+        xs = rows[:, None].astype(float) if x_source is None else x_source[rows]
+        return {
+            "start_frame": lo,
+            "frame_index": rows,
+            "x": xs.T,
+            "y": y_source[rows].T,
+        }
     
-    x_min, x_max = float(np.min(x_data)), float(np.max(x_data))
-    y_min, y_max = float(np.min(y_data)), float(np.max(y_data))
+    meta = {
+        "mode": "column" if request.column is not None else "points",
+        "num_frames": num_frames,
+        "num_points": len(labels),
+        "labels": labels,
+        "bounds": bounds,
+        "connections": connections,
+        "frame_rate": request.frame_rate,
+        "source_frequency": analyzer.frequency,
+        "frame_step": step,
+        "trail_length": STICK_FIGURE_TRAIL_LENGTH if request.column is not None else 1,
+        "page_start": page_start,
+        "page_end": max(page_start, page_end),
+    }
     
-    frames = []
-    for frame_idx in range(num_frames):
-        points = []
-        for i in range(num_points):
-            points.append({
-                "x": float(data[frame_idx, x_cols[i]]),
-                "y": float(data[frame_idx, y_cols[i]]),
-                "label": request.point_labels[i] if request.point_labels and i < len(request.point_labels) else f"P{i+1}"
-            })
-        frames.append({"points": points})
+    if accept and NDJSON_MEDIA_TYPE in accept:
+        def stream():
+            yield dumps(meta) + b"\n"
+            for lo in range(page_start, page_end, STICK_FIGURE_STREAM_CHUNK):
+                yield dumps(columns(lo, min(page_end, lo + STICK_FIGURE_STREAM_CHUNK))) + b"\n"
+        return StreamingResponse(stream(), media_type=NDJSON_MEDIA_TYPE)
     
+    return await _compute(None, lambda: NumpyJSONResponse({**meta, **columns(page_start, max(page_start, page_end))}))
+
+
+class StreamStartRequest(BaseModel):
+    session_id: Optional[str] = None  # extend an existing session; default: a new empty one
+    column: int = 0  # reference column for extrema
+    min_distance: int = 10
+    frequency: float = 100.0  # only for a new session
+    pattern: Optional[List[int]] = None  # report events of this pattern
+    horizon: Optional[int] = None  # samples after a peak before it is final
+
+
+def _get_stream(session_id: str) -> LiveStream:
+    stream = streams.get(session_id)
+    if stream is not None and session_id not in sessions:
+        # The session expired or was evicted
+        del streams[session_id]
+        stream = None
+    if stream is None:
+        raise HTTPException(status_code=404, detail="Stream not found")
+    return stream
+
+
+def _decode_rows(payload: bytes, width: Optional[int]) -> np.ndarray:
+    """Raw little-endian float64 rows of `width` values each."""
+    if not width:
+        raise HTTPException(status_code=400, detail="Column count required for binary rows")
+    if len(payload) % (8 * width):
+        raise HTTPException(status_code=400, detail="Body is not a whole number of rows")
+    return np.frombuffer(payload, dtype="<f8").reshape(-1, width)
+
+
+def _stream_width(stream: LiveStream, columns: Optional[int]) -> Optional[int]:
+    data = stream.analyzer.raw_data
+    return data.shape[1] if data is not None else columns
+
+
+@app.post("/api/stream/start")
+async def start_stream(request: StreamStartRequest):
+    """Open a live stream: appended rows extend the session, and extrema of
+    the reference column and pattern events are reported as they become final."""
+    if request.pattern is not None:
+        _validate_pattern(request.pattern)
+    if request.session_id is None:
+        session_id = _create_session(GraphAnalyzer(frequency=request.frequency))
+    elif request.session_id not in sessions:
+        raise HTTPException(status_code=404, detail="Session not found")
+    else:
+        session_id = request.session_id
+    analyzer = sessions[session_id]
+    if analyzer.raw_data is not None and not 0 <= request.column < analyzer.raw_data.shape[1]:
+        raise HTTPException(status_code=400, detail="Column index out of range")
+
+    def work():
+        return LiveStream(analyzer, request.column, request.min_distance, request.pattern, request.horizon)
+
+    stream = await _compute(session_id, work)
+    streams[session_id] = stream
     return {
-        "frames": frames,
-        "num_frames": num_frames,
-        "num_points": num_points,
-        "bounds": {
-            "x_min": x_min,
-            "x_max": x_max,
-            "y_min": y_min,
-            "y_max": y_max
-        },
-        "connections": request.connections,
-        "frame_rate": request.frame_rate
+        "session_id": session_id,
+        "column": stream.column,
+        "min_distance": stream.detector.min_distance,
+        "horizon": stream.detector.horizon,
+        "samples": analyzer.raw_data.shape[0] if analyzer.raw_data is not None else 0,
     }
 
 
+@app.post("/api/stream/{session_id}/append")
+async def append_stream(session_id: str, request: Request, columns: Optional[int] = None):
+    """Append rows as JSON {"rows": [[...], ...]}, or as raw little-endian
+    float64 rows (application/octet-stream, `columns` values per row) which
+    are fed chunk by chunk as a chunked body arrives."""
+    stream = _get_stream(session_id)
+    try:
+        if request.headers.get("content-type", "").startswith("application/octet-stream"):
+            width = _stream_width(stream, columns)
+            row_bytes = 8 * (width or 1)
+            updates, pending = [], b""
+            async for chunk in request.stream():
+                pending += chunk
+                usable = len(pending) - len(pending) % row_bytes
+                if usable:
+                    rows = _decode_rows(pending[:usable], width)
+                    pending = pending[usable:]
+                    updates.append(await _compute(session_id, stream.append, rows))
+            if pending:
+                raise HTTPException(status_code=400, detail="Body is not a whole number of rows")
+            return merge_updates(updates)
+        body = await request.json()
+        return await _compute(session_id, stream.append, np.asarray(body["rows"], dtype=np.float64))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.post("/api/stream/{session_id}/close")
+async def close_stream(session_id: str):
+    """End the stream: report the extrema still inside the look-ahead horizon.
+
+    The session stays open for the regular analysis endpoints.
+    """
+    stream = _get_stream(session_id)
+    update = await _compute(session_id, stream.close)
+    streams.pop(session_id, None)
+    return update
+
+
+@app.websocket("/api/stream/{session_id}/ws")
+async def stream_socket(websocket: WebSocket, session_id: str, columns: Optional[int] = None):
+    """Live stream over a WebSocket. Each text frame {"rows": [[...], ...]} or
+    binary frame of float64 rows is answered with its update; {"close": true}
+    ends the stream. A dropped connection leaves the stream open for a retry."""
+    await websocket.accept()
+    try:
+        stream = _get_stream(session_id)
+    except HTTPException as e:
+        await websocket.close(code=4404, reason=e.detail)
+        return
+    while True:
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            return
+        try:
+            if message.get("bytes") is not None:
+                rows = _decode_rows(message["bytes"], _stream_width(stream, columns))
+            else:
+                body = json.loads(message["text"])
+                if body.get("close"):
+                    update = await _compute(session_id, stream.close)
+                    streams.pop(session_id, None)
+                    await websocket.send_text(dumps(update).decode())
+                    await websocket.close()
+                    return
+                rows = np.asarray(body["rows"], dtype=np.float64)
+            update = await _compute(session_id, stream.append, rows)
+        except HTTPException as e:
+            update = {"error": e.detail}
+        except Exception as e:
+            update = {"error": str(e)}
+        await websocket.send_text(dumps(update).decode())
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
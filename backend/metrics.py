@@ -0,0 +1,211 @@
+"""
+Request instrumentation: per-request stage timings and Prometheus metrics.
+
+Endpoint code marks stages with ``with stage("parse"): ...``; the ASGI
+middleware collects them per request, reports them in a ``Server-Timing``
+header and aggregates them, together with total latency and request and
+response sizes, into histograms labelled by route template. ``render``
+writes the Prometheus text exposition format.
+"""
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Sequence, Tuple
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (1e3, 1e4, 1e5, 1e6, 1e7, 1e8, 1e9)
+PREFIX = "graph_analyzer"
+
+
+class RequestTimer:
+    __slots__ = ("start", "stages")
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+
+    def add(self, name: str, seconds: float) -> None:
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def server_timing(self) -> str:
+        parts = [f"{name};dur={seconds * 1000:.3f}" for name, seconds in self.stages.items()]
+        parts.append(f"total;dur={(time.perf_counter() - self.start) * 1000:.3f}")
+        return ", ".join(parts)
+
+
+_current: contextvars.ContextVar[Optional[RequestTimer]] = contextvars.ContextVar("request_timer", default=None)
+
+
+@contextmanager
+def stage(name: str):
+    """Time a block as stage `name` of the current request (no-op outside a request)."""
+    timer = _current.get()
+    if timer is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.add(name, time.perf_counter() - start)
+
+
+def record_stage(name: str, seconds: float) -> None:
+    """Add a duration measured elsewhere to stage `name` of the current request."""
+    timer = _current.get()
+    if timer is not None:
+        timer.add(name, seconds)
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _number(value: float) -> str:
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], Histogram] = {}
+        self._counters: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = {}
+        self._help: Dict[str, Tuple[str, str]] = {}
+
+    def observe(self, name: str, value: float, labels: Dict[str, str], buckets: Sequence[float],
+                help_text: str = "") -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._help.setdefault(name, ("histogram", help_text))
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def inc(self, name: str, labels: Dict[str, str], value: float = 1.0, help_text: str = "") -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._help.setdefault(name, ("counter", help_text))
+            self._counters[key] = self._counters.get(key, 0.0) + value
+
+    def record_request(self, route: str, method: str, status: int, timer: RequestTimer,
+                       request_bytes: int, response_bytes: int) -> None:
+        labels = {"route": route, "method": method}
+        self.inc(f"{PREFIX}_requests_total", {**labels, "status": str(status)},
+                 help_text="Requests by route, method and status")
+        self.observe(f"{PREFIX}_request_duration_seconds", time.perf_counter() - timer.start, labels,
+                     LATENCY_BUCKETS, "End-to-end request latency")
+        for name, seconds in timer.stages.items():
+            self.observe(f"{PREFIX}_stage_duration_seconds", seconds, {**labels, "stage": name},
+                         LATENCY_BUCKETS, "Time spent in a named stage of a request")
+        self.observe(f"{PREFIX}_request_bytes", request_bytes, labels, SIZE_BUCKETS, "Request body size")
+        self.observe(f"{PREFIX}_response_bytes", response_bytes, labels, SIZE_BUCKETS, "Response body size")
+
+    def render(self, extra: Optional[Dict[str, Tuple[str, float, str]]] = None) -> str:
+        """Prometheus text format; `extra` maps metric name to (type, value, help) for
+        values owned elsewhere, such as session store gauges."""
+        lines: List[str] = []
+        with self._lock:
+            by_name: Dict[str, list] = {}
+            for (name, labels), value in self._counters.items():
+                by_name.setdefault(name, []).append((dict(labels), value))
+            for (name, labels), histogram in self._histograms.items():
+                by_name.setdefault(name, []).append((dict(labels), histogram))
+            for name in sorted(by_name):
+                kind, help_text = self._help[name]
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in by_name[name]:
+                    if kind == "counter":
+                        lines.append(f"{name}{_labels(labels)} {_number(value)}")
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(value.buckets + (float("inf"),), value.counts):
+                        cumulative += count
+                        le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                        lines.append(f"{name}_bucket{_labels({**labels, 'le': le})} {cumulative}")
+                    lines.append(f"{name}_sum{_labels(labels)} {_number(value.sum)}")
+                    lines.append(f"{name}_count{_labels(labels)} {value.count}")
+        for name, (kind, value, help_text) in sorted((extra or {}).items()):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.append(f"{name} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+class TimingMiddleware:
+    """ASGI middleware adding Server-Timing headers and recording request metrics.
+
+    The header is written when the response starts, so it carries the stages
+    finished by then; for streamed responses, later stages only reach the
+    histograms.
+    """
+
+    def __init__(self, app, registry: MetricsRegistry = registry):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        timer = RequestTimer()
+        token = _current.set(timer)
+        sizes = {"request": 0, "response": 0}
+        # Bodies an endpoint never reads still count through Content-Length
+        declared = next((int(v) for k, v in scope.get("headers", []) if k == b"content-length"), 0)
+        status = {"code": 500}
+
+        async def counting_receive():
+            message = await receive()
+            if message["type"] == "http.request":
+                sizes["request"] += len(message.get("body", b""))
+            return message
+
+        async def timed_send(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timer.server_timing().encode()))
+                headers.append((b"timing-allow-origin", b"*"))
+                message = {**message, "headers": headers}
+            elif message["type"] == "http.response.body":
+                sizes["response"] += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, counting_receive, timed_send)
+        finally:
+            _current.reset(token)
+            route = scope.get("route")
+            self.registry.record_request(
+                getattr(route, "path", "unmatched"), scope["method"], status["code"], timer,
+                max(sizes["request"], declared), sizes["response"],
+            )
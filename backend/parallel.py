@@ -0,0 +1,161 @@
+"""
+Parallel per-column extrema + pattern-event analysis.
+
+The data matrix is published once in a shared memory block; worker processes
+attach to it by name (cached per block) and analyze their columns without the
+array being pickled per task. One pool of MAX_WORKERS processes is shared
+by all callers; it spawns its processes on demand and is reused. A run keeps
+at most its requested number of columns in flight, so it occupies no more
+than that many of the pool's processes.
+"""
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import get_context
+from multiprocessing.shared_memory import SharedMemory
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from backend.analyzer import GraphAnalyzer
+except ImportError:
+    from analyzer import GraphAnalyzer
+
+DEFAULT_WORKERS = int(os.environ.get("GRAPH_ANALYZER_EXPORT_WORKERS", 1))
+# Upper bound for a requested worker count (and the size of the shared pool)
+MAX_WORKERS = max(1, int(os.environ.get("GRAPH_ANALYZER_MAX_EXPORT_WORKERS", os.cpu_count() or 1)))
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+# Worker-side cache of the currently attached block
+_attached: Dict[str, Tuple[SharedMemory, np.ndarray]] = {}
+
+
+def analyze_column(data: np.ndarray, column: int, pattern: Tuple[int, ...],
+                   min_distance: int, frequency: float) -> dict:
+    start = time.perf_counter()
+    analyzer = GraphAnalyzer(frequency=frequency)
+    # Assign directly: load_csv would build a LOD pyramid we do not need here
+    analyzer.raw_data = data
+    extrema = analyzer.find_extrema(column, min_distance)
+    events = analyzer.find_pattern_events(pattern)
+    return {
+        "column": column,
+        "extrema_count": len(extrema),
+        "events": events,
+        "elapsed_ms": (time.perf_counter() - start) * 1000,
+    }
+
+
+def _attach(name: str, shape: Tuple[int, ...], dtype: str) -> np.ndarray:
+    if name not in _attached:
+        for old_shm, _ in _attached.values():
+            old_shm.close()
+        _attached.clear()
+        if sys.version_info >= (3, 13):
+            shm = SharedMemory(name=name, track=False)
+        else:
+            # Spawned workers share the parent's resource tracker, so the
+            # registration is deduplicated and released by the parent's unlink
+            shm = SharedMemory(name=name)
+        _attached[name] = (shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf))
+    return _attached[name][1]
+
+
+def _analyze_shared_column(args) -> dict:
+    name, shape, dtype, column, pattern, min_distance, frequency = args
+    data = _attach(name, shape, dtype)
+    return analyze_column(data, column, pattern, min_distance, frequency)
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=MAX_WORKERS, mp_context=get_context("spawn"))
+        return _pool
+
+
+def shutdown_pools() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+        _pool = None
+
+
+def analyze_all_columns(data: np.ndarray, pattern: Tuple[int, ...], min_distance: int = 10,
+                        frequency: float = 100.0, workers: Optional[int] = None,
+                        columns: Optional[List[int]] = None,
+                        progress: Optional[Callable[[int, int], None]] = None) -> Tuple[List[dict], dict]:
+    """Run find_extrema + find_pattern_events on each column.
+
+    With ``workers`` > 1 (capped at MAX_WORKERS) the columns are fanned out
+    over the shared process pool, at most ``workers`` at a time, and read the
+    data from shared memory. Returns (per-column results, timing); timing
+    reports the number of workers actually used. ``progress(done, total)`` is
+    called as column results come in; an exception it raises abandons the
+    run, cancelling the columns not yet started.
+    """
+    workers = max(1, min(workers or DEFAULT_WORKERS, MAX_WORKERS))
+    if columns is None:
+        columns = list(range(data.shape[1]))
+    start = time.perf_counter()
+
+    results = []
+    if workers == 1 or len(columns) < 2:
+        for c in columns:
+            results.append(analyze_column(data, c, pattern, min_distance, frequency))
+            if progress:
+                progress(len(results), len(columns))
+    else:
+        workers = min(workers, len(columns))
+        shm = SharedMemory(create=True, size=max(1, data.nbytes))
+        shared = np.ndarray(data.shape, dtype=data.dtype, buffer=shm.buf)
+        pending = {}
+        try:
+            shared[...] = data
+            pool = _get_pool()
+            tasks = iter(enumerate(
+                (shm.name, data.shape, data.dtype.str, c, pattern, min_distance, frequency)
+                for c in columns
+            ))
+
+            def submit_next() -> None:
+                item = next(tasks, None)
+                if item is not None:
+                    pending[pool.submit(_analyze_shared_column, item[1])] = item[0]
+
+            for _ in range(workers):
+                submit_next()
+            by_position: Dict[int, dict] = {}
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    by_position[pending.pop(future)] = future.result()
+                    submit_next()
+                    if progress:
+                        progress(len(by_position), len(columns))
+            results = [by_position[i] for i in range(len(columns))]
+        finally:
+            # Workers must be done with the block before it is unlinked
+            for future in pending:
+                future.cancel()
+            wait(pending)
+            del shared
+            shm.close()
+            shm.unlink()
+
+    total_ms = (time.perf_counter() - start) * 1000
+    column_ms = sum(r["elapsed_ms"] for r in results)
+    timing = {
+        "workers": workers,
+        "total_ms": total_ms,
+        "column_ms_sum": column_ms,
+        "speedup": column_ms / total_ms if total_ms > 0 else None,
+    }
+    return results, timing
@@ -0,0 +1,227 @@
+"""
+Bounded-sample CSV preview.
+
+Only the head of the file is parsed for the preview rows, delimiter and
+column layout. Leading zero rows are counted by scanning forward block by
+block and trailing ones by reading blocks backwards from the end, both
+vectorized per block, so a recording with a few zero rows at either end
+costs two small reads however large it is. The total row count is exact
+when the forward scan reached the end of the file and otherwise estimated
+from the mean line length of the parsed head.
+"""
+import io
+import os
+from typing import BinaryIO, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+HEAD_BYTES = 256 * 1024
+SCAN_BYTES = 1024 * 1024
+EXACT_COUNT_BYTES = 8 * 1024 * 1024
+PREVIEW_ROWS = 20
+SNIFF_LINES = 50
+MAX_HEADER_LINES = 5
+DELIMITERS = (";", ",", "\t", "|")
+
+
+def _is_numeric(fields: List[bytes]) -> bool:
+    try:
+        for field in fields:
+            float(field)
+    except ValueError:
+        return False
+    return True
+
+
+def sniff_layout(sample: bytes, delimiter: Optional[str] = None) -> Tuple[str, int, int]:
+    """(delimiter, columns, header_rows) that make the sample consistently numeric.
+
+    Candidates are tried in DELIMITERS order unless one is given; up to
+    MAX_HEADER_LINES leading non-numeric lines are treated as a header.
+    """
+    lines = [l for l in sample.split(b"\n")[:SNIFF_LINES + MAX_HEADER_LINES] if l.strip()]
+    if sample and not sample.endswith(b"\n") and len(lines) > 1:
+        lines = lines[:-1]  # probably cut off by the sample boundary
+    if not lines:
+        raise ValueError("No data rows found")
+    candidates = [delimiter] if delimiter else DELIMITERS
+    best = None
+    for candidate in candidates:
+        sep = candidate.encode()
+        split = [l.rstrip(b"\r").split(sep) for l in lines]
+        header = 0
+        while header < min(MAX_HEADER_LINES, len(split) - 1) and not _is_numeric(split[header]):
+            header += 1
+        body = split[header:]
+        columns = len(body[0])
+        consistent = sum(1 for fields in body if len(fields) == columns and _is_numeric(fields))
+        score = (consistent / len(body), columns > 1 or len(candidates) == 1, columns)
+        if best is None or score > best[0]:
+            best = (score, candidate, columns, header)
+    score, candidate, columns, header = best
+    if score[0] < 1.0:
+        raise ValueError("Could not detect a numeric delimited layout")
+    return candidate, columns, header
+
+
+def _parse(block: bytes, delimiter: str, columns: int) -> np.ndarray:
+    if not block.strip():
+        return np.zeros((0, columns))
+    import pandas as pd
+    rows = pd.read_csv(io.BytesIO(block), delimiter=delimiter, header=None).to_numpy(dtype=float)
+    if rows.shape[1] != columns:
+        raise ValueError(f"Expected {columns} columns, got {rows.shape[1]}")
+    return rows
+
+
+def _forward_blocks(f: BinaryIO, start: int, delimiter: str, columns: int,
+                    first_size: int) -> Iterator[Tuple[np.ndarray, int]]:
+    """Parsed blocks of complete lines from `start` on, with the bytes each consumed."""
+    f.seek(start)
+    pending = b""
+    size = first_size
+    while True:
+        chunk = f.read(size)
+        size = SCAN_BYTES
+        if not chunk:
+            if pending.strip():
+                yield _parse(pending, delimiter, columns), len(pending)
+            return
+        data = pending + chunk
+        cut = data.rfind(b"\n")
+        if cut < 0:
+            pending = data
+            continue
+        pending = data[cut + 1:]
+        yield _parse(data[:cut + 1], delimiter, columns), cut + 1
+
+
+def _backward_blocks(f: BinaryIO, stop: int, end: int, delimiter: str,
+                     columns: int) -> Iterator[Tuple[np.ndarray, int]]:
+    """Parsed blocks of complete lines walking back from `end` to `stop`, with their sizes."""
+    pos = end
+    tail = b""
+    while pos > stop:
+        size = min(SCAN_BYTES, pos - stop)
+        pos -= size
+        f.seek(pos)
+        data = f.read(size) + tail
+        if pos > stop:
+            cut = data.find(b"\n")
+            if cut < 0:
+                tail = data
+                continue
+            tail, data = data[:cut + 1], data[cut + 1:]
+        yield _parse(data, delimiter, columns), len(data)
+
+
+def _count_lines(f: BinaryIO, start: int, end: int) -> int:
+    f.seek(start)
+    count = 0
+    last = b"\n"
+    while start < end:
+        chunk = f.read(min(SCAN_BYTES, end - start))
+        if not chunk:
+            break
+        count += chunk.count(b"\n")
+        last = chunk[-1:]
+        start += len(chunk)
+    return count + (last != b"\n")
+
+
+def _lines_per_byte(f: BinaryIO, start: int, end: int) -> float:
+    """Line density of a SCAN_BYTES sample centred in [start, end)."""
+    offset = max(start, (start + end - SCAN_BYTES) // 2)
+    f.seek(offset)
+    sample = f.read(min(SCAN_BYTES, end - offset))
+    sample = sample[sample.find(b"\n") + 1:]
+    return sample.count(b"\n") / max(1, len(sample))
+
+
+def preview_csv(f: BinaryIO, delimiter: Optional[str] = None, trim_zeros: bool = False,
+                preview_rows: int = PREVIEW_ROWS) -> dict:
+    f.seek(0, os.SEEK_END)
+    size = f.tell()
+    f.seek(0)
+    head = f.read(HEAD_BYTES)
+    delimiter, columns, header_rows = sniff_layout(head, delimiter)
+    data_start = 0
+    for _ in range(header_rows):
+        data_start = head.index(b"\n", data_start) + 1
+
+    # Forward: leading zero rows and the preview rows, usually from the head alone
+    rows_seen = 0
+    bytes_seen = 0
+    first_nonzero = None
+    first_rows: List[np.ndarray] = []
+    trimmed_rows: List[np.ndarray] = []
+    reached_end = True
+    for block, consumed in _forward_blocks(f, data_start, delimiter, columns, HEAD_BYTES - data_start):
+        offset = rows_seen
+        rows_seen += len(block)
+        bytes_seen += consumed
+        if sum(map(len, first_rows)) < preview_rows:
+            first_rows.append(block[:preview_rows])
+        if first_nonzero is None:
+            nonzero = np.flatnonzero(np.any(block != 0, axis=1))
+            if not len(nonzero):
+                continue
+            first_nonzero = offset + int(nonzero[0])
+            block = block[int(nonzero[0]):]
+        if sum(map(len, trimmed_rows)) < preview_rows:
+            trimmed_rows.append(block[:preview_rows])
+        if sum(map(len, trimmed_rows)) >= preview_rows:
+            reached_end = data_start + bytes_seen >= size
+            break
+
+    if first_nonzero is None:
+        # Only zero rows: the whole file was scanned and nothing is trimmed
+        total_rows = rows_seen
+        zero_rows_start = zero_rows_end = total_rows
+        rows_after_trim = total_rows
+        estimated = False
+    else:
+        zero_rows_end = 0
+        back_rows = back_bytes = 0
+        for block, consumed in _backward_blocks(f, data_start, size, delimiter, columns):
+            back_rows += len(block)
+            back_bytes += consumed
+            nonzero = np.flatnonzero(np.any(block != 0, axis=1))
+            if len(nonzero):
+                zero_rows_end += len(block) - 1 - int(nonzero[-1])
+                break
+            zero_rows_end += len(block)
+
+        scanned = data_start + bytes_seen
+        remaining = size - scanned
+        estimated = False
+        if reached_end:
+            total_rows = rows_seen
+        elif remaining <= max(back_bytes, EXACT_COUNT_BYTES):
+            total_rows = rows_seen + _count_lines(f, scanned, size)
+        else:
+            # Both scans parsed their rows; only the unread middle is extrapolated
+            middle_end = size - back_bytes
+            total_rows = rows_seen + back_rows + int(round(
+                (middle_end - scanned) * _lines_per_byte(f, scanned, middle_end)
+            ))
+            estimated = True
+        zero_rows_start = first_nonzero
+        rows_after_trim = total_rows - zero_rows_start - zero_rows_end
+
+    shown = trimmed_rows if trim_zeros and first_nonzero is not None else first_rows
+    rows = np.concatenate(shown) if shown else np.zeros((0, columns))
+    if trim_zeros and first_nonzero is not None and not estimated:
+        # The trailing zero rows the upload drops may already be in the preview
+        rows = rows[:rows_after_trim]
+    return {
+        "total_rows": total_rows,
+        "total_columns": columns,
+        "rows_after_trim": rows_after_trim if trim_zeros else total_rows,
+        "zero_rows_start": zero_rows_start,
+        "zero_rows_end": zero_rows_end,
+        "preview": rows[:preview_rows].tolist(),
+        "delimiter": delimiter,
+        "header_rows": header_rows,
+        "rows_estimated": estimated,
+    }
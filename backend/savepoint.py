@@ -0,0 +1,214 @@
+"""
+Binary savepoint container.
+
+Layout (all integers little-endian)::
+
+    MAGIC | u32 header length | JSON header | extrema records | data frames | u32 0
+
+The header carries frequency, extrema count, data shape, derived column
+definitions and the SHA-256 of the data (see GraphAnalyzer.content_hash). Extrema are packed
+(value f8, index i8, type i1) records. Data is written as zlib-compressed
+frames of whole rows, each prefixed with its u32 length, so both sides can
+stream it without holding a second copy. A savepoint written without data
+still carries the hash, and can be loaded against data already on the server.
+"""
+import hashlib
+import json
+import os
+import struct
+import zlib
+from dataclasses import dataclass, field
+from typing import Iterator, List, Optional
+
+import numpy as np
+
+try:
+    from backend.analyzer import GraphAnalyzer, ExtremaIndex, EXTREMUM_DTYPE
+except ImportError:
+    from analyzer import GraphAnalyzer, ExtremaIndex, EXTREMUM_DTYPE
+
+SAVEPOINT_MEDIA_TYPE = "application/x-graph-savepoint"
+MAGIC = b"GASAVE01"
+FORMAT_VERSION = 1
+FRAME_BYTES = 4 * 1024 * 1024
+COMPRESSION_LEVEL = 1
+# Largest data block a reader will allocate; main passes its streaming upload limit
+MAX_DATA_BYTES = int(os.environ.get("GRAPH_ANALYZER_MAX_STREAM_BYTES", 8 * 1024 ** 3))
+
+_U32 = struct.Struct("<I")
+_RECORD_DTYPE = np.dtype([('value', '<f8'), ('index', '<i8'), ('type', 'i1')])
+
+
+@dataclass
+class Savepoint:
+    frequency: float
+    extrema: ExtremaIndex
+    data: Optional[np.ndarray]
+    data_hash: Optional[str]
+    shape: Optional[tuple]
+    derived: List[dict] = field(default_factory=list)
+
+    def to_analyzer(self, data: Optional[np.ndarray] = None) -> GraphAnalyzer:
+        """Analyzer with the savepoint's extrema over its own data or `data` with the same hash."""
+        analyzer = GraphAnalyzer(frequency=self.frequency)
+        data = self.data if data is None else data
+        if data is not None:
+            analyzer.raw_data = data
+            # Already verified against the header; spare the next save a full rehash
+            analyzer.set_content_hash(self.data_hash)
+        analyzer.extrema = self.extrema
+        if data is not None:
+            analyzer.restore_derived(self.derived)
+        return analyzer
+
+
+def iter_savepoint(analyzer: GraphAnalyzer, include_data: bool = True,
+                   frame_bytes: int = FRAME_BYTES) -> Iterator[bytes]:
+    """Yield the savepoint of an analyzer as a sequence of byte chunks."""
+    data = analyzer.raw_data
+    header = {
+        "version": FORMAT_VERSION,
+        "frequency": analyzer.frequency,
+        "time_per_frame": analyzer.time_per_frame,
+        "extrema": len(analyzer.extrema),
+        "shape": list(data.shape) if data is not None else None,
+        "dtype": "<f8",
+        "sha256": analyzer.content_hash() if data is not None else None,
+        "data_included": include_data and data is not None,
+        "compression": "zlib",
+        "derived": analyzer.derived_to_list(),
+    }
+    encoded = json.dumps(header).encode()
+    yield MAGIC + _U32.pack(len(encoded)) + encoded
+    yield analyzer.extrema.records.astype(_RECORD_DTYPE).tobytes()
+    if header["data_included"]:
+        rows_per_frame = max(1, frame_bytes // (8 * max(1, data.shape[1])))
+        for start in range(0, data.shape[0], rows_per_frame):
+            slab = np.ascontiguousarray(data[start:start + rows_per_frame], dtype='<f8')
+            frame = zlib.compress(memoryview(slab).cast('B'), COMPRESSION_LEVEL)
+            yield _U32.pack(len(frame)) + frame
+    yield _U32.pack(0)
+
+
+class SavepointReader:
+    """Incremental parser for the binary savepoint format.
+
+    The data block is allocated from the header shape, so a shape whose size
+    exceeds `max_data_bytes` is rejected before anything is allocated, and
+    frames are never inflated past the bytes the shape still expects.
+    """
+
+    def __init__(self, max_data_bytes: int = MAX_DATA_BYTES):
+        self.max_data_bytes = max_data_bytes
+        self.bytes_read = 0
+        self.header: Optional[dict] = None
+        self._buffer = bytearray()
+        self._extrema: Optional[ExtremaIndex] = None
+        self._data: Optional[np.ndarray] = None
+        self._flat: Optional[np.ndarray] = None
+        self._filled = 0
+        self._digest = None
+        self._done = False
+
+    def feed(self, chunk: bytes) -> None:
+        self.bytes_read += len(chunk)
+        self._buffer += chunk
+        while not self._done and self._step():
+            pass
+
+    def _take(self, n: int) -> Optional[bytes]:
+        if len(self._buffer) < n:
+            return None
+        taken = bytes(self._buffer[:n])
+        del self._buffer[:n]
+        return taken
+
+    def _step(self) -> bool:
+        """Consume one section from the buffer; False if more bytes are needed."""
+        if self.header is None:
+            if len(self._buffer) < len(MAGIC) + 4:
+                return False
+            if bytes(self._buffer[:len(MAGIC)]) != MAGIC:
+                raise ValueError("Not a savepoint file")
+            (length,) = _U32.unpack_from(self._buffer, len(MAGIC))
+            if len(self._buffer) < len(MAGIC) + 4 + length:
+                return False
+            self._take(len(MAGIC) + 4)
+            self.header = json.loads(self._take(length))
+            if self.header.get("version") != FORMAT_VERSION:
+                raise ValueError(f"Unsupported savepoint version: {self.header.get('version')}")
+            count = self.header.get("extrema")
+            if not isinstance(count, int) or count < 0:
+                raise ValueError(f"Invalid savepoint extrema count: {count}")
+            if self.header["data_included"]:
+                self._data = np.empty(self._checked_shape(), dtype='<f8')
+                self._flat = self._data.reshape(-1)
+                self._digest = hashlib.sha256(repr(self._data.shape).encode())
+            return True
+        if self._extrema is None:
+            raw = self._take(self.header["extrema"] * _RECORD_DTYPE.itemsize)
+            if raw is None:
+                return False
+            records = np.frombuffer(raw, dtype=_RECORD_DTYPE).astype(EXTREMUM_DTYPE)
+            self._extrema = ExtremaIndex(records[np.argsort(records['index'], kind='stable')])
+            return True
+        if len(self._buffer) < 4:
+            return False
+        (length,) = _U32.unpack_from(self._buffer, 0)
+        if length == 0:
+            self._take(4)
+            self._done = True
+            return False
+        if len(self._buffer) < 4 + length:
+            return False
+        self._take(4)
+        if self._flat is None:
+            raise ValueError("Savepoint has data frames but no data shape")
+        remaining = (len(self._flat) - self._filled) * self._flat.itemsize
+        if remaining == 0:
+            raise ValueError("Savepoint data exceeds its declared shape")
+        inflater = zlib.decompressobj()
+        frame = inflater.decompress(self._take(length), remaining)
+        if inflater.unconsumed_tail or not inflater.eof:
+            raise ValueError("Savepoint data exceeds its declared shape")
+        if len(frame) % self._flat.itemsize:
+            raise ValueError("Savepoint data frame is not whole values")
+        self._digest.update(frame)
+        values = np.frombuffer(frame, dtype='<f8')
+        self._flat[self._filled:self._filled + len(values)] = values
+        self._filled += len(values)
+        return True
+
+    def _checked_shape(self) -> tuple:
+        shape = self.header.get("shape")
+        if (not isinstance(shape, list) or len(shape) != 2
+                or not all(isinstance(n, int) and not isinstance(n, bool) and n >= 0 for n in shape)):
+            raise ValueError(f"Invalid savepoint data shape: {shape}")
+        if shape[0] * shape[1] * np.dtype('<f8').itemsize > self.max_data_bytes:
+            raise ValueError(f"Savepoint data shape {shape} exceeds {self.max_data_bytes} bytes")
+        return tuple(shape)
+
+    def finish(self) -> Savepoint:
+        if not self._done:
+            raise ValueError("Truncated savepoint")
+        header = self.header
+        if self._data is not None:
+            if self._filled != self._data.size:
+                raise ValueError("Savepoint data is incomplete")
+            if self._digest.hexdigest() != header["sha256"]:
+                raise ValueError("Savepoint content hash mismatch")
+        return Savepoint(
+            frequency=header["frequency"],
+            extrema=self._extrema,
+            data=self._data,
+            data_hash=header.get("sha256"),
+            shape=tuple(header["shape"]) if header.get("shape") else None,
+            derived=header.get("derived", []),
+        )
+
+
+def read_savepoint(chunks) -> Savepoint:
+    reader = SavepointReader()
+    for chunk in chunks:
+        reader.feed(chunk)
+    return reader.finish()
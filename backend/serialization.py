@@ -0,0 +1,95 @@
+"""
+Numpy-aware JSON responses.
+
+Endpoints return ``NumpyJSONResponse`` with numpy arrays and scalars left in
+the payload. With orjson installed, C-contiguous numeric arrays are written
+straight from their buffers; other arrays are cast to a supported contiguous
+dtype first. Structured arrays become one array per field (the columnar
+shape). Without orjson the same payloads go through the standard library
+encoder. NaN and infinities become null either way.
+
+Returning the response object directly also skips FastAPI's
+``jsonable_encoder`` pass over the payload.
+"""
+import json
+import math
+from typing import Any
+
+import numpy as np
+from fastapi.responses import JSONResponse
+
+try:
+    from backend.metrics import stage
+except ImportError:
+    from metrics import stage
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_ORJSON_OPTIONS = (orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS) if orjson else 0
+_CASTS = {"f": np.float64, "i": np.int64, "u": np.uint64, "b": np.bool_}
+
+
+def columns(records: np.ndarray) -> dict:
+    """One array per field of a structured array."""
+    return {name: records[name] for name in records.dtype.names}
+
+
+def _orjson_default(obj: Any):
+    # Only reached for arrays orjson cannot write directly: strided views,
+    # structured records and dtypes outside its native set
+    if isinstance(obj, np.ndarray):
+        if obj.dtype.names:
+            return columns(obj)
+        cast = _CASTS.get(obj.dtype.kind)
+        if cast is not None:
+            return np.ascontiguousarray(obj, dtype=cast)
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def _finite(value):
+    return value if not isinstance(value, float) or math.isfinite(value) else None
+
+
+def _clean(content: Any) -> Any:
+    """Plain floats (e.g. from ``tolist()``) made finite, as orjson writes NaN and infinities as null."""
+    if isinstance(content, float):
+        return _finite(content)
+    if isinstance(content, dict):
+        return {key: _clean(value) for key, value in content.items()}
+    if isinstance(content, (list, tuple)):
+        return [_clean(value) for value in content]
+    return content
+
+
+def _json_default(obj: Any):
+    if isinstance(obj, np.ndarray):
+        if obj.dtype.names:
+            return columns(obj)
+        if obj.dtype.kind == "f" and not np.isfinite(obj).all():
+            return np.where(np.isfinite(obj), obj, None).tolist()
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return _finite(obj.item())
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=_orjson_default, option=_ORJSON_OPTIONS)
+    return json.dumps(
+        _clean(content), default=_json_default, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+class NumpyJSONResponse(JSONResponse):
+    """JSON response that serializes numpy data directly, timed as the "render" stage."""
+
+    def render(self, content: Any) -> bytes:
+        with stage("render"):
+            return dumps(content)
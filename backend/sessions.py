@@ -0,0 +1,227 @@
+"""
+Memory-budgeted session store.
+
+Sessions are kept in least-recently-used order. When the RAM held by all
+sessions exceeds the byte budget, the raw data of the least recently used
+sessions is written to ``.npy`` files and swapped for read-only memory maps,
+so their pages are only read back from disk when the session is used again.
+Sessions idle for longer than the TTL are dropped together with their files.
+"""
+import os
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, Iterator, Optional
+
+import numpy as np
+
+try:
+    from backend.analyzer import GraphAnalyzer
+except ImportError:
+    from analyzer import GraphAnalyzer
+
+SESSION_BUDGET_BYTES = int(os.environ.get("GRAPH_ANALYZER_SESSION_BUDGET_BYTES", 1024 ** 3))
+SESSION_TTL_SECONDS = float(os.environ.get("GRAPH_ANALYZER_SESSION_TTL", 6 * 3600))
+SESSION_SPILL_DIR = os.environ.get("GRAPH_ANALYZER_SESSION_SPILL_DIR")
+
+
+class _Entry:
+    __slots__ = ("analyzer", "last_access", "spill_path")
+
+    def __init__(self, analyzer: GraphAnalyzer, now: float):
+        self.analyzer = analyzer
+        self.last_access = now
+        self.spill_path: Optional[str] = None
+
+
+class SessionStore:
+    """Dict-like mapping of session id to GraphAnalyzer with LRU spilling.
+
+    Indexing counts as an access and moves the session to the most recently
+    used end; ``in`` does not, but a failed ``in`` check counts as a miss.
+    """
+
+    def __init__(self, budget_bytes: int = SESSION_BUDGET_BYTES, max_sessions: Optional[int] = None,
+                 ttl_seconds: Optional[float] = SESSION_TTL_SECONDS, spill_dir: Optional[str] = SESSION_SPILL_DIR,
+                 clock=time.monotonic):
+        self.budget_bytes = budget_bytes
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.spill_dir = spill_dir
+        self._clock = clock
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.spill_hits = 0
+        self.misses = 0
+        self.spills = 0
+        self.expired = 0
+        self.evicted = 0
+
+    def create(self, analyzer: GraphAnalyzer) -> str:
+        session_id = str(uuid.uuid4())
+        self[session_id] = analyzer
+        return session_id
+
+    def __setitem__(self, session_id: str, analyzer: GraphAnalyzer) -> None:
+        with self._lock:
+            self._expire()
+            if session_id in self._entries:
+                self._drop(session_id)
+            self._entries[session_id] = _Entry(analyzer, self._clock())
+            if self.max_sessions is not None:
+                while len(self._entries) > self.max_sessions:
+                    self._drop(next(iter(self._entries)))
+                    self.evicted += 1
+            self._enforce_budget()
+
+    def __getitem__(self, session_id: str) -> GraphAnalyzer:
+        with self._lock:
+            self._expire()
+            entry = self._entries.get(session_id)
+            if entry is None:
+                self.misses += 1
+                raise KeyError(session_id)
+            if entry.spill_path is not None:
+                self.spill_hits += 1
+            else:
+                self.hits += 1
+            entry.last_access = self._clock()
+            self._entries.move_to_end(session_id)
+            # Data loaded since the spill (upload into the same session) is resident again
+            if entry.spill_path is not None and not isinstance(entry.analyzer.raw_data, np.memmap):
+                self._remove_file(entry)
+            self._enforce_budget()
+            return entry.analyzer
+
+    def __contains__(self, session_id: object) -> bool:
+        with self._lock:
+            self._expire()
+            if session_id in self._entries:
+                return True
+            self.misses += 1
+            return False
+
+    def __delitem__(self, session_id: str) -> None:
+        with self._lock:
+            if session_id not in self._entries:
+                raise KeyError(session_id)
+            self._drop(session_id)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._entries))
+
+    def find_data(self, content_hash: str) -> Optional[np.ndarray]:
+        """raw_data of any session whose already computed content hash matches (not an access)."""
+        with self._lock:
+            for entry in self._entries.values():
+                if entry.analyzer.cached_content_hash == content_hash:
+                    return entry.analyzer.raw_data
+            return None
+
+    def clear(self) -> None:
+        with self._lock:
+            for session_id in list(self._entries):
+                self._drop(session_id)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            self._expire()
+            resident = self._resident_total()
+            spilled = spilled_sessions = 0
+            for entry in self._entries.values():
+                data = entry.analyzer.raw_data
+                if isinstance(data, np.memmap):
+                    spilled_sessions += 1
+                    spilled += data.nbytes
+            lookups = self.hits + self.spill_hits + self.misses
+            return {
+                "sessions": len(self._entries),
+                "spilled_sessions": spilled_sessions,
+                "resident_bytes": resident,
+                "spilled_bytes": spilled,
+                "budget_bytes": self.budget_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "spill_hits": self.spill_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.spill_hits) / lookups if lookups else None,
+                "spills": self.spills,
+                "expired": self.expired,
+                "evicted": self.evicted,
+            }
+
+    def _expire(self) -> None:
+        if self.ttl_seconds is None:
+            return
+        cutoff = self._clock() - self.ttl_seconds
+        # Entries are in access order, so expired ones are at the front
+        while self._entries:
+            session_id, entry = next(iter(self._entries.items()))
+            if entry.last_access > cutoff:
+                break
+            self._drop(session_id)
+            self.expired += 1
+
+    def _resident_total(self) -> int:
+        # Sessions loaded from the same cached dataset share one array: count it once
+        total = 0
+        seen = set()
+        for entry in self._entries.values():
+            total += entry.analyzer.resident_nbytes
+            data = entry.analyzer.raw_data
+            if data is not None and not isinstance(data, np.memmap):
+                if id(data) in seen:
+                    total -= data.nbytes
+                seen.add(id(data))
+        return total
+
+    def _enforce_budget(self) -> None:
+        total = self._resident_total()
+        # The most recently used session stays resident even if it alone exceeds the budget
+        for session_id in list(self._entries)[:-1]:
+            if total <= self.budget_bytes:
+                break
+            entry = self._entries[session_id]
+            if entry.analyzer.resident_nbytes == 0:
+                continue
+            self._spill(entry)
+            total = self._resident_total()
+
+    def _spill(self, entry: _Entry) -> None:
+        analyzer = entry.analyzer
+        data = analyzer.raw_data
+        if data is None or isinstance(data, np.memmap):
+            # Nothing to write (already file-backed); just release the LOD pyramid
+            if data is not None:
+                analyzer.swap_storage(data)
+            return
+        self._remove_file(entry)
+        fd, path = tempfile.mkstemp(suffix=".npy", prefix="session-", dir=self.spill_dir)
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, np.ascontiguousarray(data))
+        mapped = np.load(path, mmap_mode="r")
+        # A shared array is only freed once every session using it has let go
+        for other in self._entries.values():
+            if other.analyzer.raw_data is data:
+                other.analyzer.swap_storage(mapped)
+        entry.spill_path = path
+        self.spills += 1
+
+    def _drop(self, session_id: str) -> None:
+        self._remove_file(self._entries.pop(session_id))
+
+    @staticmethod
+    def _remove_file(entry: _Entry) -> None:
+        if entry.spill_path is not None:
+            # Open maps (requests still holding the analyzer) stay valid after unlink
+            try:
+                os.unlink(entry.spill_path)
+            except FileNotFoundError:
+                pass
+            entry.spill_path = None
@@ -0,0 +1,168 @@
+"""
+Live ingestion: samples appended to a session as they arrive.
+
+OnlineExtremaDetector applies ``detect_extrema(signal, min_distance)`` (the
+batch detector behind find_extrema) to an unbounded stream. It keeps only a
+bounded tail of the signal: each feed runs it over ``lookback`` samples of context
+plus the samples not yet final, so the cost per sample does not grow with
+the stream; a flat run at the end is held as its value and length until it
+ends, so a long plateau costs nothing per feed. A peak is final once ``horizon`` samples have followed it; the
+defaults (4 and 8 * min_distance) let suppression by neighbours on both
+sides settle as in a batch pass. Only suppression chains longer than that (a
+run of ever higher peaks, each under min_distance from the last) can make
+the result differ, and published extrema of one type are always at least
+min_distance apart.
+
+LiveStream ties a detector to a GraphAnalyzer: rows are appended to
+raw_data, final extrema of the reference column are appended to the
+session's extrema, and pattern events are reported as soon as the extremum
+that completes them is final.
+"""
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    from backend.analyzer import GraphAnalyzer, detect_extrema, detect_pattern_events, event_table_to_dicts
+except ImportError:
+    from analyzer import GraphAnalyzer, detect_extrema, detect_pattern_events, event_table_to_dicts
+
+
+class OnlineExtremaDetector:
+    def __init__(self, min_distance: int = 10, horizon: Optional[int] = None, lookback: Optional[int] = None):
+        self.min_distance = max(1, int(min_distance))
+        self.horizon = 4 * self.min_distance if horizon is None else max(self.min_distance, int(horizon))
+        self.lookback = 2 * self.horizon if lookback is None else max(self.min_distance, int(lookback))
+        self._tail = np.zeros(0)
+        self._offset = 0  # stream index of _tail[0]
+        # The flat run at the end of the stream follows _tail; only its value and length are kept
+        self._run_value = 0.0
+        self._run_length = 0
+        self._final = 0  # extrema before this stream index have been emitted
+        self._last = np.full(2, -self.min_distance, dtype=np.int64)  # last emitted min / max
+
+    @property
+    def samples(self) -> int:
+        return self._offset + len(self._tail) + self._run_length
+
+    def feed(self, samples: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Add samples; returns (indices, values, types) of extrema that became final."""
+        samples = np.asarray(samples, dtype=np.float64)
+        if len(samples):
+            # A flat run at the end may still turn into a plateau peak, so the
+            # samples after its start are not settled; extending it is O(1)
+            changes = np.flatnonzero(samples != samples[-1])
+            start = changes[-1] + 1 if len(changes) else 0
+            if start == 0 and self._run_length and samples[-1] == self._run_value:
+                self._run_length += len(samples)
+            else:
+                self._tail = np.concatenate([self._tail, np.full(self._run_length, self._run_value),
+                                             samples[:start]])
+                self._run_value = samples[-1]
+                self._run_length = len(samples) - start
+        return self._emit(self._offset + len(self._tail) - self.horizon)
+
+    def flush(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Emit the remaining extrema at the end of the stream."""
+        return self._emit(self.samples)
+
+    def _emit(self, final: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        if final <= self._final:
+            return np.zeros(0, dtype=np.int64), np.zeros(0), np.zeros(0, dtype=np.int8)
+        # The first sample of the trailing run decides whether the last settled
+        # sample is a peak; the rest of the run cannot hold one until it ends
+        tail = np.append(self._tail, self._run_value) if self._run_length else self._tail
+        indices, _, types = detect_extrema(tail, self.min_distance)
+        stream = indices + self._offset
+        keep = (stream >= self._final) & (stream < final)
+        # Published extrema are never revised: a candidate too close to the
+        # last one of its type was suppressed by it (or by what suppressed it)
+        keep &= stream - self._last[types] >= self.min_distance
+        indices, types = indices[keep], types[keep]
+        for t in (0, 1):
+            if np.any(types == t):
+                self._last[t] = indices[types == t][-1] + self._offset
+        # Keep `lookback` samples of context before the new boundary for the next pass
+        self._final = final
+        cut = min(len(self._tail), max(0, final - self.lookback - self._offset))
+        values = tail[indices]
+        self._tail = self._tail[cut:]
+        self._offset += cut
+        return indices + (self._offset - cut), values, types
+
+
+class LiveStream:
+    """Appends rows to an analyzer and reports extrema/events of one column as they become final."""
+
+    def __init__(self, analyzer: GraphAnalyzer, column: int = 0, min_distance: int = 10,
+                 pattern: Optional[Sequence[int]] = None, horizon: Optional[int] = None):
+        if pattern is not None and len(pattern) < 2:
+            raise ValueError("Pattern must have at least 2 elements")
+        self.analyzer = analyzer
+        self.column = column
+        self.pattern = tuple(pattern) if pattern is not None else None
+        self.detector = OnlineExtremaDetector(min_distance, horizon)
+        self.closed = False
+        # The session's extrema are now produced by the stream
+        analyzer.current_column = column
+        analyzer.extrema = []
+        self._catch_up = analyzer.raw_data
+
+    def append(self, rows: np.ndarray) -> dict:
+        """Append rows (samples x columns); returns the extrema and events that became final."""
+        if self.closed:
+            raise ValueError("Stream is closed")
+        rows = np.asarray(rows, dtype=np.float64)
+        if rows.ndim == 1:
+            rows = rows[None, :]
+        if not 0 <= self.column < rows.shape[1]:
+            raise IndexError("Column index out of range")
+        signal = rows[:, self.column]
+        if self._catch_up is not None:
+            # Data loaded before the stream started is scanned once
+            signal = np.concatenate([self._catch_up[:, self.column], signal])
+        self.analyzer.append_samples(rows)
+        self._catch_up = None
+        return self._publish(*self.detector.feed(signal))
+
+    def close(self) -> dict:
+        """End of stream: emit the extrema still inside the look-ahead horizon."""
+        updates = []
+        if self._catch_up is not None:
+            # Nothing was appended, so the loaded data has not been scanned yet
+            if not 0 <= self.column < self._catch_up.shape[1]:
+                raise IndexError("Column index out of range")
+            updates.append(self._publish(*self.detector.feed(self._catch_up[:, self.column])))
+            self._catch_up = None
+        updates.append(self._publish(*self.detector.flush()))
+        self.closed = True
+        return merge_updates(updates)
+
+    def _publish(self, indices: np.ndarray, values: np.ndarray, types: np.ndarray) -> dict:
+        analyzer = self.analyzer
+        before = len(analyzer.extrema)
+        events = []
+        if len(indices):
+            analyzer.append_extrema(indices, values, types)
+            if self.pattern is not None:
+                # Only windows ending in the new extrema can hold new events
+                ext = analyzer.extrema
+                first = max(0, before - len(self.pattern) + 1)
+                table = detect_pattern_events(ext.indices[first:], ext.values[first:], ext.types[first:],
+                                              self.pattern, analyzer.time_per_frame, presorted=True)
+                events = event_table_to_dicts(table)
+        return {
+            "samples": analyzer.raw_data.shape[0] if analyzer.raw_data is not None else 0,
+            "extrema": [{"index": int(i), "value": float(v), "type": int(t)}
+                        for i, v, t in zip(indices, values, types)],
+            "events": events,
+        }
+
+
+def merge_updates(updates: List[dict]) -> dict:
+    """Combine consecutive append results into one (e.g. for a body fed in chunks)."""
+    return {
+        "samples": updates[-1]["samples"] if updates else 0,
+        "extrema": [e for update in updates for e in update["extrema"]],
+        "events": [e for update in updates for e in update["events"]],
+    }
@@ -4,9 +4,14 @@ Tests for Graph Analyzer - using real sample data TEST_TCA3_2016_terr-0 (1).csv
 import pytest
 import numpy as np
 import pandas as pd
+from scipy.signal import find_peaks
 from pathlib import Path
 
-from analyzer import GraphAnalyzer, Extremum
+from analyzer import (
+    DerivedColumn, GraphAnalyzer, Extremum, ExtremaIndex, compute_pattern_events, detect_extrema, detect_pattern_events,
+    ensemble_statistics, resample_segments, resample_segment_tensor
+)
+from analyzer import _select_by_distance
 
 
 TEST_DATA_PATH = Path(__file__).parent / "test_data.csv"
@@ -41,10 +46,12 @@ class TestDataLoading:
 
 
 class TestExtremaDetection:
-    def test_find_extrema_returns_list(self, analyzer):
+    def test_find_extrema_returns_index(self, analyzer):
         extrema = analyzer.find_extrema(column=0, min_distance=10)
-        assert isinstance(extrema, list)
+        assert extrema is analyzer.extrema
         assert len(extrema) > 0
+        assert isinstance(extrema[0], Extremum)
+        assert list(extrema) == extrema.to_list()
 
     def test_find_extrema_types(self, analyzer):
         extrema = analyzer.find_extrema(column=0, min_distance=10)
@@ -73,6 +80,77 @@ class TestExtremaDetection:
             assert ext.value == expected_value
 
 
+def two_pass_extrema(signal, min_distance):
+    maxima, _ = find_peaks(signal, distance=min_distance)
+    minima, _ = find_peaks(-signal, distance=min_distance)
+    indices = np.concatenate([maxima, minima])
+    types = np.concatenate([np.ones(len(maxima)), np.zeros(len(minima))])
+    order = np.argsort(indices)
+    return indices[order], types[order]
+
+
+class TestDetectExtrema:
+    @pytest.fixture(params=["noise", "random_walk", "quantized", "gait"])
+    def signal(self, request):
+        rng = np.random.default_rng(7)
+        t = np.arange(20000) / 100
+        return {
+            "noise": rng.standard_normal(20000),
+            "random_walk": np.cumsum(rng.standard_normal(20000)),
+            # Plateaus and equal-valued peaks exercise the midpoint and tie rules
+            "quantized": np.round(2 * rng.standard_normal(20000)),
+            "gait": np.sin(2 * np.pi * t) + 0.02 * rng.standard_normal(20000),
+        }[request.param]
+
+    @pytest.mark.parametrize("min_distance", [1, 2, 10, 45])
+    def test_matches_two_find_peaks_passes(self, signal, min_distance):
+        indices, values, types = detect_extrema(signal, min_distance)
+        expected_indices, expected_types = two_pass_extrema(signal, min_distance)
+        np.testing.assert_array_equal(indices, expected_indices)
+        np.testing.assert_array_equal(types, expected_types)
+        np.testing.assert_array_equal(values, signal[indices])
+
+    @pytest.mark.parametrize("min_distance", [2, 10, 45])
+    def test_numpy_distance_rule_matches_scipy(self, signal, min_distance):
+        maxima, _ = find_peaks(signal)
+        kept, _ = find_peaks(signal, distance=min_distance)
+        mask = _select_by_distance(maxima, signal[maxima], min_distance)
+        np.testing.assert_array_equal(maxima[mask], kept)
+
+    def test_plateaus_and_edges(self):
+        signal = np.array([3, 3, 1, 2, 2, 2, 0, 0, 5, 5])
+        indices, values, types = detect_extrema(signal)
+        assert indices.tolist() == [2, 4, 6]
+        assert types.tolist() == [0, 1, 0]
+        assert values.tolist() == [1, 2, 0]
+
+    def test_alternation(self, signal):
+        indices, values, types = detect_extrema(signal, 10, alternate=True)
+        assert np.all(types[1:] != types[:-1])
+        # Each kept extremum is the most extreme of the same-type run it replaced
+        all_indices, all_values, all_types = detect_extrema(signal, 10)
+        assert set(indices.tolist()) <= set(all_indices.tolist())
+        for i in range(1, len(indices)):
+            between = (all_indices > indices[i - 1]) & (all_indices < indices[i]) & (all_types == types[i])
+            if types[i] == 1:
+                assert np.all(all_values[between] <= values[i])
+            else:
+                assert np.all(all_values[between] >= values[i])
+
+    def test_short_and_flat_signals(self):
+        for signal in (np.zeros(0), np.ones(2), np.ones(50)):
+            indices, values, types = detect_extrema(signal, 5)
+            assert len(indices) == len(values) == len(types) == 0
+
+    def test_invalid_distance(self):
+        with pytest.raises(ValueError):
+            detect_extrema(np.zeros(10), 0)
+
+    def test_find_extrema_alternate(self, analyzer):
+        analyzer.find_extrema(column=0, min_distance=10, alternate=True)
+        assert np.all(np.diff(analyzer.extrema.types.astype(int)) != 0)
+
+
 class TestExtremaManipulation:
     def test_add_extremum_max(self, analyzer):
         analyzer.find_extrema(column=0, min_distance=10)
@@ -102,6 +180,71 @@ class TestExtremaManipulation:
         assert result is False
 
 
+class TestExtremaIndex:
+    @pytest.fixture
+    def index(self):
+        return ExtremaIndex.from_arrays([30, 10, 20], [3.0, 1.0, 2.0], [1, 0, 1])
+
+    def test_sorted_on_build(self, index):
+        assert [e.index for e in index] == [10, 20, 30]
+        assert index[0] == Extremum(value=1.0, index=10, extremum_type=0)
+
+    def test_insert_keeps_order_and_rejects_duplicates(self, index):
+        assert index.insert(5.0, 25, 0) == 2
+        assert index.insert(9.0, 25, 1) is None
+        assert list(index.indices) == [10, 20, 25, 30]
+
+    def test_insert_grows_buffer(self):
+        index = ExtremaIndex()
+        for i in range(100, 0, -1):
+            index.insert(float(i), i, i % 2)
+        assert list(index.indices) == list(range(1, 101))
+
+    def test_remove_and_lookup(self, index):
+        assert index.find_first_within(19, 3) == 1
+        assert index.find_first_within(15, 3) is None
+        assert index.remove_at(1).index == 20
+        assert list(index.indices) == [10, 30]
+
+    def test_nearest(self, index):
+        assert index.nearest(0) == 0
+        assert index.nearest(16) == 1
+        assert index.nearest(15) == 0
+        assert index.nearest(99) == 2
+        assert ExtremaIndex().nearest(5) is None
+
+
+class TestIncrementalEvents:
+    def test_edits_match_full_recompute(self, analyzer):
+        analyzer.find_extrema(column=0, min_distance=10)
+        for pattern in [(0, 1, 0), (1, 0, 1, 0)]:
+            analyzer.find_pattern_event_table(pattern)
+        edits = [('add', 300, 'max'), ('remove', None, None), ('add', 900, 'min'), ('add', 640, 'max')]
+        for kind, index, ext_type in edits:
+            if kind == 'add':
+                analyzer.add_extremum(index, epsilon=5, extremum_type=ext_type)
+            else:
+                analyzer.remove_extremum(analyzer.extrema[len(analyzer.extrema) // 2].index, tolerance=1)
+            for pattern in [(0, 1, 0), (1, 0, 1, 0)]:
+                cached = analyzer.find_pattern_event_table(pattern)
+                ext = analyzer.extrema
+                full = detect_pattern_events(ext.indices, ext.values, ext.types, pattern, analyzer.time_per_frame)
+                np.testing.assert_array_equal(cached['start_pos'], full['start_pos'])
+                np.testing.assert_array_equal(cached['indices'], full['indices'])
+                np.testing.assert_array_equal(cached['intercycle_time'], full['intercycle_time'])
+
+    def test_restore_invalidates_tables(self, analyzer):
+        analyzer.find_extrema(column=0, min_distance=10)
+        before = analyzer.find_pattern_event_table((0, 1, 0))
+        analyzer.extrema = analyzer.extrema[:3]
+        assert analyzer.find_pattern_event_table((0, 1, 0)) is not before
+
+    def test_nearest_extremum(self, analyzer):
+        analyzer.find_extrema(column=0, min_distance=10)
+        target = analyzer.extrema[5]
+        assert analyzer.nearest_extremum(target.index + 1) == target
+
+
 class TestPatternDetection:
     def test_find_pattern_low_high_low(self, analyzer):
         analyzer.find_extrema(column=0, min_distance=10)
@@ -134,6 +277,39 @@ class TestPatternDetection:
         for event in events:
             assert event['cycle_time'] > 0
 
+    def test_event_table_matches_dicts(self, analyzer):
+        analyzer.find_extrema(column=0, min_distance=10)
+        events = analyzer.find_pattern_events((0, 1, 0))
+        table = analyzer.find_pattern_event_table((0, 1, 0))
+        assert len(table['start_index']) == len(events)
+        assert table['indices'].shape == (len(events), 3)
+        for i, event in enumerate(events):
+            assert event['start_index'] == table['start_index'][i]
+            assert event['inflexion_index'] == table['indices'][i, 1]
+            assert event['cycle_time'] == table['cycle_time'][i]
+
+    def test_multi_phase_pattern(self):
+        types = [0, 1, 0, 1, 0, 1, 0]
+        extrema = [Extremum(value=float(t), index=10 * i, extremum_type=t) for i, t in enumerate(types)]
+        events = compute_pattern_events(extrema, (0, 1, 0, 1, 0), 0.01)
+        assert [e['start_index'] for e in events] == [0, 20]
+        assert events[0]['pattern_type'] == 'LHLHL'
+        assert events[0]['indices'] == [0, 10, 20, 30, 40]
+        assert events[0]['phase_shifts'] == [1.0, 1.0, 1.0, 1.0]
+        assert events[0]['cycle_time'] == pytest.approx(0.4)
+
+    def test_intercycle_time(self):
+        types = [0, 1, 0, 0, 1, 0]
+        extrema = [Extremum(value=0.0, index=i * 10, extremum_type=t) for i, t in enumerate(types)]
+        events = compute_pattern_events(extrema, (0, 1, 0), 0.01)
+        assert len(events) == 2
+        assert events[0]['intercycle_time'] == pytest.approx(0.1)
+        assert events[1]['intercycle_time'] is None
+
+    def test_pattern_too_short(self, analyzer):
+        with pytest.raises(ValueError):
+            analyzer.find_pattern_event_table((0,))
+
 
 class TestCalculations:
     def test_normalize_data(self, analyzer):
@@ -158,6 +334,32 @@ class TestCalculations:
         angles = analyzer.calculate_angle_4points([0], [2], [2], [4])
         assert len(angles) == analyzer.raw_data.shape[0]
 
+    def test_calculate_angles_batch_matches_single(self, analyzer):
+        definitions = [
+            ([0, 1], [2, 3], [4, 1]),
+            ([0, 1, 2], [1, 2, 3], [2, 3, 4]),
+            ([0, 1], [2, 3], [2, 3], [4, 0]),
+            ([0], [2], [4]),
+        ]
+        batch = analyzer.calculate_angles(definitions)
+        assert batch.shape == (4, analyzer.raw_data.shape[0])
+        np.testing.assert_allclose(batch[0], analyzer.calculate_angle_3points(*definitions[0]))
+        np.testing.assert_allclose(batch[1], analyzer.calculate_angle_3points(*definitions[1]))
+        np.testing.assert_allclose(batch[2], analyzer.calculate_angle_4points(*definitions[2]))
+        np.testing.assert_allclose(batch[3], analyzer.calculate_angle_3points(*definitions[3]))
+
+    def test_calculate_angles_known_values(self):
+        ga = GraphAnalyzer()
+        ga.load_csv(np.array([[1.0, 0.0, 0.0, 0.0, 0.0, 1.0]]))
+        angles = ga.calculate_angles([([0, 1], [2, 3], [4, 5])])
+        assert angles[0, 0] == pytest.approx(90.0)
+
+    def test_calculate_angles_invalid_definition(self, analyzer):
+        with pytest.raises(ValueError):
+            analyzer.calculate_angles([([0], [1])])
+        with pytest.raises(ValueError):
+            analyzer.calculate_angles([([0, 1], [2], [3, 4])])
+
 
 class TestMeanTrend:
     def test_mean_trend_calculation(self, analyzer):
@@ -179,6 +381,289 @@ class TestMeanTrend:
             assert len(std_trend) == target
 
 
+class TestSegmentResampling:
+    def test_linear_matches_np_interp(self):
+        signal = np.random.default_rng(0).standard_normal(500)
+        starts, ends = np.array([10, 100, 250, 400]), np.array([40, 160, 251, 400])
+        matrix = resample_segments(signal, starts, ends, 37)
+        for row, s, e in zip(matrix, starts, ends):
+            seg = signal[s:e + 1]
+            expected = np.interp(np.linspace(0, 1, 37), np.linspace(0, 1, len(seg)), seg)
+            np.testing.assert_allclose(row, expected, atol=1e-12)
+
+    def test_spline_differs_from_linear(self, analyzer):
+        analyzer.find_extrema(column=0, min_distance=10)
+        linear = analyzer.get_segment_matrix((0, 1, 0), 0, 60, interpolation_method='linear')
+        spline = analyzer.get_segment_matrix((0, 1, 0), 0, 60, interpolation_method='spline')
+        assert linear.matrix.shape == spline.matrix.shape
+        assert not np.allclose(linear.matrix, spline.matrix)
+
+    def test_segment_matrix_cached(self, analyzer):
+        analyzer.find_extrema(column=0, min_distance=10)
+        first = analyzer.get_segment_matrix((0, 1, 0), 0, 50)
+        assert analyzer.get_segment_matrix((0, 1, 0), 0, 50) is first
+        assert analyzer.get_segment_matrix((0, 1, 0), 0, 51) is not first
+
+    def test_segment_cache_invalidated_by_edit(self, analyzer):
+        analyzer.find_extrema(column=0, min_distance=10)
+        first = analyzer.get_segment_matrix((0, 1, 0), 0, 50)
+        analyzer.remove_extremum(analyzer.extrema[2].index, tolerance=1)
+        assert analyzer.get_segment_matrix((0, 1, 0), 0, 50) is not first
+
+    def test_percentage_mode(self, analyzer):
+        analyzer.find_extrema(column=0, min_distance=10)
+        events = analyzer.find_pattern_events((0, 1, 0))
+        result = analyzer.calculate_mean_trend_extended(events, 0, length_mode='percentage')
+        assert result['target_length'] == 100
+        assert len(result['mean']) == 100
+        assert result['lengths'] == [e['end_index'] - e['start_index'] + 1 for e in events]
+
+    def test_no_events(self, analyzer):
+        with pytest.raises(ValueError):
+            analyzer.get_segment_matrix((0, 1, 0), 0)
+
+
+class TestMeanTrends:
+    @pytest.mark.parametrize("method", ["linear", "spline"])
+    def test_tensor_matches_per_column(self, method):
+        data = np.cumsum(np.random.default_rng(1).standard_normal((800, 4)), axis=0)
+        starts, ends = np.array([0, 50, 300, 600, 700]), np.array([49, 52, 420, 650, 799])
+        tensor = resample_segment_tensor(data, [3, 1], starts, ends, 40, method)
+        assert tensor.shape == (2, 5, 40)
+        for row, column in zip(tensor, [3, 1]):
+            np.testing.assert_allclose(row, resample_segments(data[:, column], starts, ends, 40, method))
+
+    def test_matches_segment_matrix(self, analyzer):
+        analyzer.find_extrema(column=0, min_distance=10)
+        result = analyzer.mean_trends((0, 1, 0), [2, 0], interpolation_method='spline', include_segments=True)
+        assert result['reference_column'] == 0
+        for i, column in enumerate([2, 0]):
+            segments = analyzer.get_segment_matrix((0, 1, 0), column, interpolation_method='spline')
+            np.testing.assert_allclose(result['mean'][i], segments.matrix.mean(axis=0))
+            np.testing.assert_allclose(result['std'][i], segments.matrix.std(axis=0))
+            np.testing.assert_allclose(result['normalized_segments'][i], segments.matrix)
+        assert result['event_count'] == len(segments.starts)
+        assert result['target_length'] == segments.target_length
+
+    def test_defaults_to_every_column(self, analyzer):
+        analyzer.find_extrema(column=0, min_distance=10)
+        result = analyzer.mean_trends((0, 1, 0), length_mode='percentage')
+        assert result['mean'].shape == (analyzer.raw_data.shape[1], 100)
+        assert 'normalized_segments' not in result
+
+    def test_invalid_column(self, analyzer):
+        analyzer.find_extrema(column=0, min_distance=10)
+        with pytest.raises(IndexError):
+            analyzer.mean_trends((0, 1, 0), [analyzer.raw_data.shape[1]])
+
+
+class TestEnsembleStatistics:
+    @pytest.fixture
+    def segments(self):
+        rng = np.random.default_rng(4)
+        t = np.linspace(0, 2 * np.pi, 50)
+        return np.sin(t) + rng.standard_normal((400, 1)) * 0.3 + rng.standard_normal((400, 50)) * 0.2
+
+    def test_order_statistics(self, segments):
+        stats = ensemble_statistics(segments, percentiles=[10, 50, 90], trim=0.1, resamples=10, seed=0)
+        np.testing.assert_allclose(stats['median'], np.median(segments, axis=0))
+        np.testing.assert_allclose(stats['percentiles'], np.percentile(segments, [10, 50, 90], axis=0))
+        ordered = np.sort(segments, axis=0)
+        np.testing.assert_allclose(stats['trimmed_mean'], ordered[40:360].mean(axis=0))
+        assert stats['ensemble']['percentile_levels'] == [10.0, 50.0, 90.0]
+
+    def test_bootstrap_band_of_the_mean(self, segments):
+        stats = ensemble_statistics(segments, resamples=2000, confidence=0.95, seed=11)
+        mean = segments.mean(axis=0)
+        half_width = 1.96 * segments.std(axis=0) / np.sqrt(len(segments))
+        assert np.all(stats['ci_lower'] < mean) and np.all(mean < stats['ci_upper'])
+        np.testing.assert_allclose(stats['ci_upper'] - stats['ci_lower'], 2 * half_width, rtol=0.15)
+        again = ensemble_statistics(segments, resamples=2000, confidence=0.95, seed=11)
+        np.testing.assert_array_equal(stats['ci_lower'], again['ci_lower'])
+
+    def test_columns_share_resamples(self, segments):
+        tensor = np.stack([segments, 2 * segments + 1])
+        stats = ensemble_statistics(tensor, resamples=200, seed=3)
+        assert stats['percentiles'].shape == (2, 4, 50)
+        single = ensemble_statistics(segments, resamples=200, seed=3)
+        for name in ('median', 'trimmed_mean', 'percentiles', 'ci_lower', 'ci_upper'):
+            np.testing.assert_allclose(stats[name][0], single[name])
+        np.testing.assert_allclose(stats['ci_upper'][1], 2 * single['ci_upper'] + 1)
+
+    def test_seed_is_reported(self, segments):
+        seed = ensemble_statistics(segments, resamples=50)['ensemble']['seed']
+        first = ensemble_statistics(segments, resamples=50, seed=seed)
+        assert first['ensemble']['seed'] == seed
+
+    @pytest.mark.parametrize("options", [
+        {"trim": 0.5}, {"resamples": 0}, {"confidence": 1.0}, {"percentiles": [101]},
+    ])
+    def test_invalid_options(self, segments, options):
+        with pytest.raises(ValueError):
+            ensemble_statistics(segments, **options)
+
+    def test_mean_trends_adds_statistics(self, analyzer):
+        analyzer.find_extrema(column=0, min_distance=10)
+        result = analyzer.mean_trends((0, 1, 0), [0, 2], target_length=60, ensemble={"resamples": 100, "seed": 1})
+        assert result['median'].shape == result['mean'].shape == (2, 60)
+        assert result['percentiles'].shape == (2, 4, 60)
+        assert np.all(result['ci_lower'] <= result['ci_upper'])
+        assert result['ensemble']['resamples'] == 100
+
+
+class TestAppending:
+    def test_append_samples_grows_in_place(self, sample_data):
+        analyzer = GraphAnalyzer()
+        for start in range(0, len(sample_data), 100):
+            assert analyzer.append_samples(sample_data[start:start + 100]) == start
+        np.testing.assert_array_equal(analyzer.raw_data, sample_data)
+        assert analyzer.raw_data.base is analyzer._append_buffer
+
+    def test_append_after_load_copies_once(self, analyzer):
+        loaded = analyzer.raw_data
+        version = analyzer.data_version
+        analyzer.append_samples(np.ones((5, loaded.shape[1])))
+        assert analyzer.raw_data.shape[0] == loaded.shape[0] + 5
+        np.testing.assert_array_equal(analyzer.raw_data[:len(loaded)], loaded)
+        assert analyzer.data_version > version
+
+    def test_append_extrema(self, analyzer):
+        analyzer.find_extrema(column=0, min_distance=10)
+        count, last = len(analyzer.extrema), analyzer.extrema[-1].index
+        analyzer.append_extrema([last + 5, last + 9], [1.0, 0.5], [1, 0])
+        assert len(analyzer.extrema) == count + 2
+        assert analyzer.extrema[-1].index == last + 9
+        with pytest.raises(ValueError):
+            analyzer.append_extrema([last], [0.0], [1])
+
+
+class TestDerivedColumns:
+    def test_ids_follow_raw_columns(self, analyzer):
+        raw_cols = analyzer.raw_data.shape[1]
+        first = analyzer.add_derived(DerivedColumn('distance', points=[[0, 1], [2, 3]]))
+        second = analyzer.add_derived(DerivedColumn('normalized', source=first))
+        assert (first, second) == (raw_cols, raw_cols + 1)
+        assert analyzer.has_column(second) and not analyzer.has_column(second + 1)
+
+    def test_values_match_direct_calculations(self, analyzer):
+        distance = analyzer.add_derived(DerivedColumn('distance', points=[[0, 1], [2, 3]]))
+        angle = analyzer.add_derived(DerivedColumn('angle', points=[[0, 1], [2, 3], [4, 0]]))
+        normalized = analyzer.add_derived(DerivedColumn('normalized', source=2))
+        np.testing.assert_allclose(analyzer.signal(distance), analyzer.calculate_distance([0, 1], [2, 3]))
+        np.testing.assert_allclose(analyzer.signal(angle), analyzer.calculate_angle_3points([0, 1], [2, 3], [4, 0]))
+        np.testing.assert_allclose(analyzer.signal(normalized), analyzer.normalize_data(2))
+
+    def test_computed_once_per_data_version(self, analyzer):
+        column = analyzer.add_derived(DerivedColumn('filtered', source=0, params={'cutoff': 5.0}))
+        first = analyzer.signal(column)
+        assert analyzer.signal(column) is first
+        assert not first.flags.writeable
+        analyzer.raw_data = analyzer.raw_data.copy()
+        second = analyzer.signal(column)
+        assert second is not first
+        # Filter coefficients depend on the sampling frequency
+        analyzer.frequency = 200.0
+        assert analyzer.signal(column) is not second
+
+    def test_add_extremum_on_derived_column(self, analyzer):
+        column = analyzer.add_derived(DerivedColumn('distance', points=[[0, 1], [2, 3]]))
+        analyzer.find_extrema(column, min_distance=10)
+        signal = analyzer.signal(column)
+        added = analyzer.add_extremum(index=800, epsilon=20, extremum_type='max')
+        assert added.index == 780 + int(np.argmax(signal[780:821]))
+        assert added.value == signal[added.index]
+        exact = analyzer.add_extremum(index=5, epsilon=0, extremum_type='min')
+        assert exact.value == signal[5]
+
+    def test_usable_as_analysis_column(self, analyzer):
+        column = analyzer.add_derived(DerivedColumn('filtered', source=0, params={'method': 'moving_average'}))
+        analyzer.find_extrema(column, min_distance=10)
+        assert analyzer.current_column == column
+        segments = analyzer.get_segment_matrix((0, 1, 0), column, 50)
+        trends = analyzer.mean_trends((0, 1, 0), [0, column], 50)
+        np.testing.assert_allclose(trends['mean'][1], segments.matrix.mean(axis=0))
+        indices, values, _ = analyzer.downsample_column(column, width=100)
+        np.testing.assert_array_equal(values, analyzer.signal(column)[indices])
+
+    def test_segments_follow_frequency_and_redefinition(self, analyzer):
+        column = analyzer.add_derived(DerivedColumn('filtered', source=0, params={'cutoff': 5.0}))
+        analyzer.find_extrema(0, min_distance=10)
+        first = analyzer.get_segment_matrix((0, 1, 0), column, 50)
+        analyzer.frequency = 200.0
+        refiltered = analyzer.get_segment_matrix((0, 1, 0), column, 50)
+        assert not np.allclose(refiltered.matrix, first.matrix)
+
+        analyzer.remove_derived(column)
+        assert analyzer.add_derived(DerivedColumn('normalized', source=1)) == column
+        redefined = analyzer.get_segment_matrix((0, 1, 0), column, 50)
+        np.testing.assert_allclose(redefined.matrix[0], analyzer.resample_events(
+            analyzer.find_pattern_events((0, 1, 0))[:1], column, 50).matrix[0])
+
+    def test_invalid_definitions(self, analyzer):
+        with pytest.raises(ValueError):
+            analyzer.add_derived(DerivedColumn('angle', points=[[0], [1]]))
+        with pytest.raises(IndexError):
+            analyzer.add_derived(DerivedColumn('distance', points=[[0], [99]]))
+        with pytest.raises(IndexError):
+            analyzer.add_derived(DerivedColumn('normalized', source=99))
+        with pytest.raises(ValueError):
+            analyzer.add_derived(DerivedColumn('filtered', source=0, params={'cutoff': 60.0}))
+
+    def test_remove_keeps_sources_of_others(self, analyzer):
+        source = analyzer.add_derived(DerivedColumn('normalized', source=0))
+        user = analyzer.add_derived(DerivedColumn('filtered', source=source))
+        with pytest.raises(ValueError):
+            analyzer.remove_derived(source)
+        analyzer.remove_derived(user)
+        analyzer.remove_derived(source)
+        assert analyzer.derived_columns == {}
+
+    def test_dropped_when_column_count_changes(self, analyzer):
+        analyzer.add_derived(DerivedColumn('normalized', source=0))
+        analyzer.raw_data = np.array(analyzer.raw_data)
+        assert len(analyzer.derived_columns) == 1
+        analyzer.raw_data = analyzer.raw_data[:, :2]
+        assert analyzer.derived_columns == {}
+
+
+class TestDownsampling:
+    @pytest.fixture
+    def long_analyzer(self):
+        rng = np.random.default_rng(0)
+        ga = GraphAnalyzer()
+        ga.load_csv(np.cumsum(rng.standard_normal((50_003, 2)), axis=0))
+        return ga
+
+    def test_lod_built_on_load(self, analyzer):
+        assert analyzer.get_lod() is analyzer.get_lod()
+        assert len(analyzer.get_lod().levels) > 0
+
+    def test_lod_rebuilt_when_data_replaced(self, analyzer):
+        lod = analyzer.get_lod()
+        analyzer.raw_data = analyzer.raw_data.copy()
+        assert analyzer.get_lod() is not lod
+
+    def test_short_range_returns_raw(self, analyzer):
+        indices, values, bucket = analyzer.downsample_column(0, 100, 150, width=100)
+        assert bucket == 1
+        np.testing.assert_array_equal(indices, np.arange(100, 150))
+        np.testing.assert_array_equal(values, analyzer.raw_data[100:150, 0])
+
+    @pytest.mark.parametrize("start,end,width", [(0, 50_003, 800), (1234, 40_000, 300), (49_000, 50_003, 50)])
+    def test_preserves_extremes(self, long_analyzer, start, end, width):
+        indices, values, _ = long_analyzer.downsample_column(1, start, end, width)
+        segment = long_analyzer.raw_data[start:end, 1]
+        assert len(values) <= 2 * width
+        assert values.min() == segment.min()
+        assert values.max() == segment.max()
+        np.testing.assert_array_equal(long_analyzer.raw_data[indices, 1], values)
+        assert np.all(np.diff(indices) >= 0)
+
+    def test_column_out_of_range(self, analyzer):
+        with pytest.raises(IndexError):
+            analyzer.downsample_column(999, 0, 100, 10)
+
+
 class TestSerialization:
     def test_to_dict(self, analyzer):
         analyzer.find_extrema(column=0, min_distance=10)
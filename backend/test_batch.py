@@ -0,0 +1,105 @@
+"""
+Tests for the headless batch CLI
+"""
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from analyzer import GraphAnalyzer, resample_segment_tensor
+from batch import BatchSpec, main, parse_pattern, resolve_inputs, run_batch
+from bench import csv_bytes, gait_signals
+from ingest import read_csv_path
+
+
+@pytest.fixture(scope="module")
+def trials(tmp_path_factory):
+    folder = tmp_path_factory.mktemp("trials")
+    datasets = {}
+    for k, rows in enumerate([3000, 4500, 2000]):
+        path = folder / f"trial_{k}.csv"
+        path.write_bytes(csv_bytes(gait_signals(rows, 4, seed=k)))
+        datasets[str(path)] = read_csv_path(path)
+    return folder, datasets
+
+
+def reference(data, spec):
+    analyzer = GraphAnalyzer(frequency=spec.frequency)
+    analyzer.raw_data = data
+    analyzer.find_extrema(spec.column, spec.min_distance)
+    return analyzer
+
+
+class TestSpec:
+    def test_parse_pattern(self):
+        assert parse_pattern("LHL") == (0, 1, 0)
+        assert parse_pattern("1,0,1") == (1, 0, 1)
+        assert parse_pattern([0, 1]) == (0, 1)
+        with pytest.raises(ValueError):
+            parse_pattern("LXL")
+        with pytest.raises(ValueError):
+            parse_pattern("L")
+
+    def test_trend_columns_default_to_analysis_column(self):
+        assert BatchSpec(column=2).trend_columns == [2]
+
+    def test_resolve_inputs(self, trials):
+        folder, datasets = trials
+        assert resolve_inputs([str(folder)]) == sorted(datasets)
+        assert resolve_inputs([str(folder / "trial_*.csv"), str(folder / "trial_1.csv")]) == sorted(datasets)
+
+
+class TestRunBatch:
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_events_and_pooled_trends(self, trials, tmp_path, workers):
+        _, datasets = trials
+        spec = BatchSpec(column=1, min_distance=30, pattern="HLH", trend_columns=[0, 1])
+        summary = run_batch(sorted(datasets), spec, str(tmp_path), workers=workers)
+        assert summary["failed"] == 0
+
+        segments = []
+        for trial, (path, data) in zip(summary["trials"], sorted(datasets.items())):
+            analyzer = reference(data, spec)
+            table = analyzer.find_pattern_event_table(spec.pattern)
+            events = pd.read_csv(trial["events_file"])
+            assert trial["rows"] == len(data) and trial["events"] == len(events)
+            np.testing.assert_array_equal(events["start_index"], table["start_index"])
+            segments.append(resample_segment_tensor(data, [0, 1], table["start_index"], table["end_index"], 100))
+
+        pooled = np.concatenate(segments, axis=1)
+        trends = pd.read_csv(tmp_path / "trends.csv")
+        np.testing.assert_allclose(trends["1_mean"], pooled[1].mean(axis=0))
+        np.testing.assert_allclose(trends["0_std"], pooled[0].std(axis=0), atol=1e-12)
+        assert summary["events"] == pooled.shape[1]
+
+        throughput = json.loads((tmp_path / "summary.json").read_text())["throughput"]
+        assert throughput["rows"] == sum(len(d) for d in datasets.values())
+        assert throughput["files_per_s"] > 0 and throughput["rows_per_s"] > 0
+
+    def test_long_patterns_expand_point_columns(self, trials, tmp_path):
+        _, datasets = trials
+        summary = run_batch(sorted(datasets)[:1], BatchSpec(pattern="LHLH", min_distance=30), str(tmp_path), 1)
+        events = pd.read_csv(summary["trials"][0]["events_file"])
+        assert {"indices_0", "indices_3", "values_3", "phase_times_2"} <= set(events.columns)
+
+    def test_failed_trial_is_reported(self, trials, tmp_path):
+        folder, datasets = trials
+        bad = folder / "broken.csv"
+        bad.write_text("1;2\n3\n")
+        summary = run_batch([str(bad)] + sorted(datasets)[:1], BatchSpec(column=3), str(tmp_path), 1)
+        assert summary["failed"] == 1
+        assert "error" in summary["trials"][0] and "error" not in summary["trials"][1]
+        bad.unlink()
+
+
+def test_main(trials, tmp_path, capsys):
+    folder, _ = trials
+    spec = tmp_path / "spec.json"
+    spec.write_text(json.dumps({"column": 2, "pattern": "LHL", "min_distance": 30}))
+    status = main([str(folder), "--spec", str(spec), "--min-distance", "40", "--workers", "1",
+                   "--output", str(tmp_path / "out")])
+    assert status == 0
+    summary = json.loads((tmp_path / "out" / "summary.json").read_text())
+    assert summary["spec"]["min_distance"] == 40 and summary["spec"]["column"] == 2
+    assert "files/s" in capsys.readouterr().out
@@ -0,0 +1,67 @@
+"""
+Tests for the benchmark harness (not the timings themselves)
+"""
+import numpy as np
+import pytest
+
+import bench
+from bench import gait_signals, compare, run
+
+
+class TestGaitSignals:
+    def test_shape_and_stride_rhythm(self):
+        data = gait_signals(6000, 5)
+        assert data.shape == (6000, 5)
+        # ~1 stride per second at 100 Hz: dominant period near 100 samples
+        spectrum = np.abs(np.fft.rfft(data[:, 0] - data[:, 0].mean()))
+        period = len(data) / np.argmax(spectrum)
+        assert 80 < period < 120
+
+    def test_deterministic(self):
+        np.testing.assert_array_equal(gait_signals(100, 3, seed=7), gait_signals(100, 3, seed=7))
+
+
+class TestCompare:
+    def results(self, seconds):
+        return {"results": {"case": {"median_s": seconds, "min_s": seconds}}}
+
+    def test_regression_beyond_threshold(self):
+        assert compare(self.results(0.013), self.results(0.010), 0.25)[0]["status"] == "regression"
+        assert compare(self.results(0.012), self.results(0.010), 0.25)[0]["status"] == "ok"
+        assert compare(self.results(0.007), self.results(0.010), 0.25)[0]["status"] == "improvement"
+
+    def test_noise_floor(self):
+        assert compare(self.results(5e-5), self.results(1e-5), 0.25)[0]["status"] == "ok"
+
+    def test_new_case(self):
+        assert compare(self.results(0.01), {"results": {}})[0]["status"] == "new"
+
+
+def test_run_covers_all_hot_paths(monkeypatch):
+    monkeypatch.setitem(bench.PROFILES, "tiny", {"rows": [2000], "columns": [5]})
+    result = run("tiny", min_time=0)
+    names = {r["name"] for r in result["results"].values()}
+    assert names == {
+        "find_extrema", "compute_pattern_events", "calculate_distance", "calculate_angle_3points",
+        "calculate_angle_4points", "calculate_mean_trend", "calculate_mean_trend_extended", "ingest_csv",
+        "render_json", "mean_trends", "ensemble_statistics",
+    }
+
+
+def test_oversized_cases_are_reported_as_skipped(monkeypatch):
+    monkeypatch.setitem(bench.PROFILES, "tiny", {"rows": [2000], "columns": [2, 50]})
+    result = run("tiny", max_data_bytes=2000 * 2 * 8, min_time=0, only=["find_extrema"])
+    assert result["skipped"] == ["rows=2000,cols=50"]
+    assert list(result["results"]) == ["find_extrema[rows=2000,cols=2]"]
+
+
+def test_missing_baseline_is_an_error(monkeypatch, tmp_path):
+    monkeypatch.setitem(bench.PROFILES, "tiny", {"rows": [2000], "columns": [2]})
+    baseline = tmp_path / "baseline.json"
+    with pytest.raises(SystemExit) as exit_info:
+        bench.main(["--profile", "tiny", "--baseline", str(baseline), "--only", "find_extrema"])
+    assert exit_info.value.code == 2 and not baseline.exists()
+
+    args = ["--profile", "tiny", "--baseline", str(baseline), "--only", "find_extrema", "--min-time", "0"]
+    assert bench.main(args + ["--update-baseline"]) == 0
+    assert baseline.exists()
@@ -0,0 +1,33 @@
+"""
+Tests for the serverless cold-start budget
+"""
+import pytest
+
+from coldstart import COLDSTART_BUDGET_S, measure, parse_importtime
+
+
+@pytest.fixture(scope="module")
+def report():
+    return measure(repeats=3)
+
+
+def test_parse_importtime():
+    stderr = "\n".join([
+        "import time: self [us] | cumulative | imported package",
+        "import time:       120 |        120 |     _io",
+        "import time:      3247 |     996419 |   backend.analyzer",
+        "unrelated line",
+    ])
+    assert parse_importtime(stderr) == [
+        {"module": "_io", "self_us": 120, "cumulative_us": 120, "depth": 2},
+        {"module": "backend.analyzer", "self_us": 3247, "cumulative_us": 996419, "depth": 1},
+    ]
+
+
+def test_app_import_skips_heavy_dependencies(report):
+    assert report["heavy"] == []
+
+
+def test_app_import_within_budget(report):
+    assert report["seconds"] <= COLDSTART_BUDGET_S, report["slowest"]
+    assert report["slowest"] and report["slowest"][0]["cumulative_us"] > 0
@@ -0,0 +1,70 @@
+"""
+Tests for the content-addressed dataset cache
+"""
+import gc
+
+import numpy as np
+import pytest
+
+from analyzer import GraphAnalyzer
+from datasets import DatasetCache, dataset_key
+
+
+class TestDatasetCache:
+    def test_key_includes_parse_options(self):
+        assert dataset_key("abc", ";", False) != dataset_key("abc", ",", False)
+        assert dataset_key("abc", ";", False) != dataset_key("abc", ";", True)
+
+    def test_shared_read_only(self):
+        cache = DatasetCache()
+        data = cache.put("k", np.ones((10, 2)))
+        assert cache.get("k") is data
+        assert not data.flags.writeable
+        with pytest.raises(ValueError):
+            data[0, 0] = 2
+        assert cache.stats() == {"datasets": 1, "bytes": 160, "retained": 1, "retained_bytes": 160,
+                                 "hits": 1, "misses": 0}
+
+    def test_put_returns_existing(self):
+        cache = DatasetCache()
+        first = cache.put("k", np.ones(3))
+        assert cache.put("k", np.ones(3)) is first
+
+    def test_entries_live_as_long_as_sessions(self):
+        cache = DatasetCache(retain_bytes=0)
+        analyzer = GraphAnalyzer()
+        analyzer.load_csv(cache.put("k", np.ones((100, 2))))
+        gc.collect()
+        assert cache.get("k") is analyzer.raw_data
+        del analyzer
+        gc.collect()
+        assert cache.get("k") is None
+
+    def test_recent_entries_outlive_their_sessions(self):
+        cache = DatasetCache(retain_bytes=2000)
+        analyzer = GraphAnalyzer()
+        analyzer.load_csv(cache.put("k", np.ones((100, 2))))
+        del analyzer
+        gc.collect()
+        assert cache.get("k") is not None
+
+    def test_retained_bytes_are_bounded(self):
+        cache = DatasetCache(retain_bytes=2500)
+        for key in "abc":
+            cache.put(key, np.ones((100, 1)))
+        cache.get("a")  # most recently used now
+        cache.put("d", np.ones((100, 1)))
+        gc.collect()
+        assert cache.get("a") is not None and cache.get("b") is None
+        assert cache.stats()["retained_bytes"] <= 2500
+        cache.put("big", np.ones((1000, 1)))
+        gc.collect()
+        assert cache.get("big") is None
+
+    def test_sessions_cannot_change_shared_data(self):
+        cache = DatasetCache()
+        shared = cache.put("k", np.zeros((100, 2)))
+        analyzer = GraphAnalyzer()
+        analyzer.load_csv(shared)
+        with pytest.raises(ValueError):
+            analyzer.raw_data[0, 0] = 1.0
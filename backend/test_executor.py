@@ -0,0 +1,126 @@
+"""
+Tests for the bounded compute executor and per-session locking
+"""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from executor import ComputeExecutor, ExecutorSaturated
+
+
+def overlap_recorder():
+    """A blocking call that records how many calls were inside it at once."""
+    state = {"active": 0, "peak": 0}
+    lock = threading.Lock()
+
+    def call(seconds=0.05):
+        with lock:
+            state["active"] += 1
+            state["peak"] = max(state["peak"], state["active"])
+        time.sleep(seconds)
+        with lock:
+            state["active"] -= 1
+
+    return call, state
+
+
+class TestComputeExecutor:
+    def test_runs_off_the_loop(self):
+        executor = ComputeExecutor(max_workers=2)
+
+        async def main():
+            return await executor.run(threading.get_ident)
+
+        assert asyncio.run(main()) != threading.get_ident()
+
+    def test_same_session_is_serialized(self):
+        executor = ComputeExecutor(max_workers=4)
+        call, state = overlap_recorder()
+
+        async def main():
+            await asyncio.gather(*(executor.run(call, session_id="a") for _ in range(3)))
+
+        asyncio.run(main())
+        assert state["peak"] == 1
+        assert executor.stats()["locked_sessions"] == 0
+
+    def test_sessions_run_in_parallel(self):
+        executor = ComputeExecutor(max_workers=4)
+        call, state = overlap_recorder()
+
+        async def main():
+            await asyncio.gather(*(executor.run(call, session_id=s) for s in "abc"))
+
+        asyncio.run(main())
+        assert state["peak"] == 3
+
+    def test_saturation(self):
+        executor = ComputeExecutor(max_workers=1, max_queue=1, retry_after=3)
+        call, _ = overlap_recorder()
+
+        async def main():
+            first = asyncio.ensure_future(executor.run(call, 0.1))
+            second = asyncio.ensure_future(executor.run(call, 0.1))
+            await asyncio.sleep(0)
+            with pytest.raises(ExecutorSaturated) as excinfo:
+                await executor.run(call)
+            await asyncio.gather(first, second)
+            return excinfo.value
+
+        error = asyncio.run(main())
+        assert error.retry_after == 3
+        assert executor.stats()["rejected"] == 1
+        assert executor.stats()["pending"] == 0
+
+    def test_cancelled_call_keeps_session_locked(self):
+        executor = ComputeExecutor(max_workers=2)
+        call, state = overlap_recorder()
+
+        async def main():
+            first = asyncio.ensure_future(executor.run(call, 0.1, session_id="a"))
+            await asyncio.sleep(0.02)
+            first.cancel()
+            await executor.run(call, 0.01, session_id="a")
+
+        asyncio.run(main())
+        assert state["peak"] == 1
+
+    def test_errors_propagate(self):
+        executor = ComputeExecutor()
+
+        def fail():
+            raise ValueError("bad column")
+
+        with pytest.raises(ValueError, match="bad column"):
+            asyncio.run(executor.run(fail, session_id="a"))
+        assert executor.stats()["pending"] == 0
+
+    def test_light_calls_bypass_a_saturated_compute_pool(self):
+        executor = ComputeExecutor(max_workers=1, max_queue=0, light_workers=1)
+        call, _ = overlap_recorder()
+
+        async def main():
+            heavy = asyncio.ensure_future(executor.run(call, 0.2))
+            await asyncio.sleep(0)
+            with pytest.raises(ExecutorSaturated):
+                await executor.run(call)
+            start = time.perf_counter()
+            await executor.run(call, 0.01, light=True)
+            waited = time.perf_counter() - start
+            await heavy
+            return waited
+
+        assert asyncio.run(main()) < 0.15
+        assert executor.stats()["light_pending"] == 0
+
+    def test_light_calls_share_session_locks(self):
+        executor = ComputeExecutor(max_workers=2, light_workers=2)
+        call, state = overlap_recorder()
+
+        async def main():
+            await asyncio.gather(executor.run(call, session_id="a"), executor.run(call, session_id="a", light=True))
+
+        asyncio.run(main())
+        assert state["peak"] == 1
@@ -0,0 +1,65 @@
+"""
+Tests for streaming CSV ingestion
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from pathlib import Path
+
+from ingest import ChunkedCSVReader, read_csv_path
+
+
+TEST_DATA_PATH = Path(__file__).parent / "test_data.csv"
+
+
+def _feed(reader, content, chunk_size):
+    for i in range(0, len(content), chunk_size):
+        reader.feed(content[i:i + chunk_size])
+    return reader.finish()
+
+
+class TestChunkedCSVReader:
+    @pytest.mark.parametrize("chunk_size", [1, 13, 4096, 10 ** 7])
+    def test_matches_pandas(self, chunk_size):
+        expected = pd.read_csv(TEST_DATA_PATH, delimiter=';', header=None).values.astype(float)
+        data = _feed(ChunkedCSVReader(';'), TEST_DATA_PATH.read_bytes(), chunk_size)
+        np.testing.assert_array_equal(data, expected)
+
+    def test_trim_zeros_on_the_fly(self):
+        content = b"0;0\n0;0\n1;2\n0;0\n3;4\n0;0\n0;0"
+        data = _feed(ChunkedCSVReader(';', trim_zeros=True), content, 3)
+        np.testing.assert_array_equal(data, [[1, 2], [0, 0], [3, 4]])
+
+    def test_trim_zeros_all_zero_keeps_rows(self):
+        data = _feed(ChunkedCSVReader(';', trim_zeros=True), b"0;0\n0;0\n", 4)
+        assert data.shape == (2, 2)
+
+    def test_spills_to_memmap(self):
+        rows = np.arange(60_000, dtype=float).reshape(-1, 3)
+        content = "\n".join(";".join(str(v) for v in r) for r in rows).encode()
+        reader = ChunkedCSVReader(';', spill_threshold=100_000)
+        data = _feed(reader, content, 65536)
+        assert isinstance(data, np.memmap)
+        np.testing.assert_array_equal(data, rows)
+
+    @pytest.mark.parametrize("chunk_size", [1, 5, 4096])
+    def test_skips_header_rows(self, chunk_size):
+        content = b"time,left,right\nunits s,N,N\n1,2,3\n4,5,6\n"
+        data = _feed(ChunkedCSVReader(',', header_rows=2), content, chunk_size)
+        np.testing.assert_array_equal(data, [[1, 2, 3], [4, 5, 6]])
+
+    def test_header_only(self):
+        with pytest.raises(ValueError):
+            _feed(ChunkedCSVReader(';', header_rows=1), b"a;b", 1)
+
+    def test_inconsistent_columns(self):
+        reader = ChunkedCSVReader(';')
+        with pytest.raises(ValueError):
+            _feed(reader, b"1;2\n3;4\n5;6;7\n", 4)
+
+    def test_empty_input(self):
+        with pytest.raises(ValueError):
+            ChunkedCSVReader(';').finish()
+
+    def test_read_csv_path(self):
+        assert read_csv_path(TEST_DATA_PATH).shape == (1397, 5)
@@ -0,0 +1,109 @@
+"""
+Tests for the background job manager
+"""
+import threading
+import time
+
+import pytest
+
+from jobs import ExecutorSaturated, JobManager
+
+
+def wait(job, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while job.status in ("queued", "running"):
+        assert time.monotonic() < deadline, "job did not finish"
+        time.sleep(0.005)
+    return job
+
+
+def counting(total, gate=None):
+    def run(job):
+        for i in range(total):
+            if gate is not None:
+                gate.wait()
+            job.report(i + 1, total)
+        return {"count": total}
+    return run
+
+
+class TestJobManager:
+    def test_runs_and_reports_progress(self):
+        manager = JobManager(max_workers=1)
+        job, reused = manager.submit("count", ("k",), counting(5), unit="columns")
+        assert not reused
+        wait(job)
+        assert job.status == "done"
+        assert job.result == {"count": 5}
+        progress = job.to_dict()["progress"]
+        assert progress == {"done": 5, "total": 5, "unit": "columns", "fraction": 1.0}
+
+    def test_identical_key_reuses_job(self):
+        manager = JobManager(max_workers=1)
+        first, _ = manager.submit("count", ("k", 1), counting(3))
+        wait(first)
+        again, reused = manager.submit("count", ("k", 1), counting(3))
+        assert reused and again is first
+        other, reused = manager.submit("count", ("k", 2), counting(3))
+        assert not reused and other is not first
+        assert manager.stats()["cache_hits"] == 1
+
+    def test_cancel_running_job(self):
+        manager = JobManager(max_workers=1)
+        gate = threading.Event()
+        job, _ = manager.submit("count", ("k",), counting(100, gate))
+        while job.status != "running":
+            time.sleep(0.001)
+        manager.cancel(job.id)
+        gate.set()
+        wait(job)
+        assert job.status == "cancelled"
+        assert job.done < 100
+        # A cancelled job is not served from the cache
+        retry, reused = manager.submit("count", ("k",), counting(1))
+        assert not reused
+        wait(retry)
+
+    def test_cancel_queued_job(self):
+        manager = JobManager(max_workers=1)
+        gate = threading.Event()
+        blocker, _ = manager.submit("count", ("a",), counting(1, gate))
+        queued, _ = manager.submit("count", ("b",), counting(1))
+        assert manager.cancel(queued.id).status == "cancelled"
+        gate.set()
+        wait(blocker)
+        assert queued.status == "cancelled" and queued.started is None
+
+    def test_failure_is_recorded(self):
+        manager = JobManager(max_workers=1)
+
+        def fail(job):
+            raise ValueError("No events found for pattern")
+
+        job, _ = manager.submit("fail", ("k",), fail)
+        wait(job)
+        assert job.status == "failed"
+        assert job.error == "No events found for pattern"
+
+    def test_bounded_queue(self):
+        manager = JobManager(max_workers=1, max_queue=1)
+        gate = threading.Event()
+        try:
+            first, _ = manager.submit("count", ("a",), counting(1, gate))
+            manager.submit("count", ("b",), counting(1, gate))
+            with pytest.raises(ExecutorSaturated):
+                manager.submit("count", ("c",), counting(1))
+            # Re-submitting a known key is still answered
+            assert manager.submit("count", ("a",), counting(1))[0] is first
+        finally:
+            gate.set()
+        wait(first)
+
+    def test_finished_jobs_are_trimmed(self):
+        manager = JobManager(max_workers=1, max_finished=2)
+        created = [manager.submit("count", (i,), counting(1))[0] for i in range(4)]
+        for job in created:
+            wait(job)
+        assert manager.get(created[0].id) is None
+        assert manager.get(created[-1].id) is created[-1]
+        assert manager.submit("count", (0,), counting(1))[1] is False
@@ -0,0 +1,88 @@
+"""
+Tests for request stage timing and the Prometheus registry
+"""
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from metrics import Histogram, MetricsRegistry, RequestTimer, TimingMiddleware, _current, _escape, stage
+
+
+def _timed_app(registry):
+    app = FastAPI()
+
+    @app.post("/items/{item_id}")
+    def create(item_id: int):
+        with stage("parse"):
+            time.sleep(0.002)
+        with stage("parse"):
+            pass
+        with stage("compute"):
+            pass
+        return {"id": item_id}
+
+    app.add_middleware(TimingMiddleware, registry=registry)
+    return app
+
+
+class TestStages:
+    def test_noop_outside_request(self):
+        assert _current.get() is None
+        with stage("parse"):
+            pass
+
+    def test_accumulates_per_name(self):
+        timer = RequestTimer()
+        timer.add("parse", 0.001)
+        timer.add("parse", 0.002)
+        assert timer.stages == {"parse": 0.003}
+        header = timer.server_timing()
+        assert header.startswith("parse;dur=3.000, total;dur=")
+
+
+class TestRegistry:
+    def test_histogram_buckets(self):
+        histogram = Histogram((1.0, 2.0))
+        for value in (0.5, 1.0, 1.5, 3.0):
+            histogram.observe(value)
+        assert histogram.counts == [2, 1, 1]
+        assert histogram.count == 4 and histogram.sum == 6.0
+
+    def test_render(self):
+        registry = MetricsRegistry()
+        registry.observe("x_seconds", 0.5, {"route": "/a"}, (1.0,), "Latency")
+        registry.inc("x_total", {"route": "/a"}, help_text="Requests")
+        text = registry.render({"x_sessions": ("gauge", 3, "Live sessions")})
+        assert "# TYPE x_seconds histogram" in text
+        assert 'x_seconds_bucket{route="/a",le="1"} 1' in text
+        assert 'x_seconds_bucket{route="/a",le="+Inf"} 1' in text
+        assert 'x_seconds_sum{route="/a"} 0.5' in text
+        assert 'x_total{route="/a"} 1' in text
+        assert "# TYPE x_sessions gauge\nx_sessions 3" in text
+
+    def test_escape(self):
+        assert _escape('a"b\\c\nd') == 'a\\"b\\\\c\\nd'
+
+
+class TestMiddleware:
+    def test_server_timing_and_metrics(self):
+        registry = MetricsRegistry()
+        client = TestClient(_timed_app(registry))
+        response = client.post("/items/7", content=b"x" * 100)
+        assert response.status_code == 200
+        names = [part.split(";")[0].strip() for part in response.headers["server-timing"].split(",")]
+        assert names == ["parse", "compute", "total"]
+        assert response.headers["timing-allow-origin"] == "*"
+
+        text = registry.render()
+        assert ('graph_analyzer_requests_total{method="POST",route="/items/{item_id}",status="200"} 1'
+                in text)
+        assert 'graph_analyzer_stage_duration_seconds_count{method="POST",route="/items/{item_id}",stage="parse"} 1' in text
+        assert 'graph_analyzer_request_bytes_sum{method="POST",route="/items/{item_id}"} 100' in text
+
+    def test_unmatched_route(self):
+        registry = MetricsRegistry()
+        client = TestClient(_timed_app(registry))
+        assert client.get("/nope").status_code == 404
+        assert 'route="unmatched",status="404"' in registry.render()
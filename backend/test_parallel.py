@@ -0,0 +1,120 @@
+"""
+Tests for parallel all-columns analysis
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from analyzer import GraphAnalyzer
+import parallel
+from parallel import analyze_all_columns, shutdown_pools
+
+
+@pytest.fixture(scope="module")
+def signals():
+    rng = np.random.default_rng(0)
+    t = np.linspace(0, 20 * np.pi, 4000)
+    return np.column_stack([np.sin(t * (1 + k / 10)) + 0.05 * rng.standard_normal(len(t)) for k in range(4)])
+
+
+class CountingPool(ThreadPoolExecutor):
+    """Stand-in for the shared pool that records how many columns ran at once."""
+
+    def __init__(self, max_workers):
+        super().__init__(max_workers)
+        self.lock = threading.Lock()
+        self.running = self.peak = self.started = 0
+        self.futures = []
+
+    def submit(self, fn, *args):
+        future = super().submit(fn, *args)
+        self.futures.append(future)
+        return future
+
+    def task(self, args):
+        with self.lock:
+            self.started += 1
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        time.sleep(0.01)
+        with self.lock:
+            self.running -= 1
+        return {"column": args[3], "elapsed_ms": 10.0}
+
+
+@pytest.fixture
+def counting_pool(monkeypatch):
+    pool = CountingPool(4)
+    monkeypatch.setattr(parallel, "MAX_WORKERS", 4)
+    monkeypatch.setattr(parallel, "_get_pool", lambda: pool)
+    monkeypatch.setattr(parallel, "_analyze_shared_column", pool.task)
+    yield pool
+    pool.shutdown()
+
+
+class TestAnalyzeAllColumns:
+    def test_sequential_matches_analyzer(self, signals):
+        results, timing = analyze_all_columns(signals, (0, 1, 0), min_distance=10, workers=1)
+        assert [r["column"] for r in results] == [0, 1, 2, 3]
+        ga = GraphAnalyzer()
+        ga.raw_data = signals
+        ga.find_extrema(2, 10)
+        assert results[2]["events"] == ga.find_pattern_events((0, 1, 0))
+        assert timing["workers"] == 1
+        assert all(r["elapsed_ms"] >= 0 for r in results)
+
+    def test_parallel_matches_sequential(self, signals, monkeypatch):
+        monkeypatch.setattr(parallel, "MAX_WORKERS", 2)
+        sequential, _ = analyze_all_columns(signals, (1, 0, 1), workers=1)
+        try:
+            fanned_out, timing = analyze_all_columns(signals, (1, 0, 1), workers=2)
+        finally:
+            shutdown_pools()
+        assert timing["workers"] == 2
+        for a, b in zip(sequential, fanned_out):
+            assert a["column"] == b["column"]
+            assert a["extrema_count"] == b["extrema_count"]
+            assert a["events"] == b["events"]
+
+    def test_progress_reports_every_column(self, signals):
+        calls = []
+        analyze_all_columns(signals, (0, 1, 0), workers=1, progress=lambda done, total: calls.append((done, total)))
+        assert calls == [(1, 4), (2, 4), (3, 4), (4, 4)]
+
+    def test_workers_are_capped(self, signals, monkeypatch):
+        monkeypatch.setattr(parallel, "MAX_WORKERS", 1)
+        _, timing = analyze_all_columns(signals, (0, 1, 0), workers=64)
+        assert timing["workers"] == 1
+        assert parallel._pool is None
+
+    def test_single_shared_pool(self, monkeypatch):
+        monkeypatch.setattr(parallel, "MAX_WORKERS", 2)
+        try:
+            assert parallel._get_pool() is parallel._get_pool()
+        finally:
+            shutdown_pools()
+        assert parallel._pool is None
+
+    def test_requested_workers_bound_concurrency(self, counting_pool):
+        data = np.zeros((10, 12))
+        results, timing = analyze_all_columns(data, (0, 1, 0), workers=2)
+        assert [r["column"] for r in results] == list(range(12))
+        assert timing["workers"] == 2
+        assert counting_pool.peak == 2
+
+    def test_workers_reported_as_used(self, counting_pool):
+        _, timing = analyze_all_columns(np.zeros((10, 3)), (0, 1, 0), workers=4)
+        assert timing["workers"] == 3
+
+    def test_cancelled_run_stops_queued_columns(self, counting_pool):
+        def cancel(done, total):
+            raise RuntimeError("cancelled")
+
+        with pytest.raises(RuntimeError):
+            analyze_all_columns(np.zeros((10, 12)), (0, 1, 0), workers=2, progress=cancel)
+        # The block is unlinked only after the columns in flight finished; the rest never started
+        assert all(f.done() for f in counting_pool.futures)
+        assert counting_pool.started <= 3
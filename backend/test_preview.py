@@ -0,0 +1,108 @@
+"""
+Tests for the bounded-sample CSV preview
+"""
+import io
+
+import numpy as np
+import pytest
+
+import preview
+from preview import preview_csv, sniff_layout
+
+
+def csv_bytes(data, sep=";", header=None):
+    lines = [sep.join(f"{v:g}" for v in row) for row in data]
+    if header:
+        lines.insert(0, header)
+    return ("\n".join(lines) + "\n").encode()
+
+
+def padded(rows, lead, trail, cols=4, seed=0):
+    data = np.random.default_rng(seed).normal(size=(rows, cols)).round(4) + 10
+    data[:lead] = 0
+    data[rows - trail:] = 0
+    return data
+
+
+class TestSniffing:
+    @pytest.mark.parametrize("sep", [";", ",", "\t", "|"])
+    def test_detects_delimiter(self, sep):
+        assert sniff_layout(csv_bytes(padded(10, 0, 0), sep)) == (sep, 4, 0)
+
+    def test_header_rows(self):
+        assert sniff_layout(csv_bytes(padded(10, 0, 0), ",", header="a,b,c,d")) == (",", 4, 1)
+
+    def test_rejects_non_numeric(self):
+        with pytest.raises(ValueError):
+            sniff_layout(b"a;b\nc;d\ne;f\n")
+
+
+class TestPreview:
+    def test_zero_rows_and_trim(self):
+        data = padded(100, 5, 7)
+        result = preview_csv(io.BytesIO(csv_bytes(data)), trim_zeros=True)
+        assert result["total_rows"] == 100
+        assert result["zero_rows_start"] == 5
+        assert result["zero_rows_end"] == 7
+        assert result["rows_after_trim"] == 88
+        np.testing.assert_allclose(result["preview"], data[5:25])
+        assert not result["rows_estimated"]
+
+    def test_untrimmed_preview_starts_at_first_row(self):
+        data = padded(100, 5, 7)
+        result = preview_csv(io.BytesIO(csv_bytes(data, ",")))
+        assert result["delimiter"] == ","
+        assert result["rows_after_trim"] == 100
+        np.testing.assert_allclose(result["preview"], data[:20])
+
+    def test_all_zero_rows(self):
+        result = preview_csv(io.BytesIO(csv_bytes(np.zeros((30, 3)))), trim_zeros=True)
+        assert result["zero_rows_start"] == result["zero_rows_end"] == 30
+        assert result["rows_after_trim"] == 30
+        assert len(result["preview"]) == 20
+
+    def test_trim_drops_trailing_zeros_from_short_preview(self):
+        content = b"0;0\n0;0\n1;2\n3;4\n0;0\n0;0\n0;0\n"
+        result = preview_csv(io.BytesIO(content), ";", trim_zeros=True)
+        assert result["rows_after_trim"] == 2
+        assert result["preview"] == [[1, 2], [3, 4]]
+        assert len(preview_csv(io.BytesIO(content), ";")["preview"]) == 7
+
+    def test_skips_header(self):
+        data = padded(50, 0, 0)
+        result = preview_csv(io.BytesIO(csv_bytes(data, header="a;b;c;d")))
+        assert result["header_rows"] == 1
+        assert result["total_rows"] == 50
+        np.testing.assert_allclose(result["preview"][0], data[0])
+
+    def test_large_file_is_estimated(self, monkeypatch):
+        monkeypatch.setattr(preview, "HEAD_BYTES", 4096)
+        monkeypatch.setattr(preview, "SCAN_BYTES", 4096)
+        monkeypatch.setattr(preview, "EXACT_COUNT_BYTES", 8192)
+        data = padded(20000, 300, 200)
+        result = preview_csv(io.BytesIO(csv_bytes(data)), trim_zeros=True)
+        assert result["rows_estimated"]
+        assert result["zero_rows_start"] == 300
+        assert result["zero_rows_end"] == 200
+        assert abs(result["total_rows"] - 20000) < 200
+
+
+def test_upload_with_previewed_layout():
+    from fastapi.testclient import TestClient
+    from main import app
+
+    client = TestClient(app)
+    data = padded(200, 0, 0)
+    content = csv_bytes(data, ",", header="hip,knee,ankle,toe")
+    layout = client.post("/api/preview", params={"trim_zeros": "false"},
+                         files={"file": ("trial.csv", content)}).json()
+    assert (layout["delimiter"], layout["header_rows"]) == (",", 1)
+
+    params = {"delimiter": layout["delimiter"], "header_rows": layout["header_rows"]}
+    for response in (client.post("/api/upload", params=params, files={"file": ("trial.csv", content)}),
+                     client.post("/api/upload/stream", params=params, content=content)):
+        assert response.status_code == 200, response.text
+        assert (response.json()["rows"], response.json()["columns"]) == (200, 4)
+        session = response.json()["session_id"]
+        column = client.post("/api/reference-column", json={"session_id": session, "column": 3}).json()
+        np.testing.assert_allclose(column["data"], data[:, 3])
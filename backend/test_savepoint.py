@@ -0,0 +1,120 @@
+"""
+Tests for the binary savepoint container
+"""
+import json
+import struct
+import zlib
+
+import numpy as np
+import pytest
+
+from analyzer import DerivedColumn, GraphAnalyzer
+from savepoint import iter_savepoint, read_savepoint, SavepointReader, MAGIC
+
+
+@pytest.fixture
+def analyzer():
+    analyzer = GraphAnalyzer(frequency=250.0)
+    t = np.linspace(0, 20 * np.pi, 5000)
+    analyzer.raw_data = np.column_stack([np.sin(t), np.cos(t), t])
+    analyzer.find_extrema(0, 20)
+    return analyzer
+
+
+def rechunk(chunks, size):
+    blob = b"".join(chunks)
+    return [blob[i:i + size] for i in range(0, len(blob), size)]
+
+
+class TestSavepoint:
+    def test_roundtrip(self, analyzer):
+        savepoint = read_savepoint(iter_savepoint(analyzer, frame_bytes=4096))
+        np.testing.assert_array_equal(savepoint.data, analyzer.raw_data)
+        assert savepoint.frequency == 250.0
+        assert savepoint.data_hash == analyzer.content_hash()
+        restored = savepoint.to_analyzer()
+        np.testing.assert_array_equal(restored.extrema.records, analyzer.extrema.records)
+        assert restored.cached_content_hash == analyzer.content_hash()
+
+    def test_arbitrary_chunk_boundaries(self, analyzer):
+        chunks = rechunk(iter_savepoint(analyzer, frame_bytes=4096), 777)
+        np.testing.assert_array_equal(read_savepoint(chunks).data, analyzer.raw_data)
+
+    def test_without_data_keeps_hash(self, analyzer):
+        savepoint = read_savepoint(iter_savepoint(analyzer, include_data=False))
+        assert savepoint.data is None
+        assert savepoint.data_hash == analyzer.content_hash()
+        restored = savepoint.to_analyzer(analyzer.raw_data)
+        assert len(restored.extrema) == len(analyzer.extrema)
+
+    def test_derived_columns_roundtrip(self, analyzer):
+        distance = analyzer.add_derived(DerivedColumn('distance', points=[[0], [1]]))
+        analyzer.add_derived(DerivedColumn('filtered', source=distance, params={'method': 'savgol', 'window': 21}))
+        restored = read_savepoint(iter_savepoint(analyzer)).to_analyzer()
+        assert restored.derived_to_list() == analyzer.derived_to_list()
+        np.testing.assert_array_equal(restored.signal(distance + 1), analyzer.signal(distance + 1))
+
+    def test_hash_mismatch(self, analyzer):
+        header_chunk, extrema_chunk, *rest = list(iter_savepoint(analyzer))
+        tampered = analyzer.raw_data.copy()
+        tampered[0, 0] += 1
+        frame = zlib.compress(tampered.astype('<f8').tobytes())
+        chunks = [header_chunk, extrema_chunk, struct.pack("<I", len(frame)) + frame, struct.pack("<I", 0)]
+        with pytest.raises(ValueError, match="hash"):
+            read_savepoint(chunks)
+
+    def test_truncated(self, analyzer):
+        blob = b"".join(iter_savepoint(analyzer))
+        with pytest.raises(ValueError, match="Truncated"):
+            read_savepoint([blob[:-4]])
+
+    def test_rejects_other_files(self):
+        with pytest.raises(ValueError):
+            SavepointReader().feed(b"0;1;2\n3;4;5\n")
+
+    def test_header_is_json(self, analyzer):
+        blob = b"".join(iter_savepoint(analyzer))
+        assert blob.startswith(MAGIC)
+        (length,) = struct.unpack_from("<I", blob, len(MAGIC))
+        header = json.loads(blob[len(MAGIC) + 4:len(MAGIC) + 4 + length])
+        assert header["shape"] == [5000, 3]
+        assert header["extrema"] == len(analyzer.extrema)
+
+    def _with_header(self, analyzer, **changes):
+        blob = b"".join(iter_savepoint(analyzer))
+        (length,) = struct.unpack_from("<I", blob, len(MAGIC))
+        header = json.loads(blob[len(MAGIC) + 4:len(MAGIC) + 4 + length])
+        header.update(changes)
+        encoded = json.dumps(header).encode()
+        return MAGIC + struct.pack("<I", len(encoded)) + encoded + blob[len(MAGIC) + 4 + length:]
+
+    def test_rejects_oversized_shape(self, analyzer):
+        blob = self._with_header(analyzer, shape=[10 ** 12, 10 ** 6])
+        with pytest.raises(ValueError, match="exceeds"):
+            read_savepoint([blob])
+        with pytest.raises(ValueError, match="exceeds"):
+            SavepointReader(max_data_bytes=1024).feed(b"".join(iter_savepoint(analyzer)))
+
+    def test_rejects_malformed_shape(self, analyzer):
+        for shape in ([-1, 3], [5000], "5000x3", [5000.0, 3]):
+            with pytest.raises(ValueError, match="shape"):
+                read_savepoint([self._with_header(analyzer, shape=shape)])
+
+    def test_rejects_zip_bomb_frame(self, analyzer):
+        header_chunk, extrema_chunk, *rest = list(iter_savepoint(analyzer))
+        bomb = zlib.compress(bytes(256 * 1024 ** 2), 9)
+        assert len(bomb) < 1024 ** 2
+        chunks = [header_chunk, extrema_chunk, struct.pack("<I", len(bomb)) + bomb, struct.pack("<I", 0)]
+        with pytest.raises(ValueError, match="exceeds its declared shape"):
+            read_savepoint(chunks)
+
+
+@pytest.mark.parametrize("body", [b"{not json", b"[1, 2]", b'{"extrema": [{"index": 1, "type": 0}]}',
+                                  b'{"extrema": [3]}'])
+def test_malformed_json_savepoint_is_rejected(body):
+    from fastapi.testclient import TestClient
+    from main import app
+
+    response = TestClient(app).post("/api/savepoint/load", content=body,
+                                    headers={"content-type": "application/json"})
+    assert response.status_code == 400
@@ -0,0 +1,63 @@
+"""
+Tests for numpy-aware JSON serialization
+"""
+import json
+
+import numpy as np
+import pytest
+
+import serialization
+from analyzer import EXTREMUM_DTYPE
+from serialization import NumpyJSONResponse, dumps
+
+
+@pytest.fixture(params=["orjson", "stdlib"])
+def encoder(request, monkeypatch):
+    if request.param == "orjson":
+        if serialization.orjson is None:
+            pytest.skip("orjson not installed")
+    else:
+        monkeypatch.setattr(serialization, "orjson", None)
+    return dumps
+
+
+class TestDumps:
+    def test_arrays_match_tolist(self, encoder):
+        data = np.arange(24.0).reshape(6, 4)
+        payload = {
+            "column": data[:, 1],
+            "transposed": data.T,
+            "float32": data.astype(np.float32),
+            "float16": data[:2].astype(np.float16),
+            "ints": np.arange(5, dtype=np.int32),
+            "bools": np.array([True, False]),
+            "scalar": np.int64(7),
+        }
+        expected = {k: np.asarray(v).tolist() for k, v in payload.items()}
+        assert json.loads(encoder(payload)) == expected
+
+    def test_non_finite_become_null(self, encoder):
+        assert json.loads(encoder({"x": np.array([1.0, np.nan, np.inf])})) == {"x": [1.0, None, None]}
+
+    def test_plain_non_finite_floats_become_null(self, encoder):
+        payload = {"x": [1.0, float("nan")], "y": {"z": (float("-inf"), 2)}, "w": np.float64("nan")}
+        assert json.loads(encoder(payload)) == {"x": [1.0, None], "y": {"z": [None, 2]}, "w": None}
+
+    def test_structured_arrays_are_columnar(self, encoder):
+        records = np.zeros(3, dtype=EXTREMUM_DTYPE)
+        records["value"] = [1.5, 2.5, 3.5]
+        records["index"] = [10, 20, 30]
+        records["type"] = [1, 0, 1]
+        assert json.loads(encoder({"extrema": records})) == {
+            "extrema": {"value": [1.5, 2.5, 3.5], "index": [10, 20, 30], "type": [1, 0, 1]}
+        }
+
+    def test_unsupported_type(self, encoder):
+        with pytest.raises(TypeError):
+            encoder({"x": object()})
+
+
+def test_response_renders_numpy():
+    response = NumpyJSONResponse({"data": np.arange(3.0), "length": 3})
+    assert response.media_type == "application/json"
+    assert json.loads(response.body) == {"data": [0.0, 1.0, 2.0], "length": 3}
@@ -0,0 +1,106 @@
+"""
+Tests for the memory-budgeted session store
+"""
+import os
+
+import numpy as np
+import pytest
+
+from analyzer import GraphAnalyzer
+from sessions import SessionStore
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_analyzer(rows=1000, cols=4, seed=0):
+    analyzer = GraphAnalyzer()
+    analyzer.raw_data = np.random.default_rng(seed).normal(size=(rows, cols))
+    return analyzer
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def store(tmp_path, clock):
+    store = SessionStore(budget_bytes=80_000, ttl_seconds=60, spill_dir=str(tmp_path), clock=clock)
+    yield store
+    store.clear()
+
+
+class TestSessionStore:
+    def test_lru_spill_and_memmap_reload(self, store, tmp_path):
+        a, b = make_analyzer(seed=1), make_analyzer(seed=2)
+        expected = b.raw_data.copy()
+        a_id = store.create(a)
+        b_id = store.create(b)
+        # Two 32 KB sessions fit; touching a makes b the one to spill for a third
+        store[a_id]
+        store.create(make_analyzer(seed=3))
+        assert isinstance(b.raw_data, np.memmap)
+        assert not isinstance(a.raw_data, np.memmap)
+        assert len(os.listdir(tmp_path)) == 1
+        stats = store.stats()
+        assert stats["spilled_sessions"] == 1
+        assert stats["spilled_bytes"] == expected.nbytes
+        assert stats["resident_bytes"] <= 80_000
+        np.testing.assert_array_equal(store[b_id].raw_data, expected)
+
+    def test_spill_keeps_caches(self, store):
+        analyzer = make_analyzer(rows=2000)
+        analyzer.find_extrema(0, 20)
+        version = analyzer.data_version
+        sid = store.create(analyzer)
+        store.create(make_analyzer(rows=2000, seed=5))
+        assert isinstance(analyzer.raw_data, np.memmap)
+        assert analyzer.data_version == version
+        assert store[sid] is analyzer
+        assert store.stats()["spill_hits"] == 1
+
+    def test_hits_and_misses(self, store):
+        sid = store.create(make_analyzer(rows=10))
+        store[sid]
+        with pytest.raises(KeyError):
+            store["missing"]
+        assert "missing" not in store
+        stats = store.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 2
+
+    def test_ttl_expiry_removes_files(self, store, clock, tmp_path):
+        old = store.create(make_analyzer(rows=2000))
+        store.create(make_analyzer(rows=2000, seed=1))
+        assert os.listdir(tmp_path)
+        clock.now = 30
+        fresh = store.create(make_analyzer(rows=10))
+        clock.now = 61
+        assert old not in store
+        assert fresh in store
+        assert store.stats()["expired"] == 2
+        assert os.listdir(tmp_path) == []
+
+    def test_count_limit_evicts_least_recently_used(self, tmp_path):
+        store = SessionStore(budget_bytes=10 ** 9, max_sessions=2, ttl_seconds=None, spill_dir=str(tmp_path))
+        first = store.create(make_analyzer(rows=10))
+        second = store.create(make_analyzer(rows=10))
+        store[first]
+        store.create(make_analyzer(rows=10))
+        assert first in store
+        assert second not in store
+
+    def test_shared_data_counted_once(self, tmp_path):
+        store = SessionStore(budget_bytes=10 ** 9, ttl_seconds=None, spill_dir=str(tmp_path))
+        shared = np.zeros((1000, 4))
+        for _ in range(3):
+            analyzer = GraphAnalyzer()
+            analyzer.raw_data = shared
+            store.create(analyzer)
+        assert store.stats()["resident_bytes"] == shared.nbytes
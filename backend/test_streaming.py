@@ -0,0 +1,144 @@
+"""
+Tests for live ingestion: online extrema and event emission
+"""
+import numpy as np
+import pytest
+from scipy.signal import find_peaks
+
+from analyzer import GraphAnalyzer
+from streaming import LiveStream, OnlineExtremaDetector, merge_updates
+
+
+def gait(rows=20000, columns=3, seed=0):
+    rng = np.random.default_rng(seed)
+    t = np.arange(rows) / 100
+    return np.column_stack([np.sin(2 * np.pi * (0.8 + 0.1 * k) * t) + 0.01 * rng.standard_normal(rows)
+                            for k in range(columns)])
+
+
+def batch_extrema(signal, min_distance):
+    maxima, _ = find_peaks(signal, distance=min_distance)
+    minima, _ = find_peaks(-signal, distance=min_distance)
+    indices = np.concatenate([maxima, minima])
+    types = np.concatenate([np.ones(len(maxima)), np.zeros(len(minima))])
+    order = np.argsort(indices)
+    return indices[order], types[order]
+
+
+def feed_in_chunks(detector, signal, seed=1):
+    rng = np.random.default_rng(seed)
+    parts, pos = [], 0
+    while pos < len(signal):
+        size = int(rng.integers(1, 200))
+        parts.append(detector.feed(signal[pos:pos + size]))
+        pos += size
+    parts.append(detector.flush())
+    return [np.concatenate([p[i] for p in parts]) for i in range(3)]
+
+
+class TestOnlineExtremaDetector:
+    @pytest.mark.parametrize("min_distance", [1, 10, 30])
+    def test_matches_find_peaks(self, min_distance):
+        signal = gait(columns=1)[:, 0]
+        indices, values, types = feed_in_chunks(OnlineExtremaDetector(min_distance), signal)
+        expected_indices, expected_types = batch_extrema(signal, min_distance)
+        np.testing.assert_array_equal(indices, expected_indices)
+        np.testing.assert_array_equal(types, expected_types)
+        np.testing.assert_array_equal(values, signal[indices])
+
+    def test_spacing_holds_on_noise(self):
+        signal = np.cumsum(np.random.default_rng(3).standard_normal(20000))
+        indices, _, types = feed_in_chunks(OnlineExtremaDetector(10, horizon=10), signal)
+        for t in (0, 1):
+            assert np.diff(indices[types == t]).min() >= 10
+
+    def test_plateau_waits_for_its_end(self):
+        detector = OnlineExtremaDetector(min_distance=2, horizon=2)
+        indices, _, _ = detector.feed(np.array([0, 1, 5, 5, 5, 5, 5, 5, 5, 5, 5, 5]))
+        assert len(indices) == 0
+        indices, _, types = detector.feed(np.array([1, 0, 0, 0, 0, 0, 0, 2]))
+        assert indices.tolist() == [6, 15] and types.tolist() == [1, 0]
+
+    def test_tail_is_bounded(self):
+        detector = OnlineExtremaDetector(min_distance=10)
+        signal = gait(rows=50000, columns=1)[:, 0]
+        for start in range(0, len(signal), 50):
+            detector.feed(signal[start:start + 50])
+        assert detector.samples == len(signal)
+        assert len(detector._tail) < detector.lookback + 2 * detector.horizon + 50
+
+    def test_long_flat_run_is_not_buffered(self):
+        detector = OnlineExtremaDetector(min_distance=10)
+        detector.feed(gait(rows=2000, columns=1)[:, 0])
+        tail = len(detector._tail)
+        for _ in range(1000):
+            detector.feed(np.full(1000, 3.0))
+        assert detector.samples == 2000 + 10 ** 6
+        assert len(detector._tail) == tail
+        # The run ends lower than it started: a plateau peak at its midpoint
+        indices, _, types = detector.feed(np.zeros(100))
+        assert indices[types == 1][-1] == 2000 + (10 ** 6 - 1) // 2
+
+    @pytest.mark.parametrize("min_distance", [1, 10])
+    def test_plateaus_match_find_peaks(self, min_distance):
+        signal = np.round(gait(columns=1)[:, 0] * 3)
+        indices, _, types = feed_in_chunks(OnlineExtremaDetector(min_distance), signal)
+        expected_indices, expected_types = batch_extrema(signal, min_distance)
+        np.testing.assert_array_equal(indices, expected_indices)
+        np.testing.assert_array_equal(types, expected_types)
+
+
+class TestLiveStream:
+    def test_events_match_batch_analysis(self):
+        data = gait()
+        reference = GraphAnalyzer()
+        reference.load_csv(data)
+        reference.find_extrema(1, 20)
+        expected = reference.find_pattern_events((0, 1, 0))
+
+        analyzer = GraphAnalyzer()
+        stream = LiveStream(analyzer, column=1, min_distance=20, pattern=(0, 1, 0))
+        updates = [stream.append(data[i:i + 137]) for i in range(0, len(data), 137)]
+        updates.append(stream.close())
+        merged = merge_updates(updates)
+
+        np.testing.assert_array_equal(analyzer.raw_data, data)
+        assert merged["samples"] == len(data)
+        assert [e["index"] for e in merged["extrema"]] == reference.extrema.indices.tolist()
+        assert [e["start_index"] for e in merged["events"]] == [e["start_index"] for e in expected]
+        # The session's extrema and event tables are usable as after find_extrema
+        assert len(analyzer.find_pattern_events((0, 1, 0))) == len(expected)
+
+    def test_continues_loaded_session(self):
+        data = gait()
+        analyzer = GraphAnalyzer()
+        analyzer.load_csv(data[:5000])
+        stream = LiveStream(analyzer, column=0, min_distance=20)
+        stream.append(data[5000:])
+        stream.close()
+        expected, _ = batch_extrema(data[:, 0], 20)
+        assert analyzer.extrema.indices.tolist() == expected.tolist()
+
+    def test_close_without_append_scans_loaded_data(self):
+        data = gait(rows=5000)
+        analyzer = GraphAnalyzer()
+        analyzer.load_csv(data)
+        stream = LiveStream(analyzer, column=2, min_distance=20)
+        update = stream.close()
+        expected, _ = batch_extrema(data[:, 2], 20)
+        assert [e["index"] for e in update["extrema"]] == expected.tolist()
+        assert analyzer.extrema.indices.tolist() == expected.tolist()
+
+    def test_rejects_wrong_width(self):
+        analyzer = GraphAnalyzer()
+        stream = LiveStream(analyzer, column=0)
+        stream.append(np.zeros((10, 3)))
+        with pytest.raises(ValueError):
+            stream.append(np.zeros((10, 2)))
+        assert analyzer.raw_data.shape == (10, 3)
+
+    def test_closed_stream(self):
+        stream = LiveStream(GraphAnalyzer())
+        stream.close()
+        with pytest.raises(ValueError):
+            stream.append(np.zeros((1, 1)))
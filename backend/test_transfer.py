@@ -0,0 +1,64 @@
+"""
+Tests for binary columnar transfer encodings
+"""
+import json
+
+import numpy as np
+import pytest
+
+from transfer import (
+    negotiate_media_type, quantize_delta16, dequantize_delta16, encode_columns,
+    BINARY_MEDIA_TYPE, ARROW_MEDIA_TYPE,
+)
+
+
+class TestNegotiation:
+    def test_json_by_default(self):
+        assert negotiate_media_type(None) is None
+        assert negotiate_media_type("application/json") is None
+
+    def test_binary_media_types(self):
+        assert negotiate_media_type("application/octet-stream") == BINARY_MEDIA_TYPE
+        assert negotiate_media_type("text/html, application/vnd.apache.arrow.stream;q=0.9") == ARROW_MEDIA_TYPE
+
+
+class TestQuantization:
+    def test_roundtrip_within_tolerance(self):
+        values = np.cumsum(np.random.default_rng(0).normal(size=10000))
+        codes, origin, step = quantize_delta16(values, 1e-3)
+        assert codes.dtype == np.int16
+        restored = dequantize_delta16(codes, origin, step)
+        assert np.max(np.abs(restored - values)) <= step / 2 + 1e-9
+
+    def test_large_jumps_widen_step(self):
+        values = np.array([0.0, 1e6, -1e6, 0.0])
+        codes, origin, step = quantize_delta16(values, 1e-3)
+        assert step > 2e-3
+        np.testing.assert_allclose(dequantize_delta16(codes, origin, step), values, atol=step / 2)
+
+    def test_rejects_non_finite(self):
+        with pytest.raises(ValueError):
+            quantize_delta16(np.array([0.0, np.nan]), 1e-3)
+
+
+class TestEncodeColumns:
+    def test_raw_float32_layout(self):
+        a = np.arange(5, dtype=float)
+        b = np.arange(5, dtype=float) * 2
+        body, headers = encode_columns({"0": a, "3": b}, BINARY_MEDIA_TYPE, dtype="float32")
+        decoded = np.frombuffer(body, dtype="<f4").reshape(2, 5)
+        np.testing.assert_array_equal(decoded, np.vstack([a, b]))
+        assert json.loads(headers["X-Columns"]) == ["0", "3"]
+        assert headers["X-Length"] == "5"
+
+    def test_delta16_layout(self):
+        a = np.sin(np.linspace(0, 10, 200))
+        body, headers = encode_columns({"0": a}, BINARY_MEDIA_TYPE, encoding="delta16", tolerance=1e-4)
+        origin, step = np.frombuffer(body[:16], dtype="<f8")
+        codes = np.frombuffer(body[16:], dtype="<i2")
+        restored = dequantize_delta16(codes, origin, step)
+        assert np.max(np.abs(restored - a)) <= float(headers["X-Quantize-Tolerance"]) + 1e-12
+
+    def test_unequal_lengths(self):
+        with pytest.raises(ValueError):
+            encode_columns({"0": np.zeros(3), "1": np.zeros(4)}, BINARY_MEDIA_TYPE)
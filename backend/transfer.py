@@ -0,0 +1,132 @@
+"""
+Binary columnar transfer encodings for signal data.
+
+Columns are sent column-major as little-endian buffers. Metadata travels in
+response headers so the body can be wrapped directly in a typed array on the
+client (e.g. ``new Float32Array(buffer)``).
+
+Encodings:
+  raw      - float32 or float64 samples, ``length`` values per column
+  delta16  - lossy: per-column float64 origins, then float64 steps, then
+             ``length`` int16 codes per column. Values are reconstructed as
+             ``origin + cumsum(codes) * step`` and are within ``step / 2`` of
+             the original (reported in ``X-Quantize-Tolerance``).
+"""
+import json
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+BINARY_MEDIA_TYPE = "application/octet-stream"
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+SUPPORTED_DTYPES = ("float32", "float64")
+SUPPORTED_ENCODINGS = ("raw", "delta16")
+
+# Headers the browser needs to read the binary payload
+EXPOSED_HEADERS = [
+    "X-Columns", "X-Length", "X-Dtype", "X-Encoding",
+    "X-Quantize-Tolerance",
+]
+
+_INT16_LIMIT = 32767
+
+
+def negotiate_media_type(accept: Optional[str]) -> Optional[str]:
+    """Return the binary media type requested in an Accept header, or None for JSON."""
+    if not accept:
+        return None
+    offered = [part.split(";")[0].strip().lower() for part in accept.split(",")]
+    for media_type in offered:
+        if media_type in (BINARY_MEDIA_TYPE, ARROW_MEDIA_TYPE):
+            return media_type
+    return None
+
+
+def quantize_delta16(values: np.ndarray, tolerance: float) -> Tuple[np.ndarray, float, float]:
+    """Quantize a signal to int16 deltas on a fixed grid.
+
+    The grid step is ``2 * tolerance`` unless the largest sample-to-sample jump
+    would overflow int16, in which case the step grows to fit. Quantizing
+    against the grid (not the previous reconstructed value) keeps the error
+    bounded by ``step / 2`` without accumulating along the signal.
+    Returns (codes, origin, step).
+    """
+    if tolerance <= 0:
+        raise ValueError("Tolerance must be positive")
+    values = np.asarray(values, dtype=np.float64)
+    if values.size == 0:
+        return np.zeros(0, dtype=np.int16), 0.0, 2.0 * tolerance
+    if not np.all(np.isfinite(values)):
+        raise ValueError("Quantized encoding requires finite values")
+
+    origin = float(values[0])
+    max_jump = float(np.max(np.abs(np.diff(values)))) if values.size > 1 else 0.0
+    # Leave one unit of headroom for rounding at both ends of a jump
+    step = max(2.0 * tolerance, max_jump / (_INT16_LIMIT - 1))
+    grid = np.rint((values - origin) / step).astype(np.int64)
+    codes = np.empty(values.size, dtype=np.int64)
+    codes[0] = 0
+    codes[1:] = np.diff(grid)
+    return codes.astype(np.int16), origin, step
+
+
+def dequantize_delta16(codes: np.ndarray, origin: float, step: float) -> np.ndarray:
+    return origin + np.cumsum(codes, dtype=np.int64) * step
+
+
+def encode_columns(columns: Dict[str, np.ndarray], media_type: str,
+                   dtype: str = "float64", encoding: str = "raw",
+                   tolerance: float = 1e-3) -> Tuple[bytes, Dict[str, str]]:
+    """Encode equally long columns into a binary body plus describing headers."""
+    if dtype not in SUPPORTED_DTYPES:
+        raise ValueError(f"Unsupported dtype '{dtype}'")
+    if encoding not in SUPPORTED_ENCODINGS:
+        raise ValueError(f"Unsupported encoding '{encoding}'")
+
+    names = list(columns.keys())
+    arrays = [np.asarray(columns[name], dtype=np.float64) for name in names]
+    length = len(arrays[0]) if arrays else 0
+    if any(len(a) != length for a in arrays):
+        raise ValueError("All columns must have the same length")
+
+    headers = {
+        "X-Columns": json.dumps(names),
+        "X-Length": str(length),
+        "X-Encoding": encoding,
+    }
+
+    if encoding == "delta16":
+        quantized = [quantize_delta16(a, tolerance) for a in arrays]
+        origins = np.array([q[1] for q in quantized], dtype="<f8")
+        steps = np.array([q[2] for q in quantized], dtype="<f8")
+        codes = [q[0].astype("<i2") for q in quantized]
+        headers["X-Dtype"] = "int16"
+        headers["X-Quantize-Tolerance"] = repr(float(steps.max() / 2) if len(steps) else tolerance)
+        if media_type == ARROW_MEDIA_TYPE:
+            metadata = {"origins": origins.tolist(), "steps": steps.tolist()}
+            return _encode_arrow(names, codes, metadata), headers
+        body = origins.tobytes() + steps.tobytes() + b"".join(c.tobytes() for c in codes)
+        return body, headers
+
+    np_dtype = "<f4" if dtype == "float32" else "<f8"
+    headers["X-Dtype"] = dtype
+    cast = [a.astype(np_dtype) for a in arrays]
+    if media_type == ARROW_MEDIA_TYPE:
+        return _encode_arrow(names, cast, {}), headers
+    return b"".join(a.tobytes() for a in cast), headers
+
+
+def _encode_arrow(names, arrays, metadata: dict) -> bytes:
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise NotImplementedError("Arrow IPC output requires pyarrow")
+
+    schema_metadata = {k: json.dumps(v) for k, v in metadata.items()}
+    table = pa.table({name: arr for name, arr in zip(names, arrays)})
+    table = table.replace_schema_metadata(schema_metadata)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
@@ -179,11 +179,11 @@ export default function Home() {
     return () => registerSessionRecovery(null);
   }, [rawData, extrema, currentFrequency]);
 
-  const handleFileUpload = useCallback(async (file: File, delimiter: string, trimZeros: boolean) => {
+  const handleFileUpload = useCallback(async (file: File, delimiter: string, trimZeros: boolean, headerRows: number = 0) => {
     setIsLoading(true);
     setError(null);
     try {
-      const result = await uploadFile(file, delimiter, trimZeros);
+      const result = await uploadFile(file, delimiter, trimZeros, headerRows);
       setSessionId(result.session_id);
       setColumns(result.columns);
       setShowUploadForm(false);
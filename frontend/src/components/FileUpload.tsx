@@ -5,7 +5,7 @@ import { Upload, Check, X } from 'lucide-react';
 import { previewFile, PreviewResponse } from '@/lib/api';
 
 interface FileUploadProps {
-  onFileSelect: (file: File, delimiter: string, trimZeros: boolean) => void;
+  onFileSelect: (file: File, delimiter: string, trimZeros: boolean, headerRows: number) => void;
   isLoading?: boolean;
 }
 
@@ -67,8 +67,9 @@ export default function FileUpload({ onFileSelect, isLoading }: FileUploadProps)
   );
 
   const handleConfirm = useCallback(() => {
-    if (selectedFile) onFileSelect(selectedFile, delimiter, trimZeros);
-  }, [selectedFile, onFileSelect, delimiter, trimZeros]);
+    // Upload with the layout the preview detected, so header lines are skipped
+    if (selectedFile && preview) onFileSelect(selectedFile, preview.delimiter, trimZeros, preview.header_rows);
+  }, [selectedFile, onFileSelect, preview, trimZeros]);
 
   const handleCancel = useCallback(() => {
     setSelectedFile(null);
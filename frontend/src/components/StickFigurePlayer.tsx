@@ -2,29 +2,26 @@
 
 import { useState, useEffect, useRef, useCallback } from 'react';
 import { Play, Pause, RotateCcw, Download, Settings } from 'lucide-react';
-
-interface Point {
-  x: number;
-  y: number;
-  label: string;
-}
-
-interface Frame {
-  points: Point[];
-}
-
-interface StickFigureData {
-  frames: Frame[];
-  num_frames: number;
-  num_points: number;
-  bounds: {
-    x_min: number;
-    x_max: number;
-    y_min: number;
-    y_max: number;
-  };
-  connections: number[][];
-  frame_rate: number;
+import { StickFigureData, StickFigurePoint } from '@/lib/api';
+
+// Points to draw for one frame. In column mode the trail is rebuilt from the
+// previous trail_length frames of the single columnar series.
+function framePoints(data: StickFigureData, frameIndex: number): StickFigurePoint[] {
+  const local = frameIndex - data.start_frame;
+  if (local < 0 || local >= data.frame_index.length) return [];
+  if (data.mode === 'column') {
+    const start = Math.max(0, local - data.trail_length + 1);
+    const points: StickFigurePoint[] = [];
+    for (let i = start; i <= local; i++) {
+      points.push({
+        x: data.x[0][i],
+        y: data.y[0][i],
+        label: i === local ? `t=${data.frame_index[i]}` : '',
+      });
+    }
+    return points;
+  }
+  return data.labels.map((label, p) => ({ x: data.x[p][local], y: data.y[p][local], label }));
 }
 
 interface StickFigurePlayerProps {
@@ -48,8 +45,8 @@ export default function StickFigurePlayer({ data, onClose }: StickFigurePlayerPr
     if (!ctx) return;
 
     const { bounds } = data;
-    const frame = data.frames[frameIndex];
-    if (!frame) return;
+    const frame = { points: framePoints(data, frameIndex) };
+    if (frame.points.length === 0) return;
 
     const padding = 40;
     const width = canvas.width - padding * 2;
@@ -19,6 +19,7 @@ export interface FailureTicket {
 
 const FAILURE_LOG_KEY = 'graph-analyzer-failures';
 const MAX_FAILURES = 50;
+const MAX_BUSY_RETRIES = 3;
 
 export function logFailureTicket(ticket: Omit<FailureTicket, 'id' | 'timestamp'>): FailureTicket {
   const full: FailureTicket = {
@@ -68,8 +69,32 @@ async function runRecoveryOnce(): Promise<string | null> {
   return recoveryInFlight;
 }
 
+function parseServerTiming(header: unknown): Record<string, number> {
+  const stages: Record<string, number> = {};
+  if (typeof header !== 'string') return stages;
+  for (const entry of header.split(',')) {
+    const [name, ...params] = entry.trim().split(';');
+    const dur = params.find((p) => p.trim().startsWith('dur='));
+    if (name && dur) stages[name] = Number(dur.trim().slice(4));
+  }
+  return stages;
+}
+
 api.interceptors.response.use(
-  (response) => response,
+  (response) => {
+    const stages = parseServerTiming(response.headers?.['server-timing']);
+    if (Object.keys(stages).length) {
+      try {
+        Sentry.addBreadcrumb({
+          category: 'server-timing',
+          message: `${response.config?.method?.toUpperCase() ?? 'GET'} ${response.config?.url ?? ''}`,
+          data: stages,
+          level: 'info',
+        });
+      } catch { /* ignore */ }
+    }
+    return response;
+  },
   async (error) => {
     const status = error?.response?.status;
     const url = error?.config?.url;
@@ -77,6 +102,15 @@ api.interceptors.response.use(
 
     const isSessionMissing = status === 404 && typeof detail === 'string' && /session not found/i.test(detail);
     const cfg = error?.config;
+
+    // Compute queue full: wait as long as the server asks, a few times at most
+    const retryAfter = Number(error?.response?.headers?.['retry-after']);
+    if (status === 503 && cfg && Number.isFinite(retryAfter) && (cfg.__busyRetries ?? 0) < MAX_BUSY_RETRIES) {
+      cfg.__busyRetries = (cfg.__busyRetries ?? 0) + 1;
+      await new Promise((resolve) => setTimeout(resolve, retryAfter * 1000));
+      return api.request(cfg);
+    }
+
     if (isSessionMissing && sessionRecovery && cfg && !cfg.__sessionRetried) {
       try {
         const newSid = await runRecoveryOnce();
@@ -121,6 +155,13 @@ export interface Extremum {
   type: number;
 }
 
+/** Extrema as parallel arrays (the `columnar` response shape). */
+export interface ColumnarExtrema {
+  value: number[];
+  index: number[];
+  type: number[];
+}
+
 export interface UploadResponse {
   session_id: string;
   rows: number;
@@ -166,21 +207,33 @@ export interface PreviewResponse {
   zero_rows_start: number;
   zero_rows_end: number;
   preview: number[][];
+  delimiter: string;
+  header_rows: number;
+  // Row counts of large files are extrapolated from the scanned head and tail
+  rows_estimated: boolean;
 }
 
-export async function previewFile(file: File, delimiter: string = ';', trimZeros: boolean = false): Promise<PreviewResponse> {
+// Pass delimiter = null to let the backend detect it
+export async function previewFile(file: File, delimiter: string | null = ';', trimZeros: boolean = false): Promise<PreviewResponse> {
   const formData = new FormData();
   formData.append('file', file);
-  const params = new URLSearchParams({ delimiter, trim_zeros: String(trimZeros) });
+  const params = new URLSearchParams({ trim_zeros: String(trimZeros) });
+  if (delimiter !== null) params.set('delimiter', delimiter);
   const response = await api.post(`/api/preview?${params}`, formData);
   return response.data;
 }
 
-export async function uploadFile(file: File, delimiter: string = ';', trimZeros: boolean = false): Promise<UploadResponse> {
-  const formData = new FormData();
-  formData.append('file', file);
-  const params = new URLSearchParams({ delimiter, trim_zeros: String(trimZeros) });
-  const response = await api.post(`/api/upload?${params}`, formData);
+export async function uploadFile(
+  file: File,
+  delimiter: string = ';',
+  trimZeros: boolean = false,
+  headerRows: number = 0
+): Promise<UploadResponse> {
+  // Raw body upload: the backend parses the CSV chunk by chunk as it arrives
+  const params = new URLSearchParams({ delimiter, trim_zeros: String(trimZeros), header_rows: String(headerRows) });
+  const response = await api.post(`/api/upload/stream?${params}`, file, {
+    headers: { 'Content-Type': 'text/csv' },
+  });
   return response.data;
 }
 
@@ -188,13 +241,15 @@ export async function analyzeData(
   sessionId: string,
   column: number,
   minDistance: number,
-  frequency: number
+  frequency: number,
+  alternate: boolean = false
 ): Promise<AnalyzeResponse> {
   const response = await api.post('/api/analyze', {
     session_id: sessionId,
     column,
     min_distance: minDistance,
     frequency,
+    alternate,
   });
   return response.data;
 }
@@ -262,11 +317,86 @@ export async function getColumnData(
   return response.data;
 }
 
+export interface ColumnLODResponse {
+  index: number[];
+  data: number[];
+  bucket: number;
+  length: number;
+}
+
+export async function getColumnLOD(
+  sessionId: string,
+  column: number,
+  start: number,
+  end: number | undefined,
+  width: number
+): Promise<ColumnLODResponse> {
+  const response = await api.post('/api/data/column/lod', {
+    session_id: sessionId,
+    column,
+    start,
+    end,
+    width,
+  });
+  return response.data;
+}
+
+export type BinaryColumns = Record<string, Float32Array | Float64Array>;
+
+function decodeBinaryColumns(buffer: ArrayBuffer, headers: Record<string, string>): BinaryColumns {
+  const names: string[] = JSON.parse(headers['x-columns'] ?? '[]');
+  const length = Number(headers['x-length'] ?? 0);
+  const result: BinaryColumns = {};
+  if (headers['x-encoding'] === 'delta16') {
+    const origins = new Float64Array(buffer, 0, names.length);
+    const steps = new Float64Array(buffer, names.length * 8, names.length);
+    const codes = new Int16Array(buffer, names.length * 16, names.length * length);
+    names.forEach((name, c) => {
+      const out = new Float64Array(length);
+      let acc = 0;
+      for (let i = 0; i < length; i++) {
+        acc += codes[c * length + i];
+        out[i] = origins[c] + acc * steps[c];
+      }
+      result[name] = out;
+    });
+    return result;
+  }
+  const Ctor = headers['x-dtype'] === 'float32' ? Float32Array : Float64Array;
+  names.forEach((name, c) => {
+    result[name] = new Ctor(buffer, c * length * Ctor.BYTES_PER_ELEMENT, length);
+  });
+  return result;
+}
+
+export async function getColumnsBinary(
+  sessionId: string,
+  columns: number[],
+  dtype: 'float32' | 'float64' = 'float32',
+  encoding: 'raw' | 'delta16' = 'raw',
+  tolerance: number = 1e-3
+): Promise<BinaryColumns> {
+  const params = new URLSearchParams({ dtype, encoding, tolerance: String(tolerance) });
+  const response = await api.post(`/api/data/columns?${params}`, {
+    session_id: sessionId,
+    columns,
+  }, {
+    responseType: 'arraybuffer',
+    headers: { Accept: 'application/octet-stream' },
+  });
+  return decodeBinaryColumns(response.data, response.headers as Record<string, string>);
+}
+
 export async function getExtrema(sessionId: string): Promise<{ extrema: Extremum[] }> {
   const response = await api.get(`/api/session/${sessionId}/extrema`);
   return response.data;
 }
 
+export async function getExtremaColumnar(sessionId: string): Promise<{ extrema: ColumnarExtrema }> {
+  const response = await api.get(`/api/session/${sessionId}/extrema`, { params: { columnar: true } });
+  return response.data;
+}
+
 export async function exportEvents(
   sessionId: string,
   pattern: number[]
@@ -284,14 +414,11 @@ export interface StickFigurePoint {
   label: string;
 }
 
-export interface StickFigureFrame {
-  points: StickFigurePoint[];
-}
-
 export interface StickFigureData {
-  frames: StickFigureFrame[];
+  mode: 'column' | 'points';
   num_frames: number;
   num_points: number;
+  labels: string[];
   bounds: {
     x_min: number;
     x_max: number;
@@ -300,6 +427,16 @@ export interface StickFigureData {
   };
   connections: number[][];
   frame_rate: number;
+  source_frequency: number;
+  frame_step: number;
+  trail_length: number;
+  page_start: number;
+  page_end: number;
+  start_frame: number;
+  frame_index: number[];
+  // Columnar coordinates: x[point][frame], y[point][frame]
+  x: number[][];
+  y: number[][];
 }
 
 export async function getStickFigureData(
@@ -319,14 +456,33 @@ export async function getStickFigureData(
   return response.data;
 }
 
-export interface MeanTrendResponse {
+// Robust per-timepoint statistics, requested with `ensemble` on the mean-trend calls
+export interface EnsembleOptions {
+  percentiles?: number[];  // default 5, 25, 75, 95
+  trim?: number;  // fraction cut at each end for the trimmed mean
+  resamples?: number;  // bootstrap resamples for the confidence band of the mean
+  confidence?: number;
+  seed?: number;  // omitted: a fresh seed, returned in `ensemble.seed`
+}
+
+// Arrays have the shape of `mean`; percentiles add a level axis before the samples
+export interface EnsembleStatistics<T> {
+  median?: T;
+  trimmed_mean?: T;
+  percentiles?: T[];
+  ci_lower?: T;
+  ci_upper?: T;
+  ensemble?: Required<EnsembleOptions> & { percentile_levels: number[] };
+}
+
+export interface MeanTrendResponse extends EnsembleStatistics<number[]> {
   mean: number[];
   std: number[];
   length: number;
   event_count: number;
 }
 
-export interface MeanTrendExtendedResponse {
+export interface MeanTrendExtendedResponse extends EnsembleStatistics<number[]> {
   mean: number[];
   std: number[];
   normalized_segments: number[][];
@@ -341,13 +497,15 @@ export async function getMeanTrend(
   sessionId: string,
   pattern: number[],
   column: number,
-  targetLength?: number
+  targetLength?: number,
+  ensemble?: EnsembleOptions
 ): Promise<MeanTrendResponse> {
   const response = await api.post('/api/mean-trend', {
     session_id: sessionId,
     pattern,
     column,
     target_length: targetLength,
+    ensemble,
   });
   return response.data;
 }
@@ -358,7 +516,8 @@ export async function getMeanTrendExtended(
   column: number,
   targetLength?: number,
   lengthMode: 'average' | 'percentage' = 'average',
-  interpolationMethod: 'linear' | 'spline' = 'linear'
+  interpolationMethod: 'linear' | 'spline' = 'linear',
+  ensemble?: EnsembleOptions
 ): Promise<MeanTrendExtendedResponse> {
   const response = await api.post('/api/mean-trend-extended', {
     session_id: sessionId,
@@ -367,6 +526,44 @@ export async function getMeanTrendExtended(
     target_length: targetLength,
     length_mode: lengthMode,
     interpolation_method: interpolationMethod,
+    ensemble,
+  });
+  return response.data;
+}
+
+// One event set (from the session's reference column) over several columns;
+// mean/std rows follow `columns`
+export interface MeanTrendsResponse extends EnsembleStatistics<number[][]> {
+  columns: number[];
+  reference_column: number;
+  mean: number[][];
+  std: number[][];
+  target_length: number;
+  average_length: number;
+  event_count: number;
+  lengths: number[];
+  normalized_segments?: number[][][];  // columns x events x target_length
+}
+
+export async function getMeanTrends(
+  sessionId: string,
+  pattern: number[],
+  columns?: number[],
+  targetLength?: number,
+  lengthMode: 'average' | 'percentage' = 'average',
+  interpolationMethod: 'linear' | 'spline' = 'linear',
+  includeSegments: boolean = false,
+  ensemble?: EnsembleOptions
+): Promise<MeanTrendsResponse> {
+  const response = await api.post('/api/mean-trends', {
+    session_id: sessionId,
+    pattern,
+    columns,
+    target_length: targetLength,
+    length_mode: lengthMode,
+    interpolation_method: interpolationMethod,
+    include_segments: includeSegments,
+    ensemble,
   });
   return response.data;
 }
@@ -377,24 +574,163 @@ export interface AllColumnsExportResult {
     column: number;
     extrema_count: number;
     events: PatternEvent[];
+    elapsed_ms: number;
   }>;
+  timing: {
+    workers: number;
+    total_ms: number;
+    column_ms_sum: number;
+    speedup: number | null;
+  };
 }
 
 export async function exportAllColumns(
   sessionId: string,
   pattern: number[],
   minDistance: number = 10,
-  frequency: number = 100
+  frequency: number = 100,
+  workers?: number
 ): Promise<AllColumnsExportResult> {
   const response = await api.post('/api/export/all-columns', {
     session_id: sessionId,
     pattern,
     min_distance: minDistance,
     frequency,
+    workers,
   });
   return response.data;
 }
 
+export interface JobStatus {
+  job_id: string;
+  kind: string;
+  status: 'queued' | 'running' | 'done' | 'failed' | 'cancelled';
+  progress: { done: number; total: number | null; unit: string; fraction: number | null };
+  error: string | null;
+  elapsed_s: number;
+  reused?: boolean;  // submit answered by an identical earlier job
+}
+
+export async function submitExportAllColumnsJob(
+  sessionId: string,
+  pattern: number[],
+  minDistance: number = 10,
+  frequency: number = 100,
+  workers?: number
+): Promise<JobStatus> {
+  const response = await api.post('/api/jobs/export/all-columns', {
+    session_id: sessionId,
+    pattern,
+    min_distance: minDistance,
+    frequency,
+    workers,
+  });
+  return response.data;
+}
+
+export async function submitMeanTrendsJob(
+  sessionId: string,
+  pattern: number[],
+  columns?: number[],
+  targetLength?: number,
+  lengthMode: 'average' | 'percentage' = 'average',
+  interpolationMethod: 'linear' | 'spline' = 'linear',
+  ensemble?: EnsembleOptions
+): Promise<JobStatus> {
+  const response = await api.post('/api/jobs/mean-trends', {
+    session_id: sessionId,
+    pattern,
+    columns,
+    target_length: targetLength,
+    length_mode: lengthMode,
+    interpolation_method: interpolationMethod,
+    ensemble,
+  });
+  return response.data;
+}
+
+export async function getJob(jobId: string): Promise<JobStatus> {
+  const response = await api.get(`/api/jobs/${jobId}`);
+  return response.data;
+}
+
+export async function cancelJob(jobId: string): Promise<JobStatus> {
+  const response = await api.post(`/api/jobs/${jobId}/cancel`);
+  return response.data;
+}
+
+// Polls until the job finishes; rejects if it failed or was cancelled
+export async function waitForJob<T>(
+  job: JobStatus,
+  onProgress?: (status: JobStatus) => void,
+  intervalMs: number = 500
+): Promise<T> {
+  let status = job;
+  while (status.status === 'queued' || status.status === 'running') {
+    onProgress?.(status);
+    await new Promise((resolve) => setTimeout(resolve, intervalMs));
+    status = await getJob(status.job_id);
+  }
+  onProgress?.(status);
+  const response = await api.get(`/api/jobs/${status.job_id}/result`);
+  return response.data;
+}
+
+export interface AngleDefinition {
+  name?: string;
+  points: number[][];
+}
+
+export interface AnglesResponse {
+  angles: { name: string; data: number[] }[];
+  length: number;
+}
+
+export async function getAngles(
+  sessionId: string,
+  angles: AngleDefinition[]
+): Promise<AnglesResponse> {
+  const response = await api.post('/api/angles', {
+    session_id: sessionId,
+    angles,
+  });
+  return response.data;
+}
+
+// Virtual column: its id can be passed wherever a column index is accepted
+export interface DerivedColumn {
+  column: number;
+  kind: 'distance' | 'angle' | 'normalized' | 'filtered';
+  points: number[][];
+  source: number | null;
+  params: {
+    method?: 'lowpass' | 'highpass' | 'savgol' | 'moving_average';
+    cutoff?: number;
+    order?: number;
+    window?: number;
+    polyorder?: number;
+  };
+  name: string;
+}
+
+export async function addDerivedColumn(
+  sessionId: string,
+  definition: Omit<DerivedColumn, 'column' | 'source' | 'points' | 'params' | 'name'> &
+    Partial<Pick<DerivedColumn, 'source' | 'points' | 'params' | 'name'>>
+): Promise<DerivedColumn> {
+  const response = await api.post('/api/derived', { session_id: sessionId, ...definition });
+  return response.data;
+}
+
+export async function listDerivedColumns(sessionId: string): Promise<DerivedColumn[]> {
+  const response = await api.get(`/api/session/${sessionId}/derived`);
+  return response.data.columns;
+}
+
+export async function removeDerivedColumn(sessionId: string, column: number): Promise<void> {
+  await api.post('/api/derived/remove', { session_id: sessionId, column });
+}
+
 export async function restoreState(
   sessionId: string,
   extrema: Extremum[]
@@ -427,6 +763,26 @@ export async function loadSavepoint(
   return response.data;
 }
 
+const SAVEPOINT_MEDIA_TYPE = 'application/x-graph-savepoint';
+
+// Binary savepoint (compressed, hashed). Without data it only restores
+// against a recording the server still holds; loading then answers 409.
+export async function downloadSavepoint(sessionId: string, includeData: boolean = true): Promise<Blob> {
+  const response = await api.post(
+    '/api/savepoint/save',
+    { session_id: sessionId, include_data: includeData },
+    { headers: { Accept: SAVEPOINT_MEDIA_TYPE }, responseType: 'blob' }
+  );
+  return response.data;
+}
+
+export async function uploadSavepoint(savepoint: Blob): Promise<{ session_id: string; data_reused: boolean }> {
+  const response = await api.post('/api/savepoint/load', savepoint, {
+    headers: { 'Content-Type': SAVEPOINT_MEDIA_TYPE },
+  });
+  return response.data;
+}
+
 export async function checkSession(sessionId: string): Promise<boolean> {
   try {
     await api.get(`/api/session/${sessionId}`);
@@ -444,3 +800,57 @@ export async function getSavepoint(
   });
   return response.data;
 }
+
+export interface StreamInfo {
+  session_id: string;
+  column: number;
+  min_distance: number;
+  horizon: number;
+  samples: number;
+}
+
+// Extrema and events that became final with one append
+export interface StreamUpdate {
+  samples: number;
+  extrema: { index: number; value: number; type: number }[];
+  events: PatternEvent[];
+  error?: string;
+}
+
+export async function startStream(options: {
+  sessionId?: string;
+  column?: number;
+  minDistance?: number;
+  frequency?: number;
+  pattern?: number[];
+  horizon?: number;
+} = {}): Promise<StreamInfo> {
+  const response = await api.post('/api/stream/start', {
+    session_id: options.sessionId,
+    column: options.column ?? 0,
+    min_distance: options.minDistance ?? 10,
+    frequency: options.frequency ?? 100,
+    pattern: options.pattern,
+    horizon: options.horizon,
+  });
+  return response.data;
+}
+
+export async function appendStream(sessionId: string, rows: number[][]): Promise<StreamUpdate> {
+  const response = await api.post(`/api/stream/${sessionId}/append`, { rows });
+  return response.data;
+}
+
+export async function closeStream(sessionId: string): Promise<StreamUpdate> {
+  const response = await api.post(`/api/stream/${sessionId}/close`);
+  return response.data;
+}
+
+// WebSocket for a started stream: send {rows} (or float64 rows as binary), receive StreamUpdate
+export function openStreamSocket(sessionId: string, columns?: number): WebSocket {
+  const base = API_BASE || window.location.origin;
+  const url = new URL(`/api/stream/${sessionId}/ws`, base);
+  url.protocol = url.protocol === 'https:' ? 'wss:' : 'ws:';
+  if (columns !== undefined) url.searchParams.set('columns', String(columns));
+  return new WebSocket(url.toString());
+}